@@ -0,0 +1,347 @@
+# api_server.py
+# Local HTTP/JSON service over database_ops for other internal tools (stdlib only, no GUI).
+# Requests are handled by a fixed pool of reader threads; each keeps its own pooled connection
+# (database_ops' per-thread connections), so reads run concurrently under WAL. Every write is
+# handed to a single writer thread, so API writes never contend for SQLite's write lock.
+#
+#   python api_server.py [--db employee_manager.db] [--host 127.0.0.1] [--port 8765] [--readers 8]
+#
+# Endpoints (all JSON):
+#   GET  /health
+#   GET  /employees?limit=&after=&sort=&desc=      keyset pages; pass "next" back as after
+#   GET  /employees/search?q=&limit=
+#   GET  /employees/<id>
+#   GET  /employees/<id>/{absences,overtimes,leaves,loans,payroll}?limit=&offset=   newest first; loans include closed ones
+#   GET  /payroll/<id>/<YYYY-MM>                   rendered payslip text
+#   POST /employees                                {national_id, first_name, last_name, position, base_salary}
+#   POST /employees/<id>/{absences,overtimes}      {date, hours, note}
+#   POST /employees/<id>/loans                     {date, amount, installment_amount, description}
+#   POST /payroll/<YYYY-MM>                        {benefits, deductions}: runs the month's payroll
+
+import argparse
+import base64
+import json
+import re
+import socket
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import database_ops
+from config import API_HOST, API_PORT, API_READER_THREADS, API_PAGE_SIZE, API_MAX_PAGE_SIZE
+from employee_import import validate_employee_record
+from payslips import render_payslip_details
+
+EMPLOYEE_FIELDS = ("national_id", "first_name", "last_name", "position", "base_salary")
+HISTORY_FIELDS = {
+    "absences": ("date", "hours", "reason"),
+    "overtimes": ("date", "hours", "description"),
+    "leaves": ("start_date", "end_date", "leave_type", "duration_days", "description"),
+    "loans": ("id", "loan_date", "amount", "remaining_amount", "installment_amount", "description", "is_active"),
+    "payroll": ("payroll_month", "base_salary", "overtime_hours", "absence_hours", "benefits", "deductions",
+                "loan_deduction", "net_payment", "payslip", "recorded_date"),
+}
+MAX_BODY_BYTES = 1024 * 1024
+KEEP_ALIVE_TIMEOUT = 30 # Seconds an idle kept-alive connection may hold its reader thread
+
+
+class ApiError(Exception):
+    """Turned into a JSON error response with the given status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _page_size(query):
+    try:
+        limit = int(query.get("limit", API_PAGE_SIZE))
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "limit باید عدد باشد.")
+    return max(1, min(limit, API_MAX_PAGE_SIZE))
+
+
+def _encode_cursor(after):
+    return None if after is None else base64.urlsafe_b64encode(json.dumps(after).encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor):
+    try:
+        sort_value, national_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "after نامعتبر است.")
+    return sort_value, national_id
+
+
+def _valid_month(value):
+    try:
+        if datetime.strptime(value, "%Y-%m").strftime("%Y-%m") == value:
+            return value
+    except ValueError:
+        pass
+    raise ApiError(HTTPStatus.BAD_REQUEST, "فرمت ماه نامعتبر است (YYYY-MM).")
+
+
+def _valid_date(value):
+    try:
+        if date.fromisoformat(value).isoformat() == value:
+            return value
+    except (TypeError, ValueError):
+        pass
+    raise ApiError(HTTPStatus.BAD_REQUEST, "فرمت تاریخ نامعتبر است (YYYY-MM-DD).")
+
+
+def _number(body, field, default=None, positive=False):
+    value = body.get(field, default)
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"{field} باید یک عدد معتبر باشد.")
+    if positive and value <= 0:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"{field} باید مثبت باشد.")
+    return value
+
+
+def _require_employee(national_id):
+    if database_ops.get_employee_data(national_id) is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, "کارمندی با این کد ملی یافت نشد.")
+
+
+# --- Handlers: (server, match, query, body) -> (status, payload) ---
+
+def get_health(server, match, query, body):
+    return HTTPStatus.OK, {"status": "ok"}
+
+
+def list_employees(server, match, query, body):
+    sort = query.get("sort", "national_id")
+    if sort not in database_ops.EMPLOYEE_SORT_KEYS:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"sort باید یکی از {', '.join(database_ops.EMPLOYEE_SORT_KEYS)} باشد.")
+    after = _decode_cursor(query["after"]) if query.get("after") else None
+    rows, next_after = database_ops.get_employees_page(sort, query.get("desc") == "1", after, _page_size(query))
+    return HTTPStatus.OK, {"items": [dict(zip(EMPLOYEE_FIELDS, row)) for row in rows], "next": _encode_cursor(next_after)}
+
+
+def search_employees(server, match, query, body):
+    rows = database_ops.search_employees(query.get("q", ""), limit=_page_size(query))
+    return HTTPStatus.OK, {"items": [dict(zip(EMPLOYEE_FIELDS, row)) for row in rows]}
+
+
+def get_employee(server, match, query, body):
+    row = database_ops.get_employee_data(match["national_id"])
+    if row is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, "کارمندی با این کد ملی یافت نشد.")
+    return HTTPStatus.OK, dict(zip(EMPLOYEE_FIELDS, row))
+
+
+def get_employee_history(server, match, query, body):
+    national_id, kind = match["national_id"], match["kind"]
+    _require_employee(national_id)
+    limit = _page_size(query)
+    try:
+        offset = max(0, int(query.get("offset", 0)))
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "offset باید عدد باشد.")
+    rows, total = database_ops.get_employee_history_page(kind, national_id, limit, offset)
+    if kind == "payroll":
+        # payslip_details is the stored record; consumers get the text the GUI shows
+        rows = [row[:8] + (render_payslip_details(*row[:9]), row[9]) for row in rows]
+    elif kind == "loans":
+        rows = [row[:6] + (bool(row[6]),) for row in rows]
+    fields = HISTORY_FIELDS[kind]
+    return HTTPStatus.OK, {"items": [dict(zip(fields, row)) for row in rows], "total": total, "offset": offset, "limit": limit}
+
+
+def get_payslip(server, match, query, body):
+    month = _valid_month(match["month"])
+    text = database_ops.get_payslip_details(match["national_id"], month)
+    if text is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, "فیش حقوقی برای این ماه ثبت نشده است.")
+    return HTTPStatus.OK, {"national_id": match["national_id"], "payroll_month": month, "payslip": text}
+
+
+def add_employee(server, match, query, body):
+    try:
+        row = validate_employee_record(body)
+    except ValueError as e:
+        raise ApiError(HTTPStatus.BAD_REQUEST, str(e))
+    if not server.run_write(database_ops.add_employee_to_db, *row):
+        raise ApiError(HTTPStatus.CONFLICT, "کارمندی با این کد ملی از قبل وجود دارد.")
+    return HTTPStatus.CREATED, dict(zip(EMPLOYEE_FIELDS, row))
+
+
+def add_attendance(server, match, query, body):
+    national_id, kind = match["national_id"], match["kind"]
+    _require_employee(national_id)
+    record = (national_id, _valid_date(body.get("date")), _number(body, "hours", positive=True), str(body.get("note", "")))
+    add = database_ops.add_absence_to_db if kind == "absences" else database_ops.add_overtime_to_db
+    server.run_write(add, *record)
+    return HTTPStatus.CREATED, {"national_id": national_id, "date": record[1], "hours": record[2], "note": record[3]}
+
+
+def add_loan(server, match, query, body):
+    national_id = match["national_id"]
+    _require_employee(national_id)
+    loan_date = _valid_date(body.get("date"))
+    amount = _number(body, "amount", positive=True)
+    installment = _number(body, "installment_amount", default=0)
+    server.run_write(database_ops.add_loan_to_db, national_id, loan_date, amount, installment, str(body.get("description", "")))
+    return HTTPStatus.CREATED, {"national_id": national_id, "date": loan_date, "amount": amount, "installment_amount": installment}
+
+
+def run_payroll(server, match, query, body):
+    from payroll import run_payroll_for_month
+
+    month = _valid_month(match["month"])
+    recorded = server.run_write(run_payroll_for_month, month, _number(body, "benefits", 0), _number(body, "deductions", 0))
+    return HTTPStatus.OK, {"payroll_month": month, "recorded": recorded}
+
+
+ROUTES = [
+    ("GET", r"/health", get_health),
+    ("GET", r"/employees", list_employees),
+    ("GET", r"/employees/search", search_employees),
+    ("GET", r"/employees/(?P<national_id>\d+)", get_employee),
+    ("GET", r"/employees/(?P<national_id>\d+)/(?P<kind>absences|overtimes|leaves|loans|payroll)", get_employee_history),
+    ("GET", r"/payroll/(?P<national_id>\d+)/(?P<month>[^/]+)", get_payslip),
+    ("POST", r"/employees", add_employee),
+    ("POST", r"/employees/(?P<national_id>\d+)/(?P<kind>absences|overtimes)", add_attendance),
+    ("POST", r"/employees/(?P<national_id>\d+)/loans", add_loan),
+    ("POST", r"/payroll/(?P<month>[^/]+)", run_payroll),
+]
+_COMPILED_ROUTES = [(method, re.compile(pattern + r"/?"), handler) for method, pattern, handler in ROUTES]
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive, so clients don't reconnect for every request
+    server_version = "PayrollApi/1"
+    timeout = KEEP_ALIVE_TIMEOUT
+    disable_nagle_algorithm = True # Headers and body are separate writes; don't let the body wait for an ACK
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            for route_method, pattern, handler in _COMPILED_ROUTES:
+                match = pattern.fullmatch(url.path)
+                if match and route_method == method:
+                    status, payload = handler(self.server, match.groupdict(), query, self._read_body() if method == "POST" else {})
+                    break
+            else:
+                raise ApiError(HTTPStatus.NOT_FOUND, "مسیر یافت نشد.")
+        except ApiError as e:
+            status, payload = e.status, {"error": str(e)}
+        except Exception as e: # Keep the connection usable and tell the client what went wrong
+            self.log_error("%s %s failed: %r", method, self.path, e)
+            status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+        self._send_json(status, payload)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "درخواست بیش از حد بزرگ است.")
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "بدنه درخواست JSON معتبر نیست.")
+        if not isinstance(body, dict):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "بدنه درخواست باید یک شیء JSON باشد.")
+        return body
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class PayrollApiServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer with a bounded pool of reader threads instead of a thread per
+    connection (so their database connections are reused) and one writer thread."""
+
+    daemon_threads = True
+
+    def __init__(self, address, readers=API_READER_THREADS, verbose=False):
+        super().__init__(address, ApiRequestHandler)
+        self.verbose = verbose
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="api-reader")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-writer")
+        self._open_requests = set() # Accepted sockets, queued or being served
+        self._open_requests_lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        # A kept-alive connection occupies its reader until the client closes it (or idles for
+        # KEEP_ALIVE_TIMEOUT), so readers bounds the number of concurrently served clients;
+        # further ones wait in the pool's queue.
+        with self._open_requests_lock:
+            self._open_requests.add(request)
+        self._readers.submit(self.process_request_thread, request, client_address)
+
+    def shutdown_request(self, request):
+        with self._open_requests_lock:
+            self._open_requests.discard(request)
+        super().shutdown_request(request)
+
+    def run_write(self, func, *args):
+        """Runs a database_ops write on the writer thread and returns its result."""
+        return self._writer.submit(func, *args).result()
+
+    def server_close(self):
+        super().server_close()
+        # Wake readers blocked on idle kept-alive connections, then let them finish
+        with self._open_requests_lock:
+            open_requests = list(self._open_requests)
+        for request in open_requests:
+            try:
+                request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass # Already closed by the client
+        self._readers.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+        database_ops.close_all_connections()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="سرویس HTTP/JSON اطلاعات کارمندان و حقوق")
+    parser.add_argument("--db", help=f"مسیر پایگاه داده (پیش‌فرض: {database_ops.DB_NAME})")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--readers", type=int, default=API_READER_THREADS, help="تعداد رشته‌های پاسخ‌گو")
+    parser.add_argument("-v", "--verbose", action="store_true", help="نمایش هر درخواست")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.db:
+        database_ops.DB_NAME = args.db
+    database_ops.init_db()
+    server = PayrollApiServer((args.host, args.port), readers=args.readers, verbose=args.verbose)
+    print(f"سرویس روی http://{args.host}:{server.server_address[1]} در حال اجراست (Ctrl+C برای توقف).")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
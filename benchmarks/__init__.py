@@ -0,0 +1,4 @@
+# benchmarks/__init__.py
+# Run individual benchmarks from the project root, e.g.: python -m benchmarks.bench_connection
+# The whole suite with baseline comparison: python -m benchmarks.suite --baseline <results.json>
+# Synthetic databases of any size: python -m benchmarks.datagen <output.db> --employees 1000000
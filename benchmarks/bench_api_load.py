@@ -0,0 +1,151 @@
+# benchmarks/bench_api_load.py
+# Load test of api_server: client threads with persistent connections send a mix of GET requests
+# (employee pages, single employees, histories, payslips, search) and, with --write-ratio, POSTs of
+# absences and overtimes, for a fixed duration. Reports requests per second and latency percentiles
+# per endpoint. By default the server runs in-process on a generated temporary dataset; --url
+# points the clients at an already running server instead (its data is then written to!).
+#   python -m benchmarks.bench_api_load --clients 16 --duration 10 --write-ratio 0.05
+
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import database_ops
+from api_server import PayrollApiServer
+from benchmarks.common import temp_database, percentile
+from benchmarks.datagen import generate_dataset
+
+
+def _request_mix(rng, national_ids, months, write_ratio):
+    """Returns (label, method, path, body) of one random request."""
+    national_id = rng.choice(national_ids)
+    if rng.random() < write_ratio:
+        kind = rng.choice(("absences", "overtimes"))
+        body = {"date": f"2099-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}", "hours": 1.0, "note": "load test"}
+        return f"POST /employees/<id>/{kind}", "POST", f"/employees/{national_id}/{kind}", body
+    choice = rng.random()
+    if choice < 0.3:
+        return "GET /employees/<id>", "GET", f"/employees/{national_id}", None
+    if choice < 0.5:
+        kind = rng.choice(("absences", "overtimes", "leaves", "loans"))
+        return f"GET /employees/<id>/{kind}", "GET", f"/employees/{national_id}/{kind}?limit=20", None
+    if choice < 0.65:
+        return "GET /employees/<id>/payroll", "GET", f"/employees/{national_id}/payroll?limit=3", None
+    if choice < 0.8:
+        return "GET /payroll/<id>/<month>", "GET", f"/payroll/{national_id}/{rng.choice(months)}", None
+    if choice < 0.9:
+        return "GET /employees (page)", "GET", f"/employees?limit=100&sort={rng.choice(('national_id', 'last_name'))}", None
+    return "GET /employees/search", "GET", f"/employees/search?q={national_id[:6]}&limit=20", None
+
+
+def _client(host, port, national_ids, months, write_ratio, deadline, seed, results, errors):
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    samples = {}
+    failed = 0
+    while time.perf_counter() < deadline:
+        label, method, path, body = _request_mix(rng, national_ids, months, write_ratio)
+        payload = None if body is None else json.dumps(body).encode("utf-8")
+        headers = {"Content-Type": "application/json"} if payload else {}
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            ok = response.status < 400 or response.status == 404 # A month without a payslip is a valid answer
+        except (OSError, http.client.HTTPException):
+            conn.close() # Reconnects on the next request
+            ok = False
+        elapsed = time.perf_counter() - start
+        if ok:
+            samples.setdefault(label, []).append(elapsed * 1000)
+        else:
+            failed += 1
+    conn.close()
+    results.append(samples)
+    errors.append(failed)
+
+
+def run_load(host, port, national_ids, months, clients, duration, write_ratio):
+    """Runs the clients for duration seconds; returns ({label: [latency ms]}, failures, elapsed)."""
+    results, errors = [], []
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=_client, args=(host, port, national_ids, months, write_ratio, deadline, seed, results, errors))
+               for seed in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    merged = {}
+    for samples in results:
+        for label, latencies in samples.items():
+            merged.setdefault(label, []).extend(latencies)
+    return merged, sum(errors), elapsed
+
+
+def print_report(merged, failures, elapsed):
+    everything = sorted(latency for latencies in merged.values() for latency in latencies)
+    print(f"{'endpoint':<34} {'requests':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for label, latencies in sorted(merged.items()):
+        ordered = sorted(latencies)
+        print(f"{label:<34} {len(ordered):9d} {percentile(ordered, 0.5):9.2f} {percentile(ordered, 0.99):9.2f} {ordered[-1]:9.2f}")
+    if everything:
+        print(f"{'all':<34} {len(everything):9d} {percentile(everything, 0.5):9.2f} {percentile(everything, 0.99):9.2f} {everything[-1]:9.2f}")
+    print(f"\n{len(everything) / elapsed:.0f} requests/s over {elapsed:.1f} s, {failures} failed")
+
+
+def _sample_keys(host, port):
+    """National ids and payroll months of a running server, read through the API itself."""
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    conn.request("GET", "/employees?limit=1000")
+    national_ids = [item["national_id"] for item in json.loads(conn.getresponse().read())["items"]]
+    months = []
+    if national_ids:
+        conn.request("GET", f"/employees/{national_ids[0]}/payroll")
+        months = [item["payroll_month"] for item in json.loads(conn.getresponse().read())["items"]]
+    conn.close()
+    return national_ids, months or ["2000-01"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test of the HTTP/JSON service")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds")
+    parser.add_argument("--employees", type=int, default=5000, help="size of the generated dataset")
+    parser.add_argument("--readers", type=int, default=None, help="reader threads of the in-process server")
+    parser.add_argument("--write-ratio", type=float, default=0.0, help="share of requests that are POSTs")
+    parser.add_argument("--url", help="load an already running server, e.g. http://127.0.0.1:8765")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        url = urlsplit(args.url)
+        national_ids, months = _sample_keys(url.hostname, url.port)
+        print(f"{args.clients} clients against {args.url} for {args.duration:g} s, write ratio {args.write_ratio:g}\n")
+        print_report(*run_load(url.hostname, url.port, national_ids, months, args.clients, args.duration, args.write_ratio))
+        return
+
+    with temp_database():
+        month_list = generate_dataset(args.employees, months=6, payroll_months=3)
+        national_ids = [row[0] for row in database_ops.get_connection().execute("SELECT national_id FROM employees")]
+        database_ops.close_all_connections() # Don't share the generator's connection with the server
+        readers = args.readers or max(args.clients, 1)
+        server = PayrollApiServer(("127.0.0.1", 0), readers=readers)
+        host, port = server.server_address
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            print(f"{args.clients} clients, {readers} reader threads, {args.employees} employees, "
+                  f"{args.duration:g} s, write ratio {args.write_ratio:g}\n")
+            print_report(*run_load(host, port, national_ids, month_list[-3:], args.clients, args.duration, args.write_ratio))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/bench_attendance_import.py
+# Time-clock ingestion throughput: attendance_import.import_attendance on a large CSV against
+# add_absence_to_db once per row, plus an interrupted-and-resumed run that must end with the
+# same totals as an uninterrupted one.
+
+import csv
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+import database_ops
+import attendance_import
+from benchmarks.common import temp_database, seed_employees
+
+EMPLOYEES = 5000
+DAYS = 100 # One row per employee per day
+DUPLICATE_EVERY = 50 # Every n-th row is written twice, as badge exports sometimes do
+PER_ROW_SAMPLE = 5000 # add_absence_to_db is timed on a sample and extrapolated
+
+
+def _write_csv(filename, national_ids):
+    rows = 0
+    start_day = date(2024, 1, 1)
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["national_id", "date", "hours", "note"])
+        for day in range(DAYS):
+            day_str = (start_day + timedelta(days=day)).isoformat()
+            for i, national_id in enumerate(national_ids):
+                copies = 2 if (day * len(national_ids) + i) % DUPLICATE_EVERY == 0 else 1
+                for _ in range(copies):
+                    writer.writerow([national_id, day_str, 1.5, ""])
+                    rows += 1
+    return rows
+
+
+def _totals():
+    return database_ops.get_connection().execute("SELECT COUNT(*), SUM(hours_absent) FROM absences").fetchone()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, "badges.csv")
+
+        with temp_database():
+            national_ids = seed_employees(EMPLOYEES)
+            row_count = _write_csv(filename, national_ids)
+            print(f"Time-clock import, {row_count} rows ({EMPLOYEES} employees x {DAYS} days, with duplicates)\n")
+
+            start = time.perf_counter()
+            for i in range(PER_ROW_SAMPLE):
+                database_ops.add_absence_to_db(national_ids[i % EMPLOYEES], "2023-12-01", 1.5)
+            per_row = (time.perf_counter() - start) / PER_ROW_SAMPLE
+
+        with temp_database():
+            seed_employees(EMPLOYEES)
+            start = time.perf_counter()
+            report = attendance_import.import_attendance(filename, "absences")
+            streaming = time.perf_counter() - start
+            expected = _totals()
+
+        with temp_database():
+            seed_employees(EMPLOYEES)
+
+            def crash(rows_done):
+                if rows_done >= row_count // 2:
+                    raise KeyboardInterrupt # Simulates the process dying half-way
+
+            try:
+                attendance_import.import_attendance(filename, "absences", progress=crash)
+            except KeyboardInterrupt:
+                pass
+            start = time.perf_counter()
+            resumed = attendance_import.import_attendance(filename, "absences")
+            resume_time = time.perf_counter() - start
+            resumed_totals = _totals()
+
+    print(f"{'add_absence_to_db per row (extrapolated)':<44} {per_row * row_count:8.2f} s   {1 / per_row:10.0f} rows/s")
+    print(f"{'import_attendance':<44} {streaming:8.2f} s   {row_count / streaming:10.0f} rows/s")
+    print(f"{'import_attendance, resumed second half':<44} {resume_time:8.2f} s   (from row {resumed.resumed_from + 1})")
+    print(f"\nimported {report.imported}, duplicates skipped {report.duplicates}, rejected {len(report.errors)}")
+    print(f"uninterrupted totals {expected}, interrupted + resumed totals {resumed_totals}: "
+          f"{'identical' if expected == resumed_totals else 'DIFFERENT'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/bench_attendance_rollup.py
+# Monthly attendance lookups: SUM over the raw absences/overtimes rows (the old queries) against
+# the trigger-maintained monthly_attendance row, on two years of history. Also checks that both
+# give the same payslips and measures what the triggers add to inserting attendance.
+
+import random
+import time
+
+import database_ops
+from payroll import calculate_payslip
+from benchmarks.common import temp_database, seed_employees, seed_attendance, time_calls, print_row
+
+EMPLOYEES = 2000
+MONTHS = [f"{2023 + i // 12}-{i % 12 + 1:02d}" for i in range(24)]
+MONTH = "2024-06"
+LOOKUPS = 5000
+
+
+def _old_month_totals(conn, national_id, year_month):
+    """The pre-rollup lookup: range scan of the month's rows in both tables."""
+    start, end = database_ops.month_date_range(year_month)
+    absence = conn.execute("SELECT SUM(hours_absent) FROM absences WHERE employee_national_id = ? "
+                           "AND absence_date >= ? AND absence_date < ?", (national_id, start, end)).fetchone()[0]
+    overtime = conn.execute("SELECT SUM(hours_worked) FROM overtimes WHERE employee_national_id = ? "
+                            "AND overtime_date >= ? AND overtime_date < ?", (national_id, start, end)).fetchone()[0]
+    return absence or 0, overtime or 0
+
+
+def _old_batch_totals(conn, year_month):
+    start, end = database_ops.month_date_range(year_month)
+    absences = dict(conn.execute("SELECT employee_national_id, SUM(hours_absent) FROM absences "
+                                 "WHERE absence_date >= ? AND absence_date < ? GROUP BY employee_national_id", (start, end)))
+    overtimes = dict(conn.execute("SELECT employee_national_id, SUM(hours_worked) FROM overtimes "
+                                  "WHERE overtime_date >= ? AND overtime_date < ? GROUP BY employee_national_id", (start, end)))
+    return absences, overtimes
+
+
+def _seed_time(national_ids, with_triggers):
+    """Seconds to insert one month of attendance, with or without the rollup triggers."""
+    conn = database_ops.get_connection()
+    if not with_triggers:
+        for table, *_ in database_ops.MONTHLY_ATTENDANCE_SOURCES:
+            for event in ("insert", "update", "delete"):
+                conn.execute(f"DROP TRIGGER {table}_rollup_{event}")
+    start = time.perf_counter()
+    seed_attendance(national_ids, "2025-01", records_per_employee=8)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"Monthly attendance lookups, {EMPLOYEES} employees x {len(MONTHS)} months x 4 records per table\n")
+    with temp_database():
+        national_ids = seed_employees(EMPLOYEES)
+        for month in MONTHS:
+            seed_attendance(national_ids, month, seed=int(month.replace("-", "")))
+        conn = database_ops.get_connection()
+        rng = random.Random(7)
+        sample = [rng.choice(national_ids) for _ in range(LOOKUPS)]
+        it = iter(sample * 2)
+
+        print_row("raw SUM over absences + overtimes (old)",
+                  time_calls(lambda: _old_month_totals(conn, next(it), MONTH), LOOKUPS))
+        it = iter(sample * 2)
+
+        def rollup_lookup():
+            national_id = next(it)
+            database_ops.get_absences_in_month(national_id, MONTH)
+            database_ops.get_overtimes_in_month(national_id, MONTH)
+        print_row("monthly_attendance primary-key reads", time_calls(rollup_lookup, LOOKUPS))
+        print_row("batch totals for the month, raw GROUP BY (old)",
+                  time_calls(lambda: _old_batch_totals(conn, MONTH), 50))
+        print_row("batch totals for the month, monthly_attendance",
+                  time_calls(lambda: (database_ops.get_absence_totals_for_month(MONTH),
+                                      database_ops.get_overtime_totals_for_month(MONTH)), 50))
+
+        # Same payslips either way, for every employee and month
+        different = 0
+        for month in MONTHS:
+            absences, overtimes = _old_batch_totals(conn, month)
+            new_absences = database_ops.get_absence_totals_for_month(month)
+            new_overtimes = database_ops.get_overtime_totals_for_month(month)
+            for national_id in national_ids:
+                old = calculate_payslip(month, 30_000_000, overtimes.get(national_id, 0), absences.get(national_id, 0), 0, 0, [])
+                new = calculate_payslip(month, 30_000_000, new_overtimes.get(national_id, 0), new_absences.get(national_id, 0), 0, 0, [])
+                different += old["payslip_details"] != new["payslip_details"]
+        mismatches = len(database_ops.check_monthly_attendance())
+
+    with temp_database():
+        national_ids = seed_employees(EMPLOYEES)
+        without_triggers = _seed_time(national_ids, with_triggers=False)
+    with temp_database():
+        national_ids = seed_employees(EMPLOYEES)
+        with_triggers = _seed_time(national_ids, with_triggers=True)
+
+    rows = EMPLOYEES * 8 * 2
+    print(f"\ninserting {rows} attendance rows: {without_triggers:.2f} s without triggers, "
+          f"{with_triggers:.2f} s with triggers ({(with_triggers - without_triggers) / rows * 1e6:.1f} us/row)")
+    print(f"payslips that differ: {different} of {EMPLOYEES * len(MONTHS)}, check_monthly_attendance mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# benchmarks/bench_batch_payroll.py
+# Whole-company payroll for one month: the per-employee path used by PayrollManagementFrame
+# vs. payroll.run_payroll_for_month. Also checks both produce identical payroll and loan rows.
+
+import time
+
+import database_ops
+from payroll import calculate_payslip, run_payroll_for_month
+from benchmarks.common import temp_database, seed_employees, seed_attendance, seed_loans
+
+MONTH = "2024-03"
+SIZES = (1000, 5000, 10000)
+
+
+def _per_employee_run(national_ids):
+    """Mirrors PayrollManagementFrame._calculate_and_record_payroll for every employee."""
+    for national_id in national_ids:
+        emp_data = database_ops.get_employee_data(national_id)
+        overtime_hours = database_ops.get_overtimes_in_month(national_id, MONTH)
+        absence_hours = database_ops.get_absences_in_month(national_id, MONTH)
+        payslip = calculate_payslip(MONTH, emp_data[4], overtime_hours, absence_hours, 0, 0,
+                                    database_ops.get_active_loans(national_id))
+        for loan_id, _, new_remaining_amount in payslip["loan_deductions"]:
+            database_ops.update_loan_remaining_amount(loan_id, new_remaining_amount)
+        database_ops.record_monthly_payroll_to_db(
+            national_id, MONTH, emp_data[4], overtime_hours, absence_hours, 0, 0,
+            payslip["loan_deduction"], payslip["net_payment"], payslip["payslip_details"])
+
+
+def _snapshot():
+    conn = database_ops.get_connection()
+    payroll = conn.execute("SELECT employee_national_id, payroll_month, base_salary_at_time, overtime_hours, absence_hours, benefits, deductions, loan_deduction, net_payment, payslip_details FROM payroll ORDER BY employee_national_id").fetchall()
+    loans = conn.execute("SELECT id, remaining_amount, is_active FROM loans ORDER BY id").fetchall()
+    return payroll, loans
+
+
+def _run(size, batch):
+    with temp_database():
+        national_ids = seed_employees(size)
+        seed_attendance(national_ids, MONTH)
+        seed_loans(national_ids)
+        start = time.perf_counter()
+        if batch:
+            run_payroll_for_month(MONTH)
+        else:
+            _per_employee_run(national_ids)
+        elapsed = time.perf_counter() - start
+        return elapsed, _snapshot()
+
+
+def main():
+    for size in SIZES:
+        loop_time, loop_result = _run(size, batch=False)
+        batch_time, batch_result = _run(size, batch=True)
+        identical = "identical" if loop_result == batch_result else "MISMATCH"
+        print(f"{size:>7} employees   per-employee {loop_time:8.2f} s   batch {batch_time:8.2f} s   "
+              f"speed-up {loop_time / batch_time:6.1f}x   results {identical}")
+
+
+if __name__ == "__main__":
+    main()
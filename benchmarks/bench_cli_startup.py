@@ -0,0 +1,91 @@
+# benchmarks/bench_cli_startup.py
+# Start-up cost of the headless entry point: wall time of a fresh `payroll_cli.py status` process
+# (interpreter start to first query answered) against a bare interpreter, plus the in-process
+# import + first-query time and the import time of the GUI module chain for comparison.
+# Exits with status 1 if the CLI adds more than 100 ms on top of a bare interpreter.
+
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import temp_database, seed_employees, summarize
+
+RUNS = 15
+EMPLOYEES = 5000
+MAX_STARTUP_MS = 100
+HEAVY_MODULES = ("tkinter", "tkcalendar", "openpyxl", "numpy", "multiprocessing", "frames")
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the child: time from the first import to the first query result, and which of the
+# heavy modules ended up loaded.
+IN_PROCESS_CODE = '''
+import sys, time, io, contextlib
+start = time.perf_counter()
+import payroll_cli
+with contextlib.redirect_stdout(io.StringIO()):
+    payroll_cli.main(["--db", sys.argv[1], "-q", "status"])
+elapsed = (time.perf_counter() - start) * 1000
+print(elapsed, ",".join(m for m in {heavy!r} if m in sys.modules))
+'''.format(heavy=HEAVY_MODULES)
+
+GUI_IMPORT_CODE = '''
+import sys, time
+start = time.perf_counter()
+import main_app
+print((time.perf_counter() - start) * 1000)
+'''
+
+
+def _wall_ms(command):
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=REPO_DIR, check=True, stdout=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _child_ms(code, *args):
+    samples, extra = [], ""
+    for _ in range(RUNS):
+        output = subprocess.run([sys.executable, "-c", code, *args], cwd=REPO_DIR, check=True,
+                                capture_output=True, text=True).stdout.split()
+        samples.append(float(output[0]))
+        extra = output[1] if len(output) > 1 else ""
+    return samples, extra
+
+
+def _print(label, samples):
+    median, p95, _ = summarize(samples)
+    print(f"{label:<52} median {median:8.1f} ms   p95 {p95:8.1f} ms")
+
+
+def main():
+    with temp_database() as db_path:
+        seed_employees(EMPLOYEES)
+        print(f"Process start-up, {RUNS} runs each, {EMPLOYEES} employees\n")
+
+        bare = _wall_ms([sys.executable, "-c", "pass"])
+        cli = _wall_ms([sys.executable, "payroll_cli.py", "--db", db_path, "-q", "status"])
+        in_process, loaded = _child_ms(IN_PROCESS_CODE, db_path)
+        _print("bare interpreter (python -c pass)", bare)
+        _print("payroll_cli.py status (wall)", cli)
+        _print("payroll_cli import + init_db + first query", in_process)
+        print(f"heavy modules loaded by the CLI: {loaded or 'none'}")
+
+        try:
+            gui, _ = _child_ms(GUI_IMPORT_CODE)
+            _print("import main_app (GUI chain, for comparison)", gui)
+        except subprocess.CalledProcessError:
+            print("import main_app: skipped (GUI dependencies not installed)")
+
+    added = summarize(cli)[0] - summarize(bare)[0]
+    print(f"\nCLI cost over a bare interpreter: {added:.1f} ms (limit {MAX_STARTUP_MS} ms)")
+    if added > MAX_STARTUP_MS or loaded:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmarks/bench_connection.py
+# Per-call latency of database_ops functions: fresh sqlite3.connect() per call (old behaviour)
+# vs. the long-lived, tuned connection returned by database_ops.get_connection().
+
+import sqlite3
+
+import database_ops
+from benchmarks.common import temp_database, seed_employees, time_calls, print_row
+
+EMPLOYEES = 5000
+ITERATIONS = 2000
+
+
+def _fresh_connection_get_employee(national_id):
+    """The pre-connection-manager implementation of get_employee_data(national_id)."""
+    conn = sqlite3.connect(database_ops.DB_NAME)
+    cursor = conn.cursor()
+    cursor.execute("SELECT national_id, first_name, last_name, position, base_salary FROM employees WHERE national_id = ?", (national_id,))
+    row = cursor.fetchone()
+    conn.close()
+    return row
+
+
+def _fresh_connection_add_absence(national_id):
+    """The pre-connection-manager implementation of add_absence_to_db (default journal settings)."""
+    conn = sqlite3.connect(database_ops.DB_NAME)
+    conn.execute("PRAGMA journal_mode = DELETE")
+    conn.execute("PRAGMA synchronous = FULL")
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO absences (employee_national_id, absence_date, hours_absent, reason) VALUES (?, ?, ?, ?)",
+                   (national_id, "2024-01-15", 1.0, ""))
+    conn.commit()
+    conn.close()
+
+
+def main():
+    print(f"Per-call latency, {EMPLOYEES} employees, {ITERATIONS} calls each\n")
+    with temp_database():
+        ids = seed_employees(EMPLOYEES)
+        target = ids[len(ids) // 2]
+
+        print_row("get_employee_data: fresh connect", time_calls(lambda: _fresh_connection_get_employee(target), ITERATIONS))
+        print_row("get_employee_data: pooled connection", time_calls(lambda: database_ops.get_employee_data(target), ITERATIONS))
+        print_row("get_overtimes_in_month: pooled connection", time_calls(lambda: database_ops.get_overtimes_in_month(target, "2024-01"), ITERATIONS))
+
+    # Writes are measured on separate databases so the journal mode of one run doesn't leak into the other
+    with temp_database():
+        target = seed_employees(10)[0]
+        database_ops.close_all_connections() # Let the fresh-connection variant switch the journal mode
+        print_row("add_absence_to_db: fresh connect, rollback journal", time_calls(lambda: _fresh_connection_add_absence(target), ITERATIONS // 4))
+    with temp_database():
+        target = seed_employees(10)[0]
+        print_row("add_absence_to_db: pooled connection, WAL", time_calls(lambda: database_ops.add_absence_to_db(target, "2024-01-15", 1.0), ITERATIONS // 4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmarks/bench_employee_import.py
+# Bulk employee import throughput: employee_import.import_employees (chunked executemany) on a
+# 100k-row CSV, against calling add_employee_to_db once per row like AddEmployeeFrame does.
+
+import csv
+import os
+import tempfile
+import time
+
+import database_ops
+from employee_import import import_employees
+from benchmarks.common import temp_database, make_national_id
+
+ROWS = 100_000
+PER_ROW_SAMPLE = 5000 # add_employee_to_db is timed on a sample and extrapolated
+INVALID_EVERY = 1000 # Every n-th row gets a bad national_id, to exercise the error report
+
+
+def _write_csv(filename, count):
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["national_id", "first_name", "last_name", "position", "base_salary"])
+        for i in range(count):
+            national_id = "12345" if i % INVALID_EVERY == INVALID_EVERY - 1 else make_national_id(i)
+            writer.writerow([national_id, f"نام{i}", f"خانوادگی{i}", "کارشناس", 10_000_000 + i])
+
+
+def main():
+    print(f"Employee import, {ROWS} rows\n")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, "employees.csv")
+        _write_csv(filename, ROWS)
+
+        with temp_database():
+            start = time.perf_counter()
+            for i in range(PER_ROW_SAMPLE):
+                database_ops.add_employee_to_db(make_national_id(i), f"نام{i}", f"خانوادگی{i}", "کارشناس", 10_000_000.0 + i)
+            per_row = (time.perf_counter() - start) / PER_ROW_SAMPLE
+
+        with temp_database():
+            start = time.perf_counter()
+            report = import_employees(filename)
+            bulk = time.perf_counter() - start
+
+            start = time.perf_counter()
+            update_report = import_employees(filename, update_existing=True)
+            bulk_update = time.perf_counter() - start
+            stored = database_ops.get_connection().execute("SELECT COUNT(*) FROM employees").fetchone()[0]
+
+    print(f"{'add_employee_to_db per row (extrapolated)':<44} {per_row * ROWS:8.2f} s   {1 / per_row:10.0f} rows/s")
+    print(f"{'import_employees (new rows)':<44} {bulk:8.2f} s   {ROWS / bulk:10.0f} rows/s")
+    print(f"{'import_employees --update (existing rows)':<44} {bulk_update:8.2f} s   {ROWS / bulk_update:10.0f} rows/s")
+    print(f"\nimported {report.imported}, updated {update_report.updated}, rejected {len(report.errors)}, stored {stored}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+# benchmarks/bench_employee_list.py
+# Cost of filling ViewEmployeesFrame: the old get_employee_data() fetchall vs. the first
+# keyset page (what the frame now loads on open) and a page deep in the list, per sort column.
+
+import database_ops
+from benchmarks.common import temp_database, seed_employees, time_calls, print_row
+
+SIZES = (100, 500000)
+PAGE_SIZE = 200
+
+
+def _deep_page_cursor(sort_column, pages):
+    after = None
+    for _ in range(pages):
+        _, after = database_ops.get_employees_page(sort_column, after=after, limit=PAGE_SIZE)
+    return after
+
+
+def main():
+    for size in SIZES:
+        print(f"--- {size} employees ---")
+        with temp_database():
+            seed_employees(size)
+            database_ops.get_connection().execute("ANALYZE")
+            print_row("get_employee_data() (old, all rows)", time_calls(database_ops.get_employee_data, 3), unit="us")
+            for sort_column in database_ops.EMPLOYEE_SORT_KEYS:
+                print_row(f"first page by {sort_column}", time_calls(lambda: database_ops.get_employees_page(sort_column, limit=PAGE_SIZE), 50))
+            if size > PAGE_SIZE * 100:
+                after = _deep_page_cursor("last_name", 100)
+                print_row("page 101 by last_name", time_calls(lambda: database_ops.get_employees_page("last_name", after=after, limit=PAGE_SIZE), 50))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/bench_gui_startup.py
+# GUI start-up: wall time from spawning the process to the first paint (<Expose>) of LoginFrame,
+# as the app ships (tkcalendar/openpyxl loaded on first use) and with both imported up front
+# the way frames.py used to. Needs a display (e.g. run under xvfb-run on a headless machine).
+# Exits with status 1 if the login screen takes longer than MAX_STARTUP_MS to paint or if a
+# heavy module is loaded before it does.
+
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import temp_database, seed_employees, summarize
+
+RUNS = 10
+EMPLOYEES = 5000
+MAX_STARTUP_MS = 500
+HEAVY_MODULES = ("tkcalendar", "openpyxl")
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the child. Prints "painted <heavy modules already loaded>" on the first Expose event
+# of the login frame, then closes the window.
+CHILD_CODE = '''
+import sys
+{preload}
+import tkinter as tk
+import database_ops
+database_ops.DB_NAME = sys.argv[1]
+import main_app
+
+root = tk.Tk()
+app = main_app.EmployeeManagerApp(root)
+
+def painted(event):
+    print("painted", ",".join(m for m in {heavy!r} if m in sys.modules), flush=True)
+    root.after(0, root.destroy)
+
+app.current_frame.bind("<Expose>", painted)
+root.mainloop()
+app.task_runner.shutdown()
+database_ops.close_all_connections()
+'''
+
+
+def _time_to_paint(preload, db_path):
+    """Returns (samples in ms, heavy modules loaded at first paint)."""
+    code = CHILD_CODE.format(preload=preload, heavy=HEAVY_MODULES)
+    samples, loaded = [], ""
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        child = subprocess.Popen([sys.executable, "-c", code, db_path], cwd=REPO_DIR,
+                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        line = child.stdout.readline() # Arrives at first paint, before the child exits
+        elapsed = (time.perf_counter() - start) * 1000
+        _, stderr = child.communicate()
+        if not line.startswith("painted"):
+            raise RuntimeError(stderr.strip().splitlines()[-1] if stderr.strip() else "child exited without painting")
+        samples.append(elapsed)
+        loaded = line.split()[1] if len(line.split()) > 1 else ""
+    return samples, loaded
+
+
+def _print(label, samples):
+    median, p95, _ = summarize(samples)
+    print(f"{label:<52} median {median:8.1f} ms   p95 {p95:8.1f} ms")
+
+
+def main():
+    with temp_database() as db_path:
+        seed_employees(EMPLOYEES)
+        print(f"Process start to first LoginFrame paint, {RUNS} runs each\n")
+        try:
+            lazy, loaded = _time_to_paint("", db_path)
+        except RuntimeError as e:
+            print(f"skipped: {e}")
+            return
+        eager, _ = _time_to_paint("import tkcalendar, openpyxl", db_path)
+
+    _print("lazy imports (as shipped)", lazy)
+    _print("tkcalendar + openpyxl imported up front", eager)
+    print(f"heavy modules loaded before first paint: {loaded or 'none'}")
+
+    median = summarize(lazy)[0]
+    print(f"\nTime to first paint: {median:.1f} ms (limit {MAX_STARTUP_MS} ms)")
+    if median > MAX_STARTUP_MS or loaded:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
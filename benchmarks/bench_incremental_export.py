@@ -0,0 +1,57 @@
+# benchmarks/bench_incremental_export.py
+# Incremental payslip feed (reports.export_new_payslips) against rewriting the full-payslips
+# export on every run: the first run of each format, a re-run with nothing new, and a run after
+# one more month of payroll. Also checks that a run interrupted after appending is repaired.
+
+import os
+import tempfile
+import time
+
+import database_ops
+import reports
+from payroll import run_payroll_for_month
+from benchmarks.common import temp_database
+from benchmarks.datagen import generate_dataset
+
+EMPLOYEES = 5000
+MONTHS = 12
+
+
+def _timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<52} {(time.perf_counter() - start) * 1000:10.1f} ms   {result} rows")
+
+
+def main():
+    print(f"Incremental payslip export, {EMPLOYEES} employees x {MONTHS} months of payroll\n")
+    with temp_database(), tempfile.TemporaryDirectory() as tmp_dir:
+        months = generate_dataset(EMPLOYEES, MONTHS, payroll_months=MONTHS)
+        targets = {fmt: os.path.join(tmp_dir, f"payslips.{fmt}") for fmt in reports.NEW_PAYSLIPS_FORMATS}
+
+        _timed("full export (xlsx, regenerated)",
+               lambda: reports.export_full_payslips_xlsx(os.path.join(tmp_dir, "full.xlsx"), use_cache=False))
+        for fmt, target in targets.items():
+            _timed(f"export_new_payslips {fmt}, first run", lambda: reports.export_new_payslips(target))
+        for fmt, target in targets.items():
+            _timed(f"export_new_payslips {fmt}, nothing new", lambda: reports.export_new_payslips(target))
+
+        next_month = f"{int(months[-1][:4]) + 1}-{months[-1][5:]}"
+        run_payroll_for_month(next_month)
+        for fmt, target in targets.items():
+            _timed(f"export_new_payslips {fmt}, one more month", lambda: reports.export_new_payslips(target))
+
+        # An interrupted run: rows appended but the watermark never saved
+        target = targets["jsonl"]
+        with open(target, "rb") as f:
+            expected = f.read()
+        with open(target, "ab") as f:
+            f.write(b'{"payroll_id": 999999999, "national_id": "trun')
+        _timed("export_new_payslips jsonl, after an interrupted run", lambda: reports.export_new_payslips(target))
+        with open(target, "rb") as f:
+            print(f"\nrepaired file identical to the uninterrupted one: {f.read() == expected}")
+        print(f"watermark: {database_ops.get_export_watermark(os.path.abspath(target))}")
+
+
+if __name__ == "__main__":
+    main()
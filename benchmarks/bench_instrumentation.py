@@ -0,0 +1,50 @@
+# benchmarks/bench_instrumentation.py
+# Cost of the instrumentation layer: per-call latency of a few database_ops functions with
+# instrumentation off (the shipped default; only the wrapper's flag check remains), against the
+# unwrapped functions, and with SQL tracing on.
+
+import database_ops
+import instrumentation
+from benchmarks.common import temp_database, seed_employees, seed_attendance, time_calls, print_row
+
+EMPLOYEES = 5000
+ITERATIONS = 5000
+MONTH = "2024-03"
+
+
+def _cases(national_ids, functions):
+    it = iter(national_ids * (ITERATIONS * 2 // len(national_ids) + 2))
+    return (
+        ("get_employee_data (cached)", lambda: functions["get_employee_data"](national_ids[0])),
+        ("get_absences_in_month", lambda: functions["get_absences_in_month"](next(it), MONTH)),
+        ("get_payroll_history", lambda: functions["get_payroll_history"](next(it))),
+    )
+
+
+def main():
+    print(f"Instrumentation overhead, {ITERATIONS} calls per function\n")
+    with temp_database():
+        national_ids = seed_employees(EMPLOYEES)
+        seed_attendance(national_ids, MONTH)
+        unwrapped = {name: getattr(database_ops, name).__wrapped__
+                     for name in ("get_employee_data", "get_absences_in_month", "get_payroll_history")}
+        wrapped = {name: getattr(database_ops, name) for name in unwrapped}
+
+        instrumentation.disable()
+        for label, func in _cases(national_ids, unwrapped):
+            print_row(f"{label}, unwrapped", time_calls(func, ITERATIONS))
+        for label, func in _cases(national_ids, wrapped):
+            print_row(f"{label}, instrumentation off", time_calls(func, ITERATIONS))
+
+        instrumentation.enable()
+        database_ops.close_all_connections() # Reopen as a traced connection
+        for label, func in _cases(national_ids, wrapped):
+            print_row(f"{label}, instrumentation on", time_calls(func, ITERATIONS))
+        snapshot = instrumentation.snapshot()
+        instrumentation.disable()
+
+    print(f"\nrecorded {len(snapshot['functions'])} functions, {len(snapshot['queries'])} distinct statements")
+
+
+if __name__ == "__main__":
+    main()
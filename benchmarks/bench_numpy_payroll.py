@@ -0,0 +1,68 @@
+# benchmarks/bench_numpy_payroll.py
+# Pure calculation cost: payroll.calculate_payslip in a loop vs. payroll_numpy.calculate_payroll,
+# at 10k, 100k and 1M employees. Verifies every net payment matches exactly. Requires numpy.
+
+import random
+import time
+
+import numpy as np
+
+from config import HOURLY_WORK_HOURS_IN_MONTH, OVERTIME_RATE_FACTOR, ABSENCE_RATE_FACTOR
+from payroll import calculate_payslip, calculate_loan_deductions as scalar_loan_deductions
+from payroll_numpy import calculate_payroll, calculate_loan_deductions
+
+SIZES = (10_000, 100_000, 1_000_000)
+
+
+def _inputs(size, seed=42):
+    rng = random.Random(seed)
+    base_salary = [float(rng.randrange(8_000_000, 60_000_000, 1000)) for _ in range(size)]
+    overtime_hours = [rng.choice([0.0, 1.5, 4.0, 7.5, 12.0]) for _ in range(size)]
+    absence_hours = [rng.choice([0.0, 0.5, 2.0, 8.0]) for _ in range(size)]
+    loans = [] # (employee_index, remaining_amount, installment_amount)
+    for i in range(size):
+        if rng.random() < 0.3:
+            remaining = float(rng.randrange(1_000_000, 50_000_000, 100_000))
+            loans.append((i, remaining, rng.choice([0.0, 2_000_000.0, 3_500_000.0])))
+    return base_salary, overtime_hours, absence_hours, loans
+
+
+def main():
+    for size in SIZES:
+        base_salary, overtime_hours, absence_hours, loans = _inputs(size)
+        loans_by_employee = {}
+        for loan_id, (i, remaining, installment) in enumerate(loans):
+            loans_by_employee.setdefault(i, []).append((loan_id, "2024-01-01", remaining, remaining, installment, ""))
+
+        start = time.perf_counter()
+        loop_net = [
+            calculate_payslip("2024-03", base_salary[i], overtime_hours[i], absence_hours[i], 500_000, 0,
+                              loans_by_employee.get(i, ()))["net_payment"]
+            for i in range(size)
+        ]
+        loop_time = time.perf_counter() - start
+
+        # The payslip text dominates the loop above; this is the loop doing only the arithmetic
+        start = time.perf_counter()
+        for i in range(size):
+            loan_deduction, _ = scalar_loan_deductions(loans_by_employee.get(i, ()))
+            hourly = base_salary[i] / HOURLY_WORK_HOURS_IN_MONTH
+            _ = base_salary[i] + overtime_hours[i] * hourly * OVERTIME_RATE_FACTOR + 500_000 - absence_hours[i] * hourly * ABSENCE_RATE_FACTOR - 0 - loan_deduction
+        arithmetic_time = time.perf_counter() - start
+
+        columns = [np.array(base_salary), np.array(overtime_hours), np.array(absence_hours)]
+        loan_index = np.array([loan[0] for loan in loans], dtype=np.intp)
+        loan_remaining = np.array([loan[1] for loan in loans])
+        loan_installment = np.array([loan[2] for loan in loans])
+        start = time.perf_counter()
+        loan_deduction, _ = calculate_loan_deductions(loan_index, loan_remaining, loan_installment, size)
+        vector_net = calculate_payroll(*columns, 500_000, 0, loan_deduction)["net_payment"]
+        vector_time = time.perf_counter() - start
+
+        exact = "exact match" if np.array_equal(vector_net, np.array(loop_net)) else "MISMATCH"
+        print(f"{size:>9} employees   loop {loop_time:8.3f} s   loop (math only) {arithmetic_time:8.3f} s   "
+              f"numpy {vector_time:8.4f} s   {exact}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# benchmarks/bench_parallel_payroll.py
+# Scaling of run_payroll_for_month across 1, 2, 4 and 8 worker processes.
+# Each run starts from an identical database; results are compared with the 1-worker run.
+
+import os
+import time
+
+import database_ops
+from payroll import run_payroll_for_month
+from benchmarks.common import temp_database, seed_employees, seed_attendance, seed_loans
+
+EMPLOYEES = 100000
+MONTH = "2024-03"
+WORKER_COUNTS = (1, 2, 4, 8)
+
+
+def _payroll_rows():
+    conn = database_ops.get_connection()
+    return conn.execute("SELECT employee_national_id, net_payment, payslip_details FROM payroll ORDER BY id").fetchall()
+
+
+def main():
+    print(f"{EMPLOYEES} employees, {os.cpu_count()} CPUs available\n")
+    with temp_database() as seeded_db:
+        national_ids = seed_employees(EMPLOYEES)
+        seed_attendance(national_ids, MONTH)
+        seed_loans(national_ids)
+        database_ops.close_all_connections() # Checkpoint the WAL so the file can be copied
+
+        reference = None
+        baseline_time = None
+        for workers in WORKER_COUNTS:
+            with temp_database(source=seeded_db):
+                start = time.perf_counter()
+                run_payroll_for_month(MONTH, workers=workers)
+                elapsed = time.perf_counter() - start
+                rows = _payroll_rows()
+
+            reference = reference or rows
+            baseline_time = baseline_time or elapsed
+            same = "identical" if rows == reference else "MISMATCH"
+            print(f"workers {workers}: {elapsed:7.2f} s   speed-up {baseline_time / elapsed:5.2f}x   rows {same}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# benchmarks/bench_payroll_summary.py
+# Data feed of the payroll summary report: the old 2N+1 queries vs. the single aggregated
+# query in reports.py, from 100 to 100k employees (3 payslips and ~0.3 loans per employee).
+# The xlsx writing itself is the same for both and is left out.
+
+import time
+
+import database_ops
+from payroll import run_payroll_for_month
+from reports import iter_query, PAYROLL_SUMMARY_QUERY
+from benchmarks.common import temp_database, seed_employees, seed_loans
+
+SIZES = (100, 1000, 10000, 100000)
+
+
+def _old_rows():
+    """How ReportsFrame._export_payroll_summary_to_excel used to gather its rows."""
+    cursor = database_ops.get_connection().cursor()
+    rows = []
+    for emp in database_ops.get_employee_data():
+        cursor.execute("SELECT SUM(net_payment) FROM payroll WHERE employee_national_id = ?", (emp[0],))
+        total_net_paid = cursor.fetchone()[0] or 0
+        cursor.execute("SELECT SUM(amount), SUM(remaining_amount) FROM loans WHERE employee_national_id = ? AND is_active = 1", (emp[0],))
+        loan_summary = cursor.fetchone()
+        rows.append((emp[0], emp[1], emp[2], emp[4], total_net_paid, loan_summary[0] or 0, loan_summary[1] or 0))
+    return rows
+
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    for size in SIZES:
+        with temp_database():
+            national_ids = seed_employees(size)
+            seed_loans(national_ids)
+            for year_month in ("2024-01", "2024-02", "2024-03"):
+                run_payroll_for_month(year_month)
+
+            old_time, old_rows = _timed(_old_rows)
+            new_time, new_rows = _timed(lambda: list(iter_query(PAYROLL_SUMMARY_QUERY)))
+            same = "identical" if sorted(old_rows) == new_rows else "MISMATCH"
+            print(f"{size:>7} employees   2N+1 queries {old_time:7.3f} s ({old_time / size * 1e6:5.1f} us/employee)   "
+                  f"aggregated {new_time:7.3f} s ({new_time / size * 1e6:5.1f} us/employee)   {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/bench_payroll_unit_of_work.py
+# Commits per recorded payslip: the old per-employee path (one commit per loan update plus one
+# for the payslip) against payroll.record_employee_payroll, which records through the
+# database_ops.record_payroll_and_loans unit of work. Also re-runs the month, which must leave
+# the loans untouched because every payslip already exists. The batch run is shown for reference.
+
+import time
+
+import database_ops
+from payroll import calculate_payslip, record_employee_payroll, run_payroll_for_month
+from benchmarks.common import temp_database, seed_employees, seed_attendance, seed_loans
+
+MONTH = "2024-03"
+EMPLOYEES = 2000
+
+
+def _old_record_employee_payroll(national_id):
+    """The pre-unit-of-work implementation: loans are decremented before the payslip insert is tried."""
+    emp_data = database_ops.get_employee_data(national_id)
+    overtime_hours = database_ops.get_overtimes_in_month(national_id, MONTH)
+    absence_hours = database_ops.get_absences_in_month(national_id, MONTH)
+    payslip = calculate_payslip(MONTH, emp_data[4], overtime_hours, absence_hours, 0, 0,
+                                database_ops.get_active_loans(national_id))
+    for loan_id, _, new_remaining_amount in payslip["loan_deductions"]:
+        database_ops.update_loan_remaining_amount(loan_id, new_remaining_amount)
+    database_ops.record_monthly_payroll_to_db(
+        national_id, MONTH, emp_data[4], overtime_hours, absence_hours, 0, 0,
+        payslip["loan_deduction"], payslip["net_payment"], payslip["payslip_details"])
+
+
+def _new_record_employee_payroll(national_id):
+    record_employee_payroll(national_id, MONTH, 0, 0)
+
+
+def _batch_run(national_ids):
+    run_payroll_for_month(MONTH) # Whole month through the same unit of work, in one transaction
+
+
+def _run(record, batch=False):
+    """Returns (commits, seconds, loan balance after the run, loan balance after a repeated run)."""
+    with temp_database():
+        national_ids = seed_employees(EMPLOYEES)
+        seed_attendance(national_ids, MONTH)
+        seed_loans(national_ids, share=0.6)
+        conn = database_ops.get_connection()
+        commits = [0]
+
+        def count_commits(statement):
+            if statement.startswith("COMMIT"):
+                commits[0] += 1
+
+        def loan_balance():
+            return conn.execute("SELECT ROUND(SUM(remaining_amount), 2) FROM loans").fetchone()[0]
+
+        conn.set_trace_callback(count_commits)
+        start = time.perf_counter()
+        if batch:
+            record(national_ids)
+        else:
+            for national_id in national_ids:
+                record(national_id)
+        elapsed = time.perf_counter() - start
+        conn.set_trace_callback(None)
+
+        balance = loan_balance()
+        if batch: # Every payslip exists now
+            record(national_ids)
+        else:
+            for national_id in national_ids:
+                record(national_id)
+        return commits[0], elapsed, balance, loan_balance()
+
+
+def main():
+    print(f"Recording payroll for {EMPLOYEES} employees one at a time (about 60% with loans)\n")
+    for label, record, batch in (("old path (commit per loan + payslip)", _old_record_employee_payroll, False),
+                                 ("record_payroll_and_loans unit of work", _new_record_employee_payroll, False),
+                                 ("run_payroll_for_month (whole month)", _batch_run, True)):
+        commits, elapsed, balance, balance_after_repeat = _run(record, batch)
+        print(f"{label:<40} {commits:6d} commits ({commits / EMPLOYEES:.2f}/payslip)   {elapsed:6.2f} s")
+        print(f"{'':<40} loan balance {balance:,.0f} -> after repeating the month {balance_after_repeat:,.0f}"
+              f" ({'unchanged' if balance == balance_after_repeat else 'DECREMENTED AGAIN'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# benchmarks/bench_payslip_export.py
+# Full payslip export: the old fetchall() + normal workbook + column walk vs. the streaming
+# write-only export in reports.py. Peak Python memory is measured with tracemalloc.
+
+import os
+import tempfile
+import time
+import tracemalloc
+
+import openpyxl
+
+import database_ops
+from payroll import run_payroll_for_month
+from reports import export_full_payslips_xlsx, FULL_PAYSLIPS_HEADERS, FULL_PAYSLIPS_QUERY
+from benchmarks.common import temp_database, seed_employees, seed_attendance, seed_loans
+
+EMPLOYEES = 2000
+MONTH_COUNTS = (3, 12, 24)
+
+
+def _old_export(filename):
+    """The export as ReportsFrame._export_full_payslips_to_excel used to do it."""
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(FULL_PAYSLIPS_HEADERS)
+    for payslip in database_ops.get_connection().execute(FULL_PAYSLIPS_QUERY).fetchall():
+        sheet.append(list(payslip))
+    for col in sheet.columns:
+        max_length = max(len(str(cell.value)) for cell in col)
+        sheet.column_dimensions[col[0].column_letter].width = (max_length + 2) * 1.2
+    workbook.save(filename)
+
+
+def _measure(export, filename):
+    tracemalloc.start()
+    start = time.perf_counter()
+    export(filename)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def main():
+    with temp_database(), tempfile.TemporaryDirectory() as tmp_dir:
+        national_ids = seed_employees(EMPLOYEES)
+        seed_loans(national_ids)
+        recorded_months = 0
+        for month_count in MONTH_COUNTS:
+            while recorded_months < month_count:
+                year_month = f"{2022 + recorded_months // 12}-{recorded_months % 12 + 1:02d}"
+                seed_attendance(national_ids, year_month, records_per_employee=2)
+                run_payroll_for_month(year_month)
+                recorded_months += 1
+
+            payslips = EMPLOYEES * month_count
+            old_time, old_peak = _measure(_old_export, os.path.join(tmp_dir, "old.xlsx"))
+            new_time, new_peak = _measure(lambda filename: export_full_payslips_xlsx(filename, use_cache=False),
+                                         os.path.join(tmp_dir, "new.xlsx"))
+            print(f"{payslips:>7} payslips   old {old_time:6.2f} s / peak {old_peak:7.1f} MiB   "
+                  f"streaming {new_time:6.2f} s / peak {new_peak:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
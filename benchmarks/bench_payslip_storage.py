@@ -0,0 +1,94 @@
+# benchmarks/bench_payslip_storage.py
+# Database size with payslips stored as text (the old format) and after init_db's migration to
+# the compact JSON record, on a synthetic five-year dataset. Also checks that every migrated
+# payslip renders to exactly the old text, and times the full payslip export both ways.
+
+import os
+import tempfile
+import time
+
+import database_ops
+from payroll import run_payroll_for_month
+from payslips import render_payslip_details
+from reports import export_full_payslips_xlsx
+from benchmarks.common import temp_database, seed_employees, seed_attendance, seed_loans
+
+EMPLOYEES = 1000
+YEARS = 5
+
+
+def _months():
+    return [f"{2020 + year}-{month:02d}" for year in range(YEARS) for month in range(1, 13)]
+
+
+def _file_size():
+    database_ops.get_connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return os.path.getsize(database_ops.DB_NAME)
+
+
+def _rendered_payslips():
+    conn = database_ops.get_connection()
+    rows = conn.execute('''
+        SELECT payroll_month, base_salary_at_time, overtime_hours, absence_hours, benefits,
+               deductions, loan_deduction, net_payment, payslip_details
+        FROM payroll ORDER BY id
+    ''')
+    return [render_payslip_details(*row) for row in rows]
+
+
+def _time_export():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        start = time.perf_counter()
+        export_full_payslips_xlsx(os.path.join(tmp_dir, "payslips.xlsx"), use_cache=False)
+        return time.perf_counter() - start
+
+
+def main():
+    months = _months()
+    print(f"Payslip storage, {EMPLOYEES} employees x {len(months)} months\n")
+    with temp_database():
+        national_ids = seed_employees(EMPLOYEES)
+        seed_loans(national_ids, share=0.5)
+        for month in months:
+            seed_attendance(national_ids, month, records_per_employee=2)
+            run_payroll_for_month(month)
+
+        # Turn the dataset back into what the old code stored: the rendered text, schema version 0
+        conn = database_ops.get_connection()
+        texts = _rendered_payslips()
+        with database_ops.transaction():
+            conn.executemany("UPDATE payroll SET payslip_details = ? WHERE id = ?",
+                             ((text, payroll_id) for payroll_id, text in enumerate(texts, start=1)))
+            conn.execute("PRAGMA user_version = 0")
+        database_ops.compact_database()
+        text_size = _file_size()
+        text_column = conn.execute("SELECT SUM(LENGTH(CAST(payslip_details AS BLOB))) FROM payroll").fetchone()[0]
+        text_export = _time_export()
+
+        start = time.perf_counter()
+        database_ops.init_db() # Runs the migration
+        migration_time = time.perf_counter() - start
+        migrated_size = _file_size()
+        json_column = conn.execute("SELECT SUM(LENGTH(CAST(payslip_details AS BLOB))) FROM payroll").fetchone()[0]
+        still_text = conn.execute("SELECT COUNT(*) FROM payroll WHERE payslip_details NOT LIKE '{%'").fetchone()[0]
+        identical = _rendered_payslips() == texts
+
+        database_ops.compact_database()
+        compacted_size = _file_size()
+        json_export = _time_export()
+
+    mib = 1024 * 1024
+    print(f"{'payslips':<36} {len(texts):10d}")
+    print(f"{'payslip_details column, text':<36} {text_column / mib:10.1f} MiB ({text_column / len(texts):.0f} bytes/payslip)")
+    print(f"{'payslip_details column, JSON':<36} {json_column / mib:10.1f} MiB ({json_column / len(texts):.0f} bytes/payslip)")
+    print(f"{'database file, text':<36} {text_size / mib:10.1f} MiB")
+    print(f"{'database file, after migration':<36} {migrated_size / mib:10.1f} MiB (freed pages kept for reuse)")
+    print(f"{'database file, after compact':<36} {compacted_size / mib:10.1f} MiB")
+    print(f"{'migration time':<36} {migration_time:10.2f} s")
+    print(f"{'full payslip export, text':<36} {text_export:10.2f} s")
+    print(f"{'full payslip export, JSON rendered':<36} {json_export:10.2f} s")
+    print(f"\nleft as text: {still_text}, rendered payslips identical to the old text: {identical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/bench_report_cache.py
+# Report cache: time of each ReportsFrame export generated from scratch and served again from
+# report_cache, then which reports are invalidated by a write to each versioned table (a write
+# must regenerate exactly the reports that read the table). Also shows the cost of the
+# table_versions triggers on a bulk insert, and eviction down to a smaller size limit.
+
+import filecmp
+import os
+import tempfile
+import time
+
+import database_ops
+import report_cache
+import reports
+from benchmarks.common import temp_database
+from benchmarks.datagen import generate_dataset
+
+EMPLOYEES = 5000
+MONTHS = 12
+
+EXPORTS = {
+    "employees": reports.export_employees_xlsx,
+    "summary": reports.export_payroll_summary_xlsx,
+    "payslips": reports.export_full_payslips_xlsx,
+}
+
+
+def _timed(export, filename):
+    start = time.perf_counter()
+    export(filename)
+    return time.perf_counter() - start
+
+
+def _regenerated(tmp_dir, tag):
+    """Runs every export once; returns the names that were not served from the cache."""
+    regenerated = []
+    for name, export in EXPORTS.items():
+        hits_before = report_cache.stats()["entries"]
+        filename = os.path.join(tmp_dir, f"{name}-{tag}.xlsx")
+        export(filename)
+        if report_cache.stats()["entries"] > hits_before: # A miss stores a new entry
+            regenerated.append(name)
+    return regenerated
+
+
+def main():
+    print(f"Report cache, {EMPLOYEES} employees x {MONTHS} months\n")
+    with temp_database(), tempfile.TemporaryDirectory() as tmp_dir:
+        generate_dataset(EMPLOYEES, MONTHS, payroll_months=MONTHS)
+        for name, export in EXPORTS.items():
+            cold = _timed(export, os.path.join(tmp_dir, f"{name}-cold.xlsx"))
+            warm = _timed(export, os.path.join(tmp_dir, f"{name}-warm.xlsx"))
+            same = filecmp.cmp(os.path.join(tmp_dir, f"{name}-cold.xlsx"), os.path.join(tmp_dir, f"{name}-warm.xlsx"), shallow=False)
+            print(f"{name:<10} generated {cold * 1000:9.1f} ms   from cache {warm * 1000:7.1f} ms   ({cold / warm:6.0f}x, identical file: {same})")
+
+        print()
+        national_id = database_ops.get_connection().execute("SELECT national_id FROM employees LIMIT 1").fetchone()[0]
+        writes = (
+            ("nothing written", lambda: None),
+            ("add_loan_to_db", lambda: database_ops.add_loan_to_db(national_id, "2024-01-01", 1_000_000, 100_000)),
+            ("record_monthly_payroll_to_db",
+             lambda: database_ops.record_monthly_payroll_to_db(national_id, "2099-01", 1, 0, 0, 0, 0, 0, 1, "")),
+            ("update_employee_in_db", lambda: database_ops.update_employee_in_db(national_id, "نام", "تغییر", "مدیر", 1.0)),
+            ("add_absence_to_db (not in any report)", lambda: database_ops.add_absence_to_db(national_id, "2099-01-01", 1.0)),
+        )
+        for tag, (label, write) in enumerate(writes):
+            write()
+            print(f"after {label:<40} regenerated: {', '.join(_regenerated(tmp_dir, tag)) or '-'}")
+
+        # Trigger overhead: the same batch insert with and without the table_versions triggers
+        conn = database_ops.get_connection()
+        rows = [(f"{9000000000 + i}", "نام", "خانوادگی", "کارشناس", 1.0) for i in range(50000)]
+        start = time.perf_counter()
+        database_ops.add_employees_batch(rows[:25000])
+        with_triggers = time.perf_counter() - start
+        for event in ("insert", "update", "delete"):
+            conn.execute(f"DROP TRIGGER employees_version_{event}")
+        start = time.perf_counter()
+        database_ops.add_employees_batch(rows[25000:])
+        without_triggers = time.perf_counter() - start
+        print(f"\nadd_employees_batch, 25000 rows: {with_triggers:.3f} s with version triggers, {without_triggers:.3f} s without")
+
+        report_cache.evict(max_bytes=report_cache.stats()["bytes"] // 2)
+        print(f"after evicting to half the size: {report_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
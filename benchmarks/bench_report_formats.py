@@ -0,0 +1,46 @@
+# benchmarks/bench_report_formats.py
+# Throughput of the three report formats (reports.REPORT_FORMATS) for each ReportsFrame report,
+# generated from scratch (no report cache): seconds, rows/s and output size. Then the peak Python
+# memory of the full-payslips export in each format, measured with tracemalloc in a separate
+# pass because tracing slows everything down.
+
+import os
+import tempfile
+import time
+import tracemalloc
+
+import reports
+from benchmarks.common import temp_database
+from benchmarks.datagen import generate_dataset
+
+EMPLOYEES = 10000
+MONTHS = 12
+
+
+def main():
+    print(f"Report formats, {EMPLOYEES} employees x {MONTHS} months of payroll\n")
+    with temp_database(), tempfile.TemporaryDirectory() as tmp_dir:
+        generate_dataset(EMPLOYEES, MONTHS, payroll_months=MONTHS)
+        print(f"{'report':<16} {'format':<9} {'rows':>8} {'seconds':>9} {'rows/s':>10} {'MB':>8} {'vs xlsx':>8}")
+        for report in reports.REPORT_DEFINITIONS:
+            xlsx_seconds = None
+            for fmt, extension in reports.REPORT_FORMATS.items():
+                filename = os.path.join(tmp_dir, report + extension)
+                start = time.perf_counter()
+                rows = reports.export_report(report, filename, fmt, use_cache=False)
+                seconds = time.perf_counter() - start
+                xlsx_seconds = xlsx_seconds or seconds
+                print(f"{report:<16} {fmt:<9} {rows:8d} {seconds:9.2f} {rows / seconds:10.0f} "
+                      f"{os.path.getsize(filename) / 1024 / 1024:8.1f} {xlsx_seconds / seconds:7.1f}x")
+
+        print()
+        for fmt, extension in reports.REPORT_FORMATS.items():
+            tracemalloc.start()
+            reports.export_report("full_payslips", os.path.join(tmp_dir, "traced" + extension), fmt, use_cache=False)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"full_payslips {fmt:<9} peak Python memory {peak / 1024 / 1024:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
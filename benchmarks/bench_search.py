@@ -0,0 +1,26 @@
+# benchmarks/bench_search.py
+# Employee search at 500k employees: the old LIKE '%q%' scan vs. database_ops.search_employees
+# (FTS5 trigram index for 3+ characters, indexed prefix ranges for shorter input).
+
+import database_ops
+from benchmarks.common import temp_database, seed_employees, time_calls, print_row
+
+EMPLOYEES = 500000 # ~1 minute to seed and index
+OLD_QUERY = "SELECT national_id, first_name, last_name, position FROM employees WHERE national_id LIKE ? OR first_name LIKE ? OR last_name LIKE ?"
+
+
+def main():
+    with temp_database():
+        seed_employees(EMPLOYEES)
+        database_ops.add_employee_to_db("0323244610", "علی", "محمدی", "کارشناس", 20_000_000)
+        conn = database_ops.get_connection()
+        conn.execute("ANALYZE")
+
+        for query in ("محمدی", "0323244", "خانوادگی12345", "عل", "1"):
+            pattern = f"%{query}%"
+            print_row(f"LIKE scan      '{query}'", time_calls(lambda: conn.execute(OLD_QUERY, (pattern,) * 3).fetchall(), 5))
+            print_row(f"search_employees '{query}'", time_calls(lambda: database_ops.search_employees(query), 200))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/bench_snapshot_export.py
+# Writer latency while a long report runs. A clerk thread records an absence every
+# WRITE_INTERVAL seconds (each a committed write, like AbsenceFrame) first on an idle database,
+# then while the full-payslips export reads the live file, then while it reads a
+# read_snapshot() copy. Reports write latency percentiles, the export time (snapshot included)
+# and how large the WAL grew: a reader holding the live file keeps checkpoints from resetting it.
+
+import os
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+import database_ops
+import report_cache
+import reports
+from benchmarks.common import temp_database, percentile
+from benchmarks.datagen import generate_dataset
+
+EMPLOYEES = 3000
+MONTHS = 12
+WRITE_INTERVAL = 0.005
+IDLE_SECONDS = 3
+
+
+class Clerk(threading.Thread):
+    """Records absences until stopped; keeps the latency of each and the largest WAL seen."""
+
+    def __init__(self, national_id, first_day):
+        super().__init__(daemon=True)
+        self.national_id = national_id
+        self.day = first_day
+        self.latencies = []
+        self.max_wal_bytes = 0
+        self.stop = threading.Event()
+
+    def run(self):
+        wal_path = database_ops.DB_NAME + "-wal"
+        while not self.stop.is_set():
+            self.day += timedelta(days=1)
+            start = time.perf_counter()
+            database_ops.add_absence_to_db(self.national_id, self.day.isoformat(), 1.0)
+            self.latencies.append((time.perf_counter() - start) * 1000)
+            self.max_wal_bytes = max(self.max_wal_bytes, os.path.getsize(wal_path))
+            time.sleep(WRITE_INTERVAL)
+        database_ops.close_connection()
+
+
+def _run(label, national_id, first_day, work):
+    database_ops.get_connection().execute("PRAGMA wal_checkpoint(TRUNCATE)") # Every scenario starts with an empty WAL
+    clerk = Clerk(national_id, first_day)
+    clerk.start()
+    start = time.perf_counter()
+    work()
+    elapsed = time.perf_counter() - start
+    clerk.stop.set()
+    clerk.join()
+    ordered = sorted(clerk.latencies)
+    print(f"{label:<30} {elapsed:8.2f} s {len(ordered):7d} {percentile(ordered, 0.5):8.2f} {percentile(ordered, 0.99):8.2f} "
+          f"{ordered[-1]:8.2f} {clerk.max_wal_bytes / 1024 / 1024:9.1f}")
+    return clerk.day
+
+
+def main():
+    print(f"Writer latency during the full-payslips export, {EMPLOYEES} employees x {MONTHS} months of payroll\n")
+    with temp_database(), tempfile.TemporaryDirectory() as tmp_dir:
+        generate_dataset(EMPLOYEES, MONTHS, payroll_months=MONTHS)
+        national_id = database_ops.get_connection().execute("SELECT national_id FROM employees LIMIT 1").fetchone()[0]
+        filename = os.path.join(tmp_dir, "payslips.xlsx")
+
+        start = time.perf_counter()
+        with database_ops.read_snapshot():
+            pass
+        print(f"read_snapshot of a {database_ops._database_size() / 1024 / 1024:.1f} MB database: "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+        def export(snapshot):
+            def work():
+                report_cache.REPORT_SNAPSHOT = snapshot
+                reports.export_full_payslips_xlsx(filename, use_cache=False)
+            return work
+
+        print(f"{'scenario':<30} {'duration':>10} {'writes':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'WAL MB':>9}")
+        original = report_cache.REPORT_SNAPSHOT
+        try:
+            day = date(2100, 1, 1)
+            day = _run("no export", national_id, day, lambda: time.sleep(IDLE_SECONDS))
+            day = _run("export reading the live file", national_id, day, export(False))
+            _run("export reading a snapshot", national_id, day, export(True))
+        finally:
+            report_cache.REPORT_SNAPSHOT = original
+
+
+if __name__ == "__main__":
+    main()
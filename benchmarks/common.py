@@ -0,0 +1,111 @@
+# benchmarks/common.py
+
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+
+import database_ops
+import report_cache
+
+
+@contextmanager
+def temp_database(source=None):
+    """Points database_ops at a fresh temporary database for the duration of the block.
+
+    If source is given the temporary database starts as a copy of it, so a pre-generated
+    dataset (benchmarks/datagen.py) can be reused without being modified. The report cache
+    is redirected to the same temporary directory.
+    """
+    original_db_name = database_ops.DB_NAME
+    original_cache_dir = report_cache.REPORT_CACHE_DIR
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database_ops.DB_NAME = os.path.join(tmp_dir, "bench.db")
+        report_cache.REPORT_CACHE_DIR = os.path.join(tmp_dir, "report_cache") # Keep cached reports out of the project
+        if source:
+            shutil.copyfile(source, database_ops.DB_NAME)
+        try:
+            database_ops.init_db()
+            yield database_ops.DB_NAME
+        finally:
+            database_ops.close_all_connections()
+            database_ops.DB_NAME = original_db_name
+            report_cache.REPORT_CACHE_DIR = original_cache_dir
+
+
+def make_national_id(index):
+    """Returns a deterministic 10-digit national id for the given index."""
+    return f"{1000000000 + index:010d}"
+
+
+def seed_employees(count, seed=42):
+    """Inserts `count` synthetic employees in one transaction and returns their ids."""
+    rng = random.Random(seed)
+    rows = [
+        (make_national_id(i), f"نام{i}", f"خانوادگی{i}", rng.choice(["کارشناس", "مدیر", "تکنسین"]),
+         float(rng.randrange(8_000_000, 60_000_000, 1000)))
+        for i in range(count)
+    ]
+    conn = database_ops.get_connection()
+    with conn:
+        conn.executemany("INSERT INTO employees (national_id, first_name, last_name, position, base_salary) VALUES (?, ?, ?, ?, ?)", rows)
+    return [row[0] for row in rows]
+
+
+def time_calls(func, iterations):
+    """Calls func() `iterations` times and returns per-call latencies in microseconds."""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(samples):
+    """Returns (median, p95, mean) of a list of latencies."""
+    ordered = sorted(samples)
+    return statistics.median(ordered), percentile(ordered, 0.95), statistics.fmean(ordered)
+
+
+def print_row(label, samples, unit="us"):
+    median, p95, mean = summarize(samples)
+    print(f"{label:<52} median {median:10.1f} {unit}   p95 {p95:10.1f} {unit}   mean {mean:10.1f} {unit}")
+
+
+def seed_attendance(national_ids, year_month, records_per_employee=4, seed=42):
+    """Adds absences and overtimes spread over the given YYYY-MM for each employee."""
+    rng = random.Random(seed)
+    absences, overtimes = [], []
+    for national_id in national_ids:
+        for _ in range(records_per_employee):
+            day = f"{year_month}-{rng.randint(1, 28):02d}"
+            absences.append((national_id, day, rng.choice([0.5, 1.0, 2.0, 4.0]), ""))
+            overtimes.append((national_id, day, rng.choice([0.5, 1.5, 2.0, 3.0]), ""))
+    conn = database_ops.get_connection()
+    with conn:
+        conn.executemany("INSERT INTO absences (employee_national_id, absence_date, hours_absent, reason) VALUES (?, ?, ?, ?)", absences)
+        conn.executemany("INSERT INTO overtimes (employee_national_id, overtime_date, hours_worked, description) VALUES (?, ?, ?, ?)", overtimes)
+
+
+def seed_loans(national_ids, share=0.3, seed=42):
+    """Gives roughly `share` of the employees one or two active loans."""
+    rng = random.Random(seed)
+    loans = []
+    for national_id in national_ids:
+        if rng.random() < share:
+            for _ in range(rng.randint(1, 2)):
+                amount = float(rng.randrange(5_000_000, 50_000_000, 100_000))
+                loans.append((national_id, f"2023-{rng.randint(1, 12):02d}-01", amount, amount,
+                              rng.choice([0.0, amount / 10, amount / 12]), ""))
+    conn = database_ops.get_connection()
+    with conn:
+        conn.executemany("INSERT INTO loans (employee_national_id, loan_date, amount, remaining_amount, installment_amount, description) VALUES (?, ?, ?, ?, ?, ?)", loans)
@@ -0,0 +1,143 @@
+# benchmarks/datagen.py
+# Reproducible synthetic dataset for benchmarks and manual testing: employees, months of
+# absences, overtimes and leaves, loans, and recorded payroll for the most recent months.
+# The same arguments always produce the same database. From the project root:
+#   python -m benchmarks.datagen big.db --employees 100000 --months 24
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import database_ops
+from payroll import run_payroll_for_month
+from benchmarks.common import make_national_id
+
+GENERATE_CHUNK_SIZE = 5000 # Employees (and all their records) per transaction
+POSITIONS = ("کارشناس", "مدیر", "تکنسین", "کارمند اداری", "سرپرست")
+LEAVE_TYPES = ("استحقاقی", "استعلاجی", "بدون حقوق")
+
+
+def month_range(start_month, months):
+    """Returns `months` consecutive YYYY-MM strings starting at start_month."""
+    year, month = (int(part) for part in start_month.split("-"))
+    result = []
+    for offset in range(months):
+        y, m = divmod(month - 1 + offset, 12)
+        result.append(f"{year + y:04d}-{m + 1:02d}")
+    return result
+
+
+def _employee_rows(rng, first_index, count):
+    return [
+        (make_national_id(i), f"نام{i}", f"خانوادگی{i}", rng.choice(POSITIONS),
+         float(rng.randrange(8_000_000, 60_000_000, 1000)))
+        for i in range(first_index, first_index + count)
+    ]
+
+
+def _attendance_rows(rng, national_ids, months):
+    """One to two absences, two to four overtimes and an occasional leave per employee per month,
+    on distinct days so (employee, date) stays unique the way the time-clock import keeps it."""
+    absences, overtimes, leaves = [], [], []
+    for national_id in national_ids:
+        for month in months:
+            days = rng.sample(range(1, 29), 6)
+            for day in days[:rng.randint(1, 2)]:
+                absences.append((national_id, f"{month}-{day:02d}", rng.choice((0.5, 1.0, 2.0, 4.0)), ""))
+            for day in days[2:2 + rng.randint(2, 4)]:
+                overtimes.append((national_id, f"{month}-{day:02d}", rng.choice((0.5, 1.5, 2.0, 3.0)), ""))
+            if rng.random() < 0.1:
+                start_day = rng.randint(1, 25)
+                duration = rng.randint(1, 3)
+                leaves.append((national_id, f"{month}-{start_day:02d}", f"{month}-{start_day + duration - 1:02d}",
+                               rng.choice(LEAVE_TYPES), float(duration), ""))
+    return absences, overtimes, leaves
+
+
+def _loan_rows(rng, national_ids, first_month, loan_share):
+    loans = []
+    for national_id in national_ids:
+        if rng.random() < loan_share:
+            for _ in range(rng.randint(1, 2)):
+                amount = float(rng.randrange(5_000_000, 50_000_000, 100_000))
+                loans.append((national_id, f"{first_month}-{rng.randint(1, 28):02d}", amount, amount,
+                              rng.choice((0.0, amount / 10, amount / 12)), ""))
+    return loans
+
+
+def generate_dataset(employees, months=12, start_month="2023-01", payroll_months=3, loan_share=0.3,
+                     seed=42, progress=None):
+    """Fills the current database (database_ops.DB_NAME, already initialised) with synthetic data.
+
+    Employees get attendance for every month, about loan_share of them get loans, and payroll is
+    run for the last payroll_months months. progress, if given, is called with (stage, done, total).
+    Returns the list of months covered.
+    """
+    rng = random.Random(seed)
+    month_list = month_range(start_month, months)
+    for first_index in range(0, employees, GENERATE_CHUNK_SIZE):
+        count = min(GENERATE_CHUNK_SIZE, employees - first_index)
+        employee_rows = _employee_rows(rng, first_index, count)
+        national_ids = [row[0] for row in employee_rows]
+        absences, overtimes, leaves = _attendance_rows(rng, national_ids, month_list)
+        with database_ops.bulk_attendance_load(national_ids) as conn:
+            database_ops.add_employees_batch(employee_rows)
+            conn.executemany("INSERT INTO absences (employee_national_id, absence_date, hours_absent, reason) VALUES (?, ?, ?, ?)", absences)
+            conn.executemany("INSERT INTO overtimes (employee_national_id, overtime_date, hours_worked, description) VALUES (?, ?, ?, ?)", overtimes)
+            conn.executemany("INSERT INTO leaves (employee_national_id, leave_start_date, leave_end_date, leave_type, duration_days, description) VALUES (?, ?, ?, ?, ?, ?)", leaves)
+            conn.executemany("INSERT INTO loans (employee_national_id, loan_date, amount, remaining_amount, installment_amount, description) VALUES (?, ?, ?, ?, ?, ?)",
+                             _loan_rows(rng, national_ids, month_list[0], loan_share))
+        if progress:
+            progress("employees", first_index + count, employees)
+
+    payroll_month_list = month_list[-payroll_months:] if payroll_months > 0 else []
+    for done, month in enumerate(payroll_month_list, start=1):
+        run_payroll_for_month(month, benefits=500_000, deductions=100_000)
+        if progress:
+            progress("payroll", done, len(payroll_month_list))
+    database_ops.get_connection().execute("PRAGMA optimize")
+    return month_list
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Generate a synthetic payroll database.")
+    parser.add_argument("output", help="path of the database to create (must not exist)")
+    parser.add_argument("--employees", type=int, default=10000, help="number of employees (default 10000)")
+    parser.add_argument("--months", type=int, default=12, help="months of attendance (default 12)")
+    parser.add_argument("--start-month", default="2023-01", help="first month, YYYY-MM (default 2023-01)")
+    parser.add_argument("--payroll-months", type=int, default=3, help="most recent months with recorded payroll (default 3)")
+    parser.add_argument("--loan-share", type=float, default=0.3, help="share of employees with loans (default 0.3)")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if os.path.exists(args.output):
+        print(f"{args.output} already exists; refusing to add synthetic data to it.", file=sys.stderr)
+        return 1
+
+    def report(stage, done, total):
+        print(f"\r{stage}: {done}/{total}", end="", file=sys.stderr)
+        if done == total:
+            print(file=sys.stderr)
+
+    database_ops.DB_NAME = args.output
+    start = time.perf_counter()
+    try:
+        database_ops.init_db()
+        generate_dataset(args.employees, args.months, args.start_month, min(args.payroll_months, args.months),
+                         args.loan_share, args.seed, progress=report)
+        conn = database_ops.get_connection()
+        for table in ("employees", "absences", "overtimes", "leaves", "loans", "payroll"):
+            print(f"{table}: {conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]}")
+    finally:
+        database_ops.close_all_connections()
+    print(f"generated in {time.perf_counter() - start:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+# benchmarks/explain_indexes.py
+# EXPLAIN QUERY PLAN and timing for the monthly attendance lookups: the old
+# STRFTIME('%Y-%m', date) = ? predicate vs. the date range used by database_ops.
+
+import database_ops
+from benchmarks.common import temp_database, seed_employees, seed_attendance, time_calls, print_row
+
+EMPLOYEES = 20000
+MONTH = "2024-03"
+
+OLD_QUERY = "SELECT SUM(hours_absent) FROM absences WHERE employee_national_id = ? AND STRFTIME('%Y-%m', absence_date) = ?"
+NEW_QUERY = "SELECT SUM(hours_absent) FROM absences WHERE employee_national_id = ? AND absence_date >= ? AND absence_date < ?"
+BATCH_QUERY = "SELECT employee_national_id, SUM(hours_absent) FROM absences WHERE absence_date >= ? AND absence_date < ? GROUP BY employee_national_id"
+
+
+def _plan(conn, sql, params):
+    return "\n".join(f"    {row[3]}" for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+
+
+def main():
+    with temp_database():
+        national_ids = seed_employees(EMPLOYEES)
+        for year_month in ("2024-01", "2024-02", MONTH):
+            seed_attendance(national_ids, year_month)
+        conn = database_ops.get_connection()
+        conn.execute("ANALYZE")
+        target = national_ids[EMPLOYEES // 2]
+        month_start, next_month_start = database_ops.month_date_range(MONTH)
+
+        print("STRFTIME predicate:\n" + _plan(conn, OLD_QUERY, (target, MONTH)))
+        print("Date range predicate:\n" + _plan(conn, NEW_QUERY, (target, month_start, next_month_start)))
+        print("Batch month aggregation:\n" + _plan(conn, BATCH_QUERY, (month_start, next_month_start)))
+        print()
+
+        print_row("STRFTIME predicate", time_calls(lambda: conn.execute(OLD_QUERY, (target, MONTH)).fetchone(), 500))
+        print_row("get_absences_in_month (range)", time_calls(lambda: database_ops.get_absences_in_month(target, MONTH), 500))
+
+        # Same lookups on a database without the indexes, i.e. before the migration
+        for index_name in ("idx_absences_employee_date", "idx_absences_date"):
+            conn.execute(f"DROP INDEX {index_name}")
+        print_row("STRFTIME predicate, no index", time_calls(lambda: conn.execute(OLD_QUERY, (target, MONTH)).fetchone(), 20))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+# benchmarks/suite.py
+# Headless benchmark suite: times every public function of database_ops, the payroll
+# calculation and recording, and the three ReportsFrame exports on a synthetic dataset
+# (benchmarks/datagen.py), writes the results as JSON and compares them with a saved baseline.
+#
+#   python -m benchmarks.suite --save-baseline benchmarks/baseline.json   # once, on a known-good tree
+#   python -m benchmarks.suite --baseline benchmarks/baseline.json        # exits 1 on a regression
+#
+# Baselines are machine specific and only comparable at the same dataset size and seed. The
+# write cases change what later cases read, so compare full runs (--only is for quick checks).
+
+import argparse
+import inspect
+import itertools
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import database_ops
+import payroll
+import reports
+from benchmarks.common import temp_database, make_national_id, percentile, summarize
+from benchmarks.datagen import generate_dataset
+
+DEFAULT_TOLERANCE = 0.25 # Allowed slowdown of the median before a case counts as a regression
+MIN_DELTA_US = 20.0 # Differences below this are noise however large the ratio
+SAMPLE_EMPLOYEES = 1000 # Existing employees the per-employee cases cycle through
+NEW_EMPLOYEE_BASE = 5_000_000 # Index of the first employee the write cases create (beyond any dataset)
+
+
+class Context:
+    """Dataset facts and key generators shared by the cases."""
+
+    def __init__(self, months):
+        conn = database_ops.get_connection()
+        ids = [row[0] for row in conn.execute("SELECT national_id FROM employees ORDER BY national_id")]
+        rng = random.Random(1)
+        self.national_ids = rng.sample(ids, min(SAMPLE_EMPLOYEES, len(ids)))
+        self.employee_count = len(ids)
+        self.middle_id = ids[len(ids) // 2]
+        self.month = months[-1] # Has payroll and attendance
+        self.loan_ids = [row[0] for row in conn.execute("SELECT id FROM loans LIMIT ?", (SAMPLE_EMPLOYEES,))] or [0]
+        self._sample = itertools.cycle(self.national_ids)
+        self._loan = itertools.cycle(self.loan_ids)
+        self._new_index = itertools.count(NEW_EMPLOYEE_BASE)
+        self._day = itertools.count()
+        self._month = itertools.count()
+        self.created = [] # Employees added by add_employee_to_db, deleted by its counterpart
+
+    def employee(self):
+        return next(self._sample)
+
+    def loan(self):
+        return next(self._loan)
+
+    def new_employee_id(self):
+        return make_national_id(next(self._new_index))
+
+    def future_date(self):
+        """A distinct date after the dataset, so inserted attendance never collides."""
+        day = next(self._day)
+        return f"{2100 + day // 336}-{day // 28 % 12 + 1:02d}-{day % 28 + 1:02d}"
+
+    def new_month(self):
+        """A month no other case has used and without attendance, for recording payroll."""
+        month = next(self._month)
+        return f"{2200 + month // 12}-{month % 12 + 1:02d}"
+
+
+def _add_employee(ctx):
+    national_id = ctx.new_employee_id()
+    database_ops.add_employee_to_db(national_id, "نام", "خانوادگی", "کارشناس", 20_000_000.0)
+    ctx.created.append(national_id)
+
+
+def _employee_batch(ctx, count=1000):
+    return [(ctx.new_employee_id(), "نام", "خانوادگی", "کارشناس", 20_000_000.0) for _ in range(count)]
+
+
+def _attendance_batch(ctx, count=1000):
+    rows = []
+    for _ in range(count // len(ctx.national_ids) + 1):
+        day = ctx.future_date()
+        rows.extend((national_id, day, 1.5, "") for national_id in ctx.national_ids)
+    return rows[:count]
+
+
+def _payroll_row(ctx, month):
+    payslip = payroll.calculate_payslip(month, 20_000_000, 4, 2, 0, 0, [])
+    return payroll.payroll_row(ctx.employee(), payslip)
+
+
+def _bulk_load(ctx):
+    ids = ctx.national_ids[:100]
+    day = ctx.future_date()
+    with database_ops.bulk_attendance_load(ids) as conn:
+        conn.executemany("INSERT INTO absences (employee_national_id, absence_date, hours_absent, reason) VALUES (?, ?, ?, ?)",
+                         ((national_id, day, 1.0, "") for national_id in ids))
+
+
+def _transaction_block():
+    with database_ops.transaction():
+        pass
+
+
+def _snapshot_block():
+    with database_ops.read_snapshot():
+        pass
+
+
+def _export(export, filename, use_cache=False):
+    def run():
+        export(filename, use_cache=use_cache)
+    return run
+
+
+def build_cases(ctx, tmp_dir):
+    """Returns [(name, callable, iterations)] in run order: reads, writes, payroll, exports,
+    then the maintenance functions that rewrite the whole database."""
+    db = database_ops
+    payroll_month_for = {} # record_monthly_payroll_to_db and record_payroll_and_loans each get their own month
+    month_with_payroll = ctx.month
+
+    def unique_payroll_month(name):
+        # Each case records every sample employee at most once per month
+        count = payroll_month_for.setdefault(name, [None, len(ctx.national_ids)])
+        if count[1] >= len(ctx.national_ids):
+            count[0], count[1] = ctx.new_month(), 0
+        count[1] += 1
+        return count[0]
+
+    cases = [
+        # Connection and transaction plumbing
+        ("database_ops.get_connection", db.get_connection, 5000),
+        ("database_ops.transaction (empty)", _transaction_block, 2000),
+        ("database_ops.read_snapshot (copy of the whole database)", _snapshot_block, 10),
+        ("database_ops.close_connection (+ reopen)", lambda: (db.close_connection(), db.get_connection()), 200),
+        ("database_ops.close_all_connections (+ reopen)", lambda: (db.close_all_connections(), db.get_connection()), 200),
+        ("database_ops.init_db (existing database)", db.init_db, 20),
+        ("database_ops.month_date_range", lambda: db.month_date_range("2024-12"), 5000),
+        # Employees
+        ("database_ops.clear_employee_cache", db.clear_employee_cache, 2000),
+        ("database_ops.get_employee_cache_stats", db.get_employee_cache_stats, 5000),
+        ("database_ops.get_table_versions", db.get_table_versions, 5000),
+        ("database_ops.get_employee_data (one)", lambda: db.get_employee_data(ctx.employee()), 2000),
+        ("database_ops.get_employee_data (all)", db.get_employee_data, 3),
+        ("database_ops.get_employees_page (first)", lambda: db.get_employees_page("last_name"), 500),
+        ("database_ops.get_employees_page (middle)",
+         lambda: db.get_employees_page("national_id", after=(ctx.middle_id, ctx.middle_id)), 500),
+        ("database_ops.get_employees_page (offset, middle)",
+         lambda: db.get_employees_page("last_name", offset=ctx.employee_count // 2), 50),
+        ("database_ops.count_employees", db.count_employees, 200),
+        ("database_ops.employee_page_cursor", lambda: db.employee_page_cursor(("1", "a", "b", None, 1.0), "position"), 5000),
+        ("database_ops.get_existing_employee_ids (1000)", lambda: db.get_existing_employee_ids(ctx.national_ids), 50),
+        ("database_ops.search_employees (name)", lambda: db.search_employees("خانوادگی12"), 200),
+        ("database_ops.search_employees (national id)", lambda: db.search_employees(ctx.employee()[:6]), 200),
+        # Per-employee history and month lookups
+        ("database_ops.get_payroll_history", lambda: db.get_payroll_history(ctx.employee()), 1000),
+        ("database_ops.get_payslip_details", lambda: db.get_payslip_details(ctx.employee(), month_with_payroll), 1000),
+        ("database_ops.get_absences_in_month", lambda: db.get_absences_in_month(ctx.employee(), ctx.month), 2000),
+        ("database_ops.get_overtimes_in_month", lambda: db.get_overtimes_in_month(ctx.employee(), ctx.month), 2000),
+        ("database_ops.get_active_loans", lambda: db.get_active_loans(ctx.employee()), 2000),
+        ("database_ops.get_loan_by_id", lambda: db.get_loan_by_id(ctx.loan()), 2000),
+        ("database_ops.get_absences_history", lambda: db.get_absences_history(ctx.employee()), 1000),
+        ("database_ops.get_overtime_history", lambda: db.get_overtime_history(ctx.employee()), 1000),
+        ("database_ops.get_employee_history_page", lambda: db.get_employee_history_page("payroll", ctx.employee(), 20, 0), 1000),
+        ("database_ops.get_leave_history", lambda: db.get_leave_history(ctx.employee()), 1000),
+        ("database_ops.get_import_checkpoint", lambda: db.get_import_checkpoint("bench:missing"), 2000),
+        ("database_ops.get_export_watermark", lambda: db.get_export_watermark("bench:missing"), 2000),
+        # Whole-company month reads (batch payroll)
+        ("database_ops.get_employees_without_payroll", lambda: db.get_employees_without_payroll(ctx.month), 5),
+        ("database_ops.get_absence_totals_for_month", lambda: db.get_absence_totals_for_month(ctx.month), 10),
+        ("database_ops.get_overtime_totals_for_month", lambda: db.get_overtime_totals_for_month(ctx.month), 10),
+        ("database_ops.get_active_loans_by_employee", db.get_active_loans_by_employee, 5),
+        ("database_ops.check_monthly_attendance", db.check_monthly_attendance, 3),
+        # Writes
+        ("database_ops.add_employee_to_db", lambda: _add_employee(ctx), 500),
+        ("database_ops.update_employee_in_db",
+         lambda: db.update_employee_in_db(ctx.employee(), "نام", "خانوادگی", "کارشناس", 20_000_000.0), 500),
+        ("database_ops.delete_employee_from_db", lambda: db.delete_employee_from_db(ctx.created.pop()), 500),
+        ("database_ops.add_employees_batch (1000)", lambda: db.add_employees_batch(_employee_batch(ctx)), 5),
+        ("database_ops.add_loan_to_db", lambda: db.add_loan_to_db(ctx.employee(), "2100-01-01", 1_000_000, 100_000), 500),
+        ("database_ops.update_loan_remaining_amount", lambda: db.update_loan_remaining_amount(ctx.loan(), 1_000_000), 500),
+        ("database_ops.add_absence_to_db", lambda: db.add_absence_to_db(ctx.employee(), ctx.future_date(), 1.0), 500),
+        ("database_ops.add_overtime_to_db", lambda: db.add_overtime_to_db(ctx.employee(), ctx.future_date(), 1.0), 500),
+        ("database_ops.add_leave_to_db",
+         lambda: db.add_leave_to_db(ctx.employee(), "2100-01-01", "2100-01-02", "استحقاقی", 2), 500),
+        ("database_ops.add_attendance_batch (1000)", lambda: db.add_attendance_batch("overtimes", _attendance_batch(ctx)), 5),
+        ("database_ops.bulk_attendance_load (100 employees)", lambda: _bulk_load(ctx), 5),
+        ("database_ops.record_monthly_payroll_to_db",
+         lambda: db.record_monthly_payroll_to_db(*_payroll_row(ctx, unique_payroll_month("single"))), 500),
+        ("database_ops.record_payroll_and_loans",
+         lambda: db.record_payroll_and_loans([_payroll_row(ctx, unique_payroll_month("unit"))], []), 500),
+        ("database_ops.save_import_checkpoint", lambda: db.save_import_checkpoint("bench:source", "absences", 1000), 500),
+        ("database_ops.delete_import_checkpoint", lambda: db.delete_import_checkpoint("bench:source"), 500),
+        ("database_ops.save_export_watermark", lambda: db.save_export_watermark("bench:target", 1000, 4096, 1000), 500),
+        ("database_ops.delete_export_watermark", lambda: db.delete_export_watermark("bench:target"), 500),
+        # Payroll
+        ("payroll.calculate_payslip",
+         lambda: payroll.calculate_payslip("2024-01", 25_000_000, 6, 3, 500_000, 100_000,
+                                           [(1, "2023-01-01", 12_000_000, 10_000_000, 1_000_000, ""),
+                                            (2, "2023-06-01", 5_000_000, 5_000_000, 0, "")]), 5000),
+        ("payroll.record_employee_payroll",
+         lambda: payroll.record_employee_payroll(ctx.employee(), unique_payroll_month("employee"), 0, 0), 500),
+        ("payroll.run_payroll_for_month", lambda: payroll.run_payroll_for_month(ctx.new_month()), 2),
+    ]
+    # The three exports of ReportsFrame, without the window, generated every time
+    if _has_openpyxl():
+        cases += [
+            ("reports.export_employees_xlsx", _export(reports.export_employees_xlsx, os.path.join(tmp_dir, "employees.xlsx")), 2),
+            ("reports.export_payroll_summary_xlsx",
+             _export(reports.export_payroll_summary_xlsx, os.path.join(tmp_dir, "summary.xlsx")), 2),
+            ("reports.export_full_payslips_xlsx",
+             _export(reports.export_full_payslips_xlsx, os.path.join(tmp_dir, "payslips.xlsx")), 2),
+            # Unchanged data: served from report_cache (the warm-up call fills it)
+            ("reports.export_full_payslips_xlsx (cached)",
+             _export(reports.export_full_payslips_xlsx, os.path.join(tmp_dir, "payslips.xlsx"), use_cache=True), 5),
+        ]
+    # The streaming formats need no openpyxl
+    for report in reports.REPORT_DEFINITIONS:
+        for fmt in ("csv", "jsonl.gz"):
+            filename = os.path.join(tmp_dir, report + reports.REPORT_FORMATS[fmt])
+            cases.append((f"reports.export_report ({report}, {fmt})",
+                          lambda report=report, fmt=fmt, filename=filename: reports.export_report(report, filename, fmt, use_cache=False), 2))
+    # The warm-up call writes the whole feed; the timed re-runs find nothing new
+    cases.append(("reports.export_new_payslips (nothing new)",
+                  lambda: reports.export_new_payslips(os.path.join(tmp_dir, "payslips.jsonl")), 500))
+    cases += [
+        ("database_ops.rebuild_employee_search_index", _rebuild_search_index, 2),
+        ("database_ops.rebuild_monthly_attendance", db.rebuild_monthly_attendance, 2),
+        ("database_ops.compact_database", db.compact_database, 1),
+    ]
+    return cases
+
+
+def _rebuild_search_index():
+    with database_ops.transaction(): # Its callers, init_db and compact_database, run it inside a write transaction too
+        database_ops.rebuild_employee_search_index()
+
+
+def _has_openpyxl():
+    try:
+        import openpyxl # noqa: F401 -- Only needed for the export cases
+    except ImportError:
+        return False
+    return True
+
+
+def uncovered_functions(cases):
+    """Public database_ops functions no case times, so new ones are not forgotten."""
+    covered = {name.split()[0].split(".", 1)[1] for name, _, _ in cases if name.startswith("database_ops.")}
+    public = {name for name, value in vars(database_ops).items()
+              if not name.startswith("_") and inspect.isfunction(value) and value.__module__ == "database_ops"}
+    return sorted(public - covered)
+
+
+def run_case(func, iterations):
+    """Times iterations calls after one warm-up call; returns the summary dict stored in the JSON."""
+    func()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    median, p95, mean = summarize(samples)
+    return {"iterations": iterations, "median_us": round(median, 2), "p95_us": round(p95, 2),
+            "mean_us": round(mean, 2), "min_us": round(percentile(sorted(samples), 0), 2)}
+
+
+def run_suite(employees, months, seed, source=None, only=None, progress=None):
+    """Builds (or copies) the dataset and runs every case. Returns the results document."""
+    with temp_database(source=source), tempfile.TemporaryDirectory() as tmp_dir:
+        conn = database_ops.get_connection()
+        if source:
+            month_list = [row[0] for row in conn.execute(
+                "SELECT DISTINCT substr(absence_date, 1, 7) FROM absences WHERE absence_date < '2100' ORDER BY 1")]
+        else:
+            month_list = generate_dataset(employees, months, seed=seed)
+        dataset = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                   for table in ("employees", "absences", "overtimes", "leaves", "loans", "payroll")}
+        ctx = Context(month_list)
+        cases = build_cases(ctx, tmp_dir)
+        results = {}
+        for name, func, iterations in cases:
+            if only and not any(pattern in name for pattern in only):
+                continue
+            results[name] = run_case(func, iterations)
+            if progress:
+                progress(name, results[name])
+        missing = uncovered_functions(cases)
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "seed": seed,
+            "dataset": dataset,
+        },
+        "results": results,
+        "not_benchmarked": missing,
+    }
+
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE, min_delta_us=MIN_DELTA_US):
+    """Returns [(name, baseline_median, current_median)] of the cases that got slower than allowed."""
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        limit = before["median_us"] * (1 + tolerance)
+        if result["median_us"] > limit and result["median_us"] - before["median_us"] > min_delta_us:
+            regressions.append((name, before["median_us"], result["median_us"]))
+    return regressions
+
+
+def _format_us(value):
+    if value >= 1e6:
+        return f"{value / 1e6:8.2f} s "
+    if value >= 1e3:
+        return f"{value / 1e3:8.2f} ms"
+    return f"{value:8.1f} us"
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run the headless benchmark suite.")
+    parser.add_argument("--employees", type=int, default=10000, help="dataset size (default 10000)")
+    parser.add_argument("--months", type=int, default=12, help="months of attendance (default 12)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="run on a copy of this database (e.g. from benchmarks.datagen) instead of generating one")
+    parser.add_argument("--only", action="append", help="run only cases whose name contains this text (repeatable)")
+    parser.add_argument("--output", default="benchmark_results.json", help="where to write the results (default benchmark_results.json)")
+    parser.add_argument("--baseline", help="compare with this results file; exit 1 on a regression")
+    parser.add_argument("--save-baseline", help="also write the results to this file as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"allowed slowdown of a median, as a fraction (default {DEFAULT_TOLERANCE})")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    def report(name, result):
+        before = baseline["results"].get(name) if baseline else None
+        change = f"{(result['median_us'] / before['median_us'] - 1) * 100:+7.1f}%" if before and before["median_us"] else ""
+        print(f"{name:<56} median {_format_us(result['median_us'])}   p95 {_format_us(result['p95_us'])}   {change}")
+
+    source = f"copy of {args.db}" if args.db else f"{args.employees} generated employees x {args.months} months"
+    print(f"Benchmark suite on {source}\n")
+    current = run_suite(args.employees, args.months, args.seed, source=args.db, only=args.only, progress=report)
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+    if current["not_benchmarked"]:
+        print(f"\nnot benchmarked: {', '.join(current['not_benchmarked'])}")
+    print(f"\nresults written to {args.output}")
+
+    if baseline is None:
+        return 0
+    if baseline["meta"]["dataset"] != current["meta"]["dataset"]:
+        print("baseline was recorded on a different dataset; nothing compared", file=sys.stderr)
+        return 2
+    regressions = compare(current, baseline, args.tolerance)
+    if not regressions:
+        print(f"no regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+        return 0
+    print(f"\n{len(regressions)} REGRESSION(S) against {args.baseline} (tolerance {args.tolerance:.0%}):", file=sys.stderr)
+    for name, before, after in regressions:
+        print(f"  {name:<56} {_format_us(before)} -> {_format_us(after)} ({after / before:.2f}x)", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,4 +7,43 @@ ADMIN_PASSWORD = "123"
 # Assuming 176 working hours in a month for payroll calculation
 HOURLY_WORK_HOURS_IN_MONTH = 176
 OVERTIME_RATE_FACTOR = 1.4 # 1.4 times normal rate
-ABSENCE_RATE_FACTOR = 1.0 # 1.0 times normal rate (deduction)
\ No newline at end of file
+ABSENCE_RATE_FACTOR = 1.0 # 1.0 times normal rate (deduction)
+
+# SQLite connection tuning (see database_ops.get_connection)
+DB_CACHE_SIZE_KB = 64000 # Page cache per connection (~64 MB)
+DB_MMAP_SIZE = 268435456 # 256 MB memory-mapped I/O
+DB_BUSY_TIMEOUT_MS = 5000 # Wait this long for a lock before raising "database is locked"
+
+# Employee search
+SEARCH_RESULT_LIMIT = 50 # Maximum rows shown for a search
+SEARCH_DEBOUNCE_MS = 300 # Search-as-you-type waits this long after the last keystroke
+
+# Employee record cache (database_ops.get_employee_data); 0 disables it
+EMPLOYEE_CACHE_SIZE = 1024
+
+# Import tkcalendar and openpyxl on a background thread right after login, instead of
+# on the first visit to the attendance or reports screens
+WARM_UP_IMPORTS = True
+
+# Opt-in SQL/function latency instrumentation (instrumentation.py); the PAYROLL_SQL_TRACE=1 and
+# PAYROLL_SLOW_QUERY_MS environment variables override the first two
+SQL_TRACE = False
+SQL_SLOW_QUERY_MS = 100 # Statements at least this slow go to the slow-query log
+SQL_SLOW_QUERY_LOG_SIZE = 200 # Most recent slow statements kept
+
+# Generated report files are cached on disk and reused while the tables they read are unchanged
+REPORT_CACHE_ENABLED = True
+REPORT_CACHE_DIR = "report_cache"
+REPORT_CACHE_MAX_BYTES = 256 * 1024 * 1024 # Least recently used reports are deleted beyond this
+
+# Reports are generated from a point-in-time copy of the database (database_ops.read_snapshot),
+# so a long export holds no read transaction on the live file while clerks keep writing
+REPORT_SNAPSHOT = True
+SNAPSHOT_MEMORY_MAX_BYTES = 256 * 1024 * 1024 # Larger databases are copied to a temporary file instead of memory
+
+# Local HTTP/JSON service (api_server.py)
+API_HOST = "127.0.0.1" # Loopback only; other machines need an explicit --host
+API_PORT = 8765
+API_READER_THREADS = 8 # Concurrently served connections, each with its own database connection
+API_PAGE_SIZE = 100 # Default page size of list endpoints
+API_MAX_PAGE_SIZE = 1000
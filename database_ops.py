@@ -1,12 +1,215 @@
 # database_ops.py
 
+import os
 import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
-from config import DB_NAME # Import DB_NAME from config
+import instrumentation
+from payslips import render_payslip_details, convert_legacy_payslip_details
+from config import DB_NAME, DB_CACHE_SIZE_KB, DB_MMAP_SIZE, DB_BUSY_TIMEOUT_MS, SEARCH_RESULT_LIMIT, EMPLOYEE_CACHE_SIZE, SNAPSHOT_MEMORY_MAX_BYTES # Import DB settings from config
+
+SCHEMA_VERSION = 1 # PRAGMA user_version after init_db's data migrations
+
+# --- Connection manager ---
+# Each thread keeps one long-lived connection per database file, so the page cache
+# survives between calls and we don't pay connect/teardown on every query.
+_local = threading.local()
+_all_connections = []
+_all_connections_lock = threading.Lock()
+
+def _configure_connection(conn):
+    """Applies the performance and integrity PRAGMAs to a freshly opened connection."""
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA journal_mode = WAL") # Readers don't block the writer (and vice versa)
+    cursor.execute("PRAGMA synchronous = NORMAL") # Safe with WAL, avoids an fsync per commit
+    cursor.execute(f"PRAGMA cache_size = -{int(DB_CACHE_SIZE_KB)}") # Negative value = size in KiB
+    cursor.execute(f"PRAGMA mmap_size = {int(DB_MMAP_SIZE)}")
+    cursor.execute(f"PRAGMA busy_timeout = {int(DB_BUSY_TIMEOUT_MS)}")
+    cursor.execute("PRAGMA temp_store = MEMORY")
+    cursor.execute("PRAGMA foreign_keys = ON") # Needed for ON DELETE CASCADE to actually fire
+    cursor.close()
+
+def get_connection():
+    """Returns the calling thread's shared connection to DB_NAME, opening it on first use
+    (or its read_snapshot() copy while one is active)."""
+    snapshot = getattr(_local, "snapshot", None)
+    if snapshot is not None and snapshot[0] == DB_NAME:
+        return snapshot[1]
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(DB_NAME)
+    if conn is None:
+        conn = sqlite3.connect(DB_NAME, timeout=DB_BUSY_TIMEOUT_MS / 1000,
+                               factory=instrumentation.connection_factory())
+        instrumentation.install(conn) # No-op unless SQL tracing is on
+        _configure_connection(conn)
+        connections[DB_NAME] = conn
+        with _all_connections_lock:
+            _all_connections.append(conn)
+    return conn
+
+def close_connection():
+    """Closes the calling thread's connections (e.g. when a worker thread finishes)."""
+    connections = getattr(_local, "connections", None)
+    if not connections:
+        return
+    for conn in connections.values():
+        with _all_connections_lock:
+            if conn in _all_connections:
+                _all_connections.remove(conn)
+        conn.close()
+    connections.clear()
+
+def close_all_connections():
+    """Closes every connection opened by the manager, from any thread. Call on shutdown."""
+    with _all_connections_lock:
+        connections = list(_all_connections)
+        _all_connections.clear()
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.ProgrammingError:
+            pass # Connection belongs to another (still running) thread
+    if getattr(_local, "connections", None):
+        _local.connections.clear()
+
+def _snapshot_active():
+    snapshot = getattr(_local, "snapshot", None)
+    return snapshot is not None and snapshot[0] == DB_NAME
+
+def _database_size():
+    """Bytes of DB_NAME plus its write-ahead log, i.e. roughly what a snapshot has to copy."""
+    size = 0
+    for path in (DB_NAME, DB_NAME + "-wal"):
+        try:
+            size += os.path.getsize(path)
+        except OSError:
+            pass
+    return size
+
+@contextmanager
+def read_snapshot():
+    """Points the calling thread's get_connection() at a read-only, point-in-time copy of the
+    database for the duration of the block.
+
+    Long reports then hold no read transaction on the live file: the copy is taken with the
+    online backup API in one short step, after which writers and WAL checkpoints proceed as if
+    nobody were reading, and the report never sees a write committed halfway through. The copy
+    lives in memory, or in a temporary file for databases over SNAPSHOT_MEMORY_MAX_BYTES.
+    Nested use reuses the outer snapshot; writes inside the block raise sqlite3.OperationalError.
+    """
+    if _snapshot_active():
+        yield get_connection()
+        return
+    source = get_connection()
+    path = None
+    if _database_size() > SNAPSHOT_MEMORY_MAX_BYTES:
+        fd, path = tempfile.mkstemp(suffix=".snapshot.db")
+        os.close(fd)
+    snapshot = sqlite3.connect(path or ":memory:", factory=instrumentation.connection_factory())
+    try:
+        instrumentation.install(snapshot)
+        if path:
+            snapshot.execute("PRAGMA synchronous = OFF") # A throwaway copy needs no fsyncs
+        source.backup(snapshot)
+        snapshot.execute("PRAGMA query_only = ON")
+        _local.snapshot = (DB_NAME, snapshot)
+        try:
+            yield snapshot
+        finally:
+            _local.snapshot = None
+    finally:
+        snapshot.close()
+        if path:
+            os.unlink(path)
+
+@contextmanager
+def transaction(immediate=True):
+    """Runs the block as one write transaction on the thread's connection.
+
+    Nested use joins the outer transaction, so helpers can be composed freely. A block that raises
+    is rolled back, so the thread's shared connection is never left holding the write lock.
+    immediate=False starts a deferred transaction instead: a read-only block then gets one
+    consistent snapshot without taking the write lock, so writers are not held up.
+    """
+    conn = get_connection()
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN") # IMMEDIATE: take the write lock up front so reads inside see a stable snapshot
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+
+# DB_NAME -> whether employees_fts exists; set by init_db, else looked up on first use
+_search_index = {}
+
+def _has_search_index(conn):
+    indexed = _search_index.get(DB_NAME)
+    if indexed is None:
+        indexed = _search_index[DB_NAME] = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'employees_fts'").fetchone() is not None
+    return indexed
+
+# Insert and update triggers of employees_fts (the delete trigger is in init_db). Kept here because
+# add_employees_batch drops and recreates them around bulk loads.
+EMPLOYEES_FTS_INSERT_TRIGGER = '''
+    CREATE TRIGGER IF NOT EXISTS employees_fts_insert AFTER INSERT ON employees BEGIN
+        INSERT INTO employees_fts (rowid, national_id, first_name, last_name)
+        VALUES (new.rowid, new.national_id, new.first_name, new.last_name);
+    END
+'''
+EMPLOYEES_FTS_UPDATE_TRIGGER = '''
+    CREATE TRIGGER IF NOT EXISTS employees_fts_update AFTER UPDATE OF national_id, first_name, last_name ON employees BEGIN
+        INSERT INTO employees_fts (employees_fts, rowid, national_id, first_name, last_name)
+        VALUES ('delete', old.rowid, old.national_id, old.first_name, old.last_name);
+        INSERT INTO employees_fts (rowid, national_id, first_name, last_name)
+        VALUES (new.rowid, new.national_id, new.first_name, new.last_name);
+    END
+'''
+
+# Raw attendance tables rolled up into monthly_attendance: (table, date column, hours column, rollup column)
+MONTHLY_ATTENDANCE_SOURCES = (
+    ("absences", "absence_date", "hours_absent", "absence_hours"),
+    ("overtimes", "overtime_date", "hours_worked", "overtime_hours"),
+)
+
+def _monthly_attendance_triggers(table, date_column, hours_column, rollup_column):
+    """Triggers that add/subtract each absences or overtimes row to/from its monthly_attendance row."""
+    add_new = f'''
+            INSERT INTO monthly_attendance (employee_national_id, year_month, {rollup_column})
+            VALUES (new.employee_national_id, substr(new.{date_column}, 1, 7), new.{hours_column})
+            ON CONFLICT(employee_national_id, year_month) DO UPDATE SET {rollup_column} = {rollup_column} + excluded.{rollup_column};'''
+    subtract_old = f'''
+            UPDATE monthly_attendance SET {rollup_column} = {rollup_column} - old.{hours_column}
+            WHERE employee_national_id = old.employee_national_id AND year_month = substr(old.{date_column}, 1, 7);'''
+    return (
+        f"CREATE TRIGGER IF NOT EXISTS {table}_rollup_insert AFTER INSERT ON {table} BEGIN{add_new}\n        END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_rollup_delete AFTER DELETE ON {table} BEGIN{subtract_old}\n        END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_rollup_update AFTER UPDATE OF employee_national_id, {date_column}, {hours_column} "
+        f"ON {table} BEGIN{subtract_old}{add_new}\n        END",
+    )
+
+# Tables with a change counter in table_versions, bumped by triggers on every row written. These
+# are the tables the reports read; report_cache.py keys cached reports on their tokens.
+VERSIONED_TABLES = ("employees", "payroll", "loans")
+
+def _create_monthly_attendance_triggers(conn):
+    for source in MONTHLY_ATTENDANCE_SOURCES:
+        for trigger_sql in _monthly_attendance_triggers(*source):
+            conn.execute(trigger_sql)
 
 def init_db():
     """Initializes the SQLite database and creates tables if they don't exist."""
-    conn = sqlite3.connect(DB_NAME)
+    conn = get_connection()
     cursor = conn.cursor()
 
     # Create employees table
@@ -33,7 +236,7 @@ def init_db():
             deductions REAL DEFAULT 0,
             loan_deduction REAL DEFAULT 0, -- NEW: Loan deduction for this payroll
             net_payment REAL NOT NULL, -- Final amount paid to employee
-            payslip_details TEXT, -- JSON/Text field for detailed breakdown
+            payslip_details TEXT, -- Compact JSON breakdown, rendered by payslips.py (text in old rows)
             recorded_date TEXT NOT NULL, -- Date this payroll was recorded
             FOREIGN KEY (employee_national_id) REFERENCES employees(national_id) ON DELETE CASCADE,
             UNIQUE(employee_national_id, payroll_month) -- Ensure only one payroll per month per employee
@@ -93,198 +296,845 @@ def init_db():
         )
     ''')
 
+    # Progress of time-clock file imports (attendance_import.py), one row per source file
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS import_checkpoints (
+            source TEXT PRIMARY KEY, -- Fingerprint of the imported file
+            kind TEXT NOT NULL, -- absences / overtimes
+            rows_done INTEGER NOT NULL, -- Source rows (valid or not) covered by committed chunks
+            completed INTEGER DEFAULT 0,
+            updated_at TEXT NOT NULL
+        )
+    ''')
+
+    # Watermarks of the incremental payslip export (reports.export_new_payslips), one row per target file
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS export_watermarks (
+            target TEXT PRIMARY KEY, -- Absolute path of the CSV/JSONL file
+            last_payroll_id INTEGER NOT NULL, -- Highest payroll.id already in the file
+            target_bytes INTEGER NOT NULL, -- File size after that row; anything beyond it is an interrupted append
+            rows_exported INTEGER NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    ''')
+
+    # Indexes for the per-employee lookups. CREATE INDEX IF NOT EXISTS also migrates
+    # databases created by older versions the first time they are opened.
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_absences_employee_date ON absences (employee_national_id, absence_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_overtimes_employee_date ON overtimes (employee_national_id, overtime_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_leaves_employee_date ON leaves (employee_national_id, leave_start_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_loans_employee_date ON loans (employee_national_id, loan_date)")
+    # Sort indexes for the paginated employee list; national_id breaks ties so keyset paging is exact
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_employees_first_name ON employees (first_name, national_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_employees_last_name ON employees (last_name, national_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_employees_position ON employees (IFNULL(position, ''), national_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_employees_base_salary ON employees (base_salary, national_id)")
+    # Date-only indexes for the whole-company month aggregation (batch payroll)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_absences_date ON absences (absence_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_overtimes_date ON overtimes (overtime_date)")
+
+    # Absence and overtime hours per employee per month, kept current by triggers on the raw
+    # tables so payroll reads one row instead of summing the month's records
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'monthly_attendance'")
+    rollup_exists = cursor.fetchone() is not None
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS monthly_attendance (
+            employee_national_id TEXT NOT NULL,
+            year_month TEXT NOT NULL, -- YYYY-MM
+            absence_hours REAL NOT NULL DEFAULT 0,
+            overtime_hours REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (employee_national_id, year_month),
+            FOREIGN KEY (employee_national_id) REFERENCES employees(national_id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_monthly_attendance_month ON monthly_attendance (year_month)")
+    _create_monthly_attendance_triggers(conn)
+    if not rollup_exists:
+        rebuild_monthly_attendance() # Roll up the attendance of a database created before the table
+
+    # Change counters of VERSIONED_TABLES. token is a fresh random number on every change, so two
+    # copies of the database that diverged (e.g. a restored backup) never share a token even if
+    # their counters happen to match.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,
+            changes INTEGER NOT NULL DEFAULT 0, -- Rows inserted, updated or deleted
+            token INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    for table in VERSIONED_TABLES:
+        cursor.execute("INSERT OR IGNORE INTO table_versions (table_name, token) VALUES (?, random())", (table,))
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} AFTER {event} ON {table} BEGIN
+                    UPDATE table_versions SET changes = changes + 1, token = random() WHERE table_name = '{table}';
+                END
+            ''')
+
+    # Full-text search over employee names and ids. The trigram tokenizer matches any substring
+    # of 3+ characters, which suits Persian names better than word tokenization. SQLite builds
+    # without FTS5 (or older than 3.34, which added trigram) get no index and search with LIKE.
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'employees_fts'")
+    fts_exists = cursor.fetchone() is not None
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS employees_fts USING fts5(
+                national_id, first_name, last_name,
+                content='employees', content_rowid='rowid', tokenize='trigram'
+            )
+        ''')
+    except sqlite3.OperationalError:
+        _search_index[DB_NAME] = False
+    else:
+        _search_index[DB_NAME] = True
+        # Triggers keep the index in sync with every write to employees
+        cursor.execute(EMPLOYEES_FTS_INSERT_TRIGGER)
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS employees_fts_delete AFTER DELETE ON employees BEGIN
+                INSERT INTO employees_fts (employees_fts, rowid, national_id, first_name, last_name)
+                VALUES ('delete', old.rowid, old.national_id, old.first_name, old.last_name);
+            END
+        ''')
+        cursor.execute(EMPLOYEES_FTS_UPDATE_TRIGGER)
+        if not fts_exists:
+            rebuild_employee_search_index() # Index the employees of a database created before the FTS table
+
     conn.commit()
-    conn.close()
+
+    # Data migrations, run once per database and tracked in PRAGMA user_version
+    cursor.execute("PRAGMA user_version")
+    if cursor.fetchone()[0] < SCHEMA_VERSION:
+        with transaction():
+            _migrate_payslip_details(conn)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    cursor.execute("PRAGMA optimize") # Refresh planner statistics for the new indexes
+
+def _migrate_payslip_details(conn):
+    """Converts payslip texts to the compact JSON record (schema version 1).
+
+    Payslips whose text doesn't round-trip exactly are left as text; they are still displayed.
+    The space freed is reused by new rows, and compact_database() returns it to the disk.
+    """
+    read_cursor = conn.cursor()
+    read_cursor.execute('''
+        SELECT id, payroll_month, base_salary_at_time, overtime_hours, absence_hours, benefits,
+               deductions, loan_deduction, net_payment, payslip_details
+        FROM payroll WHERE payslip_details NOT LIKE '{%'
+    ''')
+    write_cursor = conn.cursor()
+    while True:
+        rows = read_cursor.fetchmany(1000)
+        if not rows:
+            break
+        updates = []
+        for payroll_id, *columns in rows:
+            record = convert_legacy_payslip_details(*columns)
+            if record is not None:
+                updates.append((record, payroll_id))
+        write_cursor.executemany("UPDATE payroll SET payslip_details = ? WHERE id = ?", updates)
+
+def get_table_versions(tables=VERSIONED_TABLES):
+    """Returns {table: (changes, token)} for the given VERSIONED_TABLES; the token changes with
+    every committed write to the table, from any connection or process."""
+    conn = get_connection()
+    placeholders = ", ".join("?" * len(tables))
+    rows = conn.execute(f"SELECT table_name, changes, token FROM table_versions WHERE table_name IN ({placeholders})", tuple(tables))
+    return {table_name: (changes, token) for table_name, changes, token in rows}
+
+def compact_database():
+    """Runs VACUUM to give free pages (e.g. after the payslip migration) back to the file system,
+    then rebuilds the search index, whose rowids VACUUM may have changed. Needs no open transaction."""
+    conn = get_connection()
+    conn.execute("VACUUM")
+    with transaction():
+        rebuild_employee_search_index()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)") # In WAL mode the shrunk pages only reach the file here
+
+def month_date_range(year_month):
+    """Returns the [first day, first day of next month) bounds of a YYYY-MM as date strings.
+
+    Comparing the date column against these bounds (instead of STRFTIME on the column)
+    lets SQLite use the (employee_national_id, date) indexes.
+    """
+    year, month = (int(part) for part in year_month.split("-"))
+    next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return f"{year:04d}-{month:02d}-01", f"{next_year:04d}-{next_month:02d}-01"
+
+# --- Employee record cache ---
+# Bounded LRU of single-employee rows, keyed by (database, national_id). Every function that
+# writes to employees invalidates it after committing. The generation counter stops a read
+# that raced with a write from putting the stale row back. Writes made through other connections
+# (other threads, payroll_cli, the API, another GUI) are caught by _validate_employee_cache.
+_employee_cache = OrderedDict()
+_employee_cache_lock = threading.Lock()
+_employee_cache_generation = 0
+_employee_cache_tokens = {} # DB_NAME -> employees token of table_versions the cached rows were read under
+_employee_cache_stats = {"hits": 0, "misses": 0}
+
+def _invalidate_employee_cache(national_id=None):
+    """Drops one employee (or, with no national_id, every employee) from the cache."""
+    global _employee_cache_generation
+    with _employee_cache_lock:
+        _employee_cache_generation += 1
+        if national_id is None:
+            _employee_cache.clear()
+        else:
+            _employee_cache.pop((DB_NAME, national_id), None)
+
+def _validate_employee_cache(conn):
+    """Empties the cache if employees was written through any other connection since this thread
+    last looked. PRAGMA data_version only moves when another connection committed, so the usual
+    cost is one pragma; only then is the employees token compared."""
+    global _employee_cache_generation
+    data_versions = getattr(_local, "data_versions", None)
+    if data_versions is None:
+        data_versions = _local.data_versions = {}
+    data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+    seen = data_versions.get(DB_NAME)
+    if seen is not None and seen[0] is conn and seen[1] == data_version:
+        return
+    data_versions[DB_NAME] = (conn, data_version) # Versions are only comparable on the same connection
+    row = conn.execute("SELECT token FROM table_versions WHERE table_name = 'employees'").fetchone()
+    token = row[0] if row else None
+    with _employee_cache_lock:
+        if _employee_cache_tokens.get(DB_NAME) != token:
+            _employee_cache_tokens[DB_NAME] = token
+            _employee_cache_generation += 1
+            for key in [key for key in _employee_cache if key[0] == DB_NAME]:
+                del _employee_cache[key]
+
+def clear_employee_cache():
+    """Empties the employee cache and resets its counters."""
+    _invalidate_employee_cache()
+    with _employee_cache_lock:
+        _employee_cache_stats["hits"] = _employee_cache_stats["misses"] = 0
+
+def get_employee_cache_stats():
+    """Returns hits, misses, current size and maximum size of the employee cache."""
+    with _employee_cache_lock:
+        return dict(_employee_cache_stats, size=len(_employee_cache), maxsize=EMPLOYEE_CACHE_SIZE)
 
 def get_employee_data(national_id=None):
-    """Fetches employee(s) data from the database."""
-    conn = sqlite3.connect(DB_NAME)
+    """Fetches employee(s) data from the database. Single-employee lookups go through the cache."""
+    cacheable = national_id and not _snapshot_active() # The cache holds current rows, not a snapshot's
+    conn = get_connection()
+    if cacheable:
+        _validate_employee_cache(conn)
+        key = (DB_NAME, national_id)
+        with _employee_cache_lock:
+            emp_data = _employee_cache.get(key)
+            if emp_data is not None:
+                _employee_cache.move_to_end(key)
+                _employee_cache_stats["hits"] += 1
+                return emp_data
+            _employee_cache_stats["misses"] += 1
+            generation = _employee_cache_generation
+
     cursor = conn.cursor()
     if national_id:
         cursor.execute("SELECT national_id, first_name, last_name, position, base_salary FROM employees WHERE national_id = ?", (national_id,))
         emp_data = cursor.fetchone()
+        if emp_data is not None and cacheable and EMPLOYEE_CACHE_SIZE > 0:
+            with _employee_cache_lock:
+                if generation == _employee_cache_generation: # No write happened while we were reading
+                    _employee_cache[key] = emp_data
+                    if len(_employee_cache) > EMPLOYEE_CACHE_SIZE:
+                        _employee_cache.popitem(last=False)
     else:
         cursor.execute("SELECT national_id, first_name, last_name, position, base_salary FROM employees")
         emp_data = cursor.fetchall()
-    conn.close()
     return emp_data
 
+# Sort keys of the employee list; each one matches an index created in init_db
+EMPLOYEE_SORT_KEYS = {
+    "national_id": "national_id",
+    "first_name": "first_name",
+    "last_name": "last_name",
+    "position": "IFNULL(position, '')",
+    "base_salary": "base_salary",
+}
+
+def count_employees():
+    conn = get_connection()
+    return conn.execute("SELECT COUNT(*) FROM employees").fetchone()[0]
+
+def employee_page_cursor(row, sort_column):
+    """Keyset cursor of an employee row for get_employees_page: the page after it, or, with the
+    sort direction flipped, the rows before it (nearest first)."""
+    sort_value = row[list(EMPLOYEE_SORT_KEYS).index(sort_column)]
+    if sort_column == "position" and sort_value is None:
+        sort_value = ""
+    return sort_value, row[0]
+
+def get_employees_page(sort_column="national_id", descending=False, after=None, limit=200, offset=0):
+    """Fetches one page of employees using keyset pagination on an indexed sort key.
+
+    after is the cursor returned with the previous page (None for the first page).
+    offset skips that many rows first; it costs a scan of the skipped rows, so it is only meant
+    for jumping to a position (the employee list's scrollbar), not for paging.
+    Returns (rows, next_after); next_after is None when there are no more rows.
+    """
+    sort_key = EMPLOYEE_SORT_KEYS[sort_column]
+    direction, comparison = ("DESC", "<") if descending else ("ASC", ">")
+    sql = "SELECT national_id, first_name, last_name, position, base_salary FROM employees"
+    params = ()
+    if sort_column == "national_id":
+        if after is not None:
+            sql += f" WHERE national_id {comparison} ?"
+            params = (after[1],)
+        sql += f" ORDER BY national_id {direction}"
+    else:
+        if after is not None:
+            # Spelled out rather than as a row value so SQLite can seek the expression index too
+            sql += f" WHERE {sort_key} {comparison}= ? AND ({sort_key} {comparison} ? OR national_id {comparison} ?)"
+            params = (after[0], after[0], after[1])
+        sql += f" ORDER BY {sort_key} {direction}, national_id {direction}"
+    sql += " LIMIT ? OFFSET ?"
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(sql, params + (limit, offset))
+    rows = cursor.fetchall()
+    if len(rows) < limit:
+        return rows, None
+    return rows, employee_page_cursor(rows[-1], sort_column)
+
 def add_employee_to_db(national_id, first_name, last_name, position, base_salary):
     """Adds a new employee to the database."""
-    conn = sqlite3.connect(DB_NAME)
+    conn = get_connection()
     cursor = conn.cursor()
     try:
         cursor.execute("INSERT INTO employees (national_id, first_name, last_name, position, base_salary) VALUES (?, ?, ?, ?, ?)",
                        (national_id, first_name, last_name, position, base_salary))
         conn.commit()
+        _invalidate_employee_cache(national_id)
         return True
     except sqlite3.IntegrityError:
+        conn.rollback() # Don't leave the shared connection inside a failed transaction
         return False # national_id already exists
-    finally:
-        conn.close()
+
+def get_existing_employee_ids(national_ids):
+    """Returns the subset of national_ids that already exist, looked up 900 at a time
+    (older SQLite builds allow at most 999 parameters per statement)."""
+    national_ids = list(national_ids)
+    conn = get_connection()
+    cursor = conn.cursor()
+    existing = set()
+    for i in range(0, len(national_ids), 900):
+        batch = national_ids[i:i + 900]
+        placeholders = ", ".join("?" * len(batch))
+        cursor.execute(f"SELECT national_id FROM employees WHERE national_id IN ({placeholders})", batch)
+        existing.update(row[0] for row in cursor.fetchall())
+    return existing
+
+def add_employees_batch(employee_rows, update_existing=False):
+    """Inserts many (national_id, first_name, last_name, position, base_salary) rows in one transaction.
+
+    Existing national_ids are left alone, or overwritten when update_existing is set. Either way
+    this is an upsert rather than INSERT OR REPLACE: REPLACE deletes the old row without firing
+    the employees_fts delete trigger. Returns the number of rows inserted or updated.
+    """
+    with transaction() as conn:
+        cursor = conn.cursor()
+        indexed = _has_search_index(conn)
+        # FTS5 flushes its pending terms at every statement savepoint, so with the sync triggers
+        # firing once per row a bulk load spends most of its time writing tiny index segments.
+        # The triggers are dropped inside this transaction instead (other connections never see
+        # them missing) and the index is updated with one INSERT ... SELECT.
+        if indexed:
+            cursor.execute("DROP TRIGGER IF EXISTS employees_fts_insert")
+            cursor.execute("DROP TRIGGER IF EXISTS employees_fts_update")
+        cursor.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS import_employees (
+                national_id TEXT PRIMARY KEY, first_name TEXT, last_name TEXT, position TEXT, base_salary REAL
+            )
+        ''')
+        cursor.execute("DELETE FROM temp.import_employees")
+        cursor.executemany("INSERT OR IGNORE INTO temp.import_employees VALUES (?, ?, ?, ?, ?)", employee_rows)
+        cursor.execute("SELECT IFNULL(MAX(rowid), 0) FROM employees")
+        max_rowid = cursor.fetchone()[0]
+
+        if update_existing:
+            if indexed:
+                cursor.execute('''
+                    INSERT INTO employees_fts (employees_fts, rowid, national_id, first_name, last_name)
+                    SELECT 'delete', e.rowid, e.national_id, e.first_name, e.last_name
+                    FROM employees e JOIN temp.import_employees i ON i.national_id = e.national_id
+                ''')
+            cursor.execute('''
+                INSERT INTO employees (national_id, first_name, last_name, position, base_salary)
+                SELECT * FROM temp.import_employees WHERE true
+                ON CONFLICT(national_id) DO UPDATE SET first_name = excluded.first_name, last_name = excluded.last_name,
+                    position = excluded.position, base_salary = excluded.base_salary
+            ''') # "WHERE true" keeps the parser from reading ON CONFLICT as a join constraint
+            changed = cursor.rowcount
+            if indexed:
+                cursor.execute('''
+                    INSERT INTO employees_fts (rowid, national_id, first_name, last_name)
+                    SELECT e.rowid, e.national_id, e.first_name, e.last_name
+                    FROM employees e JOIN temp.import_employees i ON i.national_id = e.national_id
+                ''')
+        else:
+            cursor.execute('''
+                INSERT INTO employees (national_id, first_name, last_name, position, base_salary)
+                SELECT * FROM temp.import_employees WHERE true
+                ON CONFLICT(national_id) DO NOTHING
+            ''')
+            changed = cursor.rowcount
+            if indexed:
+                # employees has no INTEGER PRIMARY KEY, so new rows get rowids above the old maximum
+                cursor.execute('''
+                    INSERT INTO employees_fts (rowid, national_id, first_name, last_name)
+                    SELECT rowid, national_id, first_name, last_name FROM employees WHERE rowid > ?
+                ''', (max_rowid,))
+
+        cursor.execute("DELETE FROM temp.import_employees")
+        if indexed:
+            cursor.execute(EMPLOYEES_FTS_INSERT_TRIGGER)
+            cursor.execute(EMPLOYEES_FTS_UPDATE_TRIGGER)
+    _invalidate_employee_cache()
+    return changed
+
+def rebuild_employee_search_index():
+    """Rebuilds employees_fts from the employees table.
+
+    Needed after VACUUM too: employees has no INTEGER PRIMARY KEY, so VACUUM may renumber
+    the rowids the index points at. Does nothing where init_db could not create the index.
+    """
+    conn = get_connection()
+    if _has_search_index(conn):
+        conn.execute("INSERT INTO employees_fts (employees_fts) VALUES ('rebuild')")
+
+def search_employees(search_query, limit=SEARCH_RESULT_LIMIT):
+    """Searches employees by (partial) national_id, first_name or last_name, at most `limit` rows
+    of (national_id, first_name, last_name, position, base_salary)."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    if len(search_query) >= 3:
+        if not _has_search_index(conn):
+            # No trigram index in this SQLite build: the same substring match as a full scan
+            pattern = "%" + search_query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            cursor.execute(r"""
+                SELECT national_id, first_name, last_name, position, base_salary FROM employees
+                WHERE national_id LIKE ? ESCAPE '\' OR first_name LIKE ? ESCAPE '\' OR last_name LIKE ? ESCAPE '\'
+                LIMIT ?
+            """, (pattern, pattern, pattern, limit))
+            return cursor.fetchall()
+        # Substring match through the trigram index; the query is quoted as one FTS5 phrase
+        phrase = '"' + search_query.replace('"', '""') + '"'
+        cursor.execute("""
+            SELECT e.national_id, e.first_name, e.last_name, e.position, e.base_salary
+            FROM employees_fts f JOIN employees e ON e.rowid = f.rowid
+            WHERE employees_fts MATCH ? LIMIT ?
+        """, (phrase, limit))
+        results = cursor.fetchall()
+        return results
+
+    # Trigrams need 3 characters; shorter input is matched as a prefix using the column indexes.
+    # One LIMITed range query per column, so a very common prefix stops after `limit` rows.
+    upper_bound = search_query + "\U0010FFFF"
+    results = []
+    seen = set()
+    for column in ("national_id", "first_name", "last_name"):
+        cursor.execute(f"SELECT national_id, first_name, last_name, position, base_salary FROM employees WHERE {column} >= ? AND {column} < ? LIMIT ?",
+                       (search_query, upper_bound, limit))
+        for row in cursor.fetchall():
+            if row[0] not in seen:
+                seen.add(row[0])
+                results.append(row)
+        if len(results) >= limit:
+            break
+    return results[:limit]
 
 def update_employee_in_db(national_id, first_name, last_name, position, base_salary):
     """Updates an existing employee's data."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("UPDATE employees SET first_name=?, last_name=?, position=?, base_salary=? WHERE national_id=?",
-                   (first_name, last_name, position, base_salary, national_id))
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.execute("UPDATE employees SET first_name=?, last_name=?, position=?, base_salary=? WHERE national_id=?",
+                     (first_name, last_name, position, base_salary, national_id))
+    _invalidate_employee_cache(national_id)
 
 def delete_employee_from_db(national_id):
     """Deletes an employee and their related records from the database."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    # Due to ON DELETE CASCADE, deleting from employees will automatically delete from all related tables
-    cursor.execute("DELETE FROM employees WHERE national_id = ?", (national_id,))
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        # Due to ON DELETE CASCADE, deleting from employees will automatically delete from all related tables
+        conn.execute("DELETE FROM employees WHERE national_id = ?", (national_id,))
+    _invalidate_employee_cache(national_id)
+
+def record_payroll_and_loans(payroll_rows, loan_updates):
+    """Unit of work for recording payroll: inserts payslips and applies their loan installments
+    in one transaction, so there is a single commit however many loans are involved.
+
+    payroll_rows: tuples of (employee_national_id, payroll_month, base_salary_at_time, overtime_hours,
+    absence_hours, benefits, deductions, loan_deduction, net_payment, payslip_details).
+    loan_updates: (loan_id, new_remaining_amount) pairs; a loan is closed when it reaches 0.
+    Payslips are inserted first: if any of them already exists for its month nothing is written
+    (in particular no loan is decremented) and False is returned. Inside an outer transaction()
+    only this unit is undone, through a savepoint.
+    """
+    recorded_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SAVEPOINT record_payroll")
+        try:
+            cursor.executemany('''
+                INSERT INTO payroll (employee_national_id, payroll_month, base_salary_at_time,
+                                     overtime_hours, absence_hours, benefits, deductions,
+                                     loan_deduction, net_payment, payslip_details, recorded_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (row + (recorded_date,) for row in payroll_rows))
+        except sqlite3.IntegrityError as error:
+            cursor.execute("ROLLBACK TO record_payroll")
+            cursor.execute("RELEASE record_payroll")
+            # UNIQUE(employee_national_id, payroll_month): this month is already recorded. Anything
+            # else, e.g. the foreign key of an employee deleted meanwhile, is a real error.
+            if "UNIQUE constraint failed: payroll.employee_national_id, payroll.payroll_month" in str(error):
+                return False
+            raise
+        cursor.executemany("UPDATE loans SET remaining_amount = ?, is_active = ? WHERE id = ?",
+                           ((new_remaining, 1 if new_remaining > 0 else 0, loan_id) for loan_id, new_remaining in loan_updates))
+        cursor.execute("RELEASE record_payroll")
+    return True
 
 def record_monthly_payroll_to_db(employee_national_id, payroll_month, base_salary_at_time,
                                   overtime_hours, absence_hours, benefits, deductions,
                                   loan_deduction, net_payment, payslip_details):
-    """Records a complete monthly payroll (payslip) for an employee."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    recorded_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    try:
-        cursor.execute('''
-            INSERT INTO payroll (employee_national_id, payroll_month, base_salary_at_time, 
-                                 overtime_hours, absence_hours, benefits, deductions, 
-                                 loan_deduction, net_payment, payslip_details, recorded_date)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (employee_national_id, payroll_month, base_salary_at_time,
-              overtime_hours, absence_hours, benefits, deductions,
-              loan_deduction, net_payment, payslip_details, recorded_date))
-        conn.commit()
-        return True
-    except sqlite3.IntegrityError:
-        # This indicates a unique constraint violation (payroll already exists for this month)
-        return False
-    finally:
-        conn.close()
+    """Records a complete monthly payroll (payslip) for an employee. Returns False if one
+    already exists for that month."""
+    return record_payroll_and_loans([(employee_national_id, payroll_month, base_salary_at_time,
+                                      overtime_hours, absence_hours, benefits, deductions,
+                                      loan_deduction, net_payment, payslip_details)], [])
 
 def get_payroll_history(employee_national_id):
-    """Fetches full payroll history (payslips) for a specific employee."""
-    conn = sqlite3.connect(DB_NAME)
+    """Fetches full payroll history (payslips) for a specific employee. payslip_details is the stored
+    record; render it with payslips.render_payslip_details or use get_payslip_details."""
+    conn = get_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT payroll_month, base_salary_at_time, overtime_hours, absence_hours, benefits, deductions, loan_deduction, net_payment, payslip_details, recorded_date FROM payroll WHERE employee_national_id = ? ORDER BY payroll_month DESC",
                    (employee_national_id,))
     history = cursor.fetchall()
-    conn.close()
     return history
 
+def get_payslip_details(employee_national_id, payroll_month):
+    """Returns the payslip text for one employee and month (None if not recorded), rendered from
+    the stored record."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT payroll_month, base_salary_at_time, overtime_hours, absence_hours, benefits,
+               deductions, loan_deduction, net_payment, payslip_details
+        FROM payroll WHERE employee_national_id = ? AND payroll_month = ?
+    ''', (employee_national_id, payroll_month))
+    row = cursor.fetchone()
+    return render_payslip_details(*row) if row else None
+
 def get_absences_in_month(employee_national_id, year_month):
-    """Calculates total absence hours for an employee in a given YYYY-MM."""
-    conn = sqlite3.connect(DB_NAME)
+    """Total absence hours for an employee in a given YYYY-MM (one monthly_attendance read)."""
+    conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute("SELECT SUM(hours_absent) FROM absences WHERE employee_national_id = ? AND STRFTIME('%Y-%m', absence_date) = ?",
+    cursor.execute("SELECT absence_hours FROM monthly_attendance WHERE employee_national_id = ? AND year_month = ?",
                    (employee_national_id, year_month))
-    total_hours = cursor.fetchone()[0]
-    conn.close()
-    return total_hours if total_hours is not None else 0
+    row = cursor.fetchone()
+    return row[0] if row is not None else 0
 
 def get_overtimes_in_month(employee_national_id, year_month):
-    """Calculates total overtime hours for an employee in a given YYYY-MM."""
-    conn = sqlite3.connect(DB_NAME)
+    """Total overtime hours for an employee in a given YYYY-MM (one monthly_attendance read)."""
+    conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute("SELECT SUM(hours_worked) FROM overtimes WHERE employee_national_id = ? AND STRFTIME('%Y-%m', overtime_date) = ?",
+    cursor.execute("SELECT overtime_hours FROM monthly_attendance WHERE employee_national_id = ? AND year_month = ?",
                    (employee_national_id, year_month))
-    total_hours = cursor.fetchone()[0]
-    conn.close()
-    return total_hours if total_hours is not None else 0
+    row = cursor.fetchone()
+    return row[0] if row is not None else 0
 
 def add_loan_to_db(employee_national_id, loan_date, amount, installment_amount, description=""):
     """Adds a new loan record for an employee."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO loans (employee_national_id, loan_date, amount, remaining_amount, installment_amount, description) VALUES (?, ?, ?, ?, ?, ?)",
-                   (employee_national_id, loan_date, amount, amount, installment_amount, description))
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.execute("INSERT INTO loans (employee_national_id, loan_date, amount, remaining_amount, installment_amount, description) VALUES (?, ?, ?, ?, ?, ?)",
+                     (employee_national_id, loan_date, amount, amount, installment_amount, description))
 
 def get_active_loans(employee_national_id):
     """Fetches active loans for a specific employee."""
-    conn = sqlite3.connect(DB_NAME)
+    conn = get_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT id, loan_date, amount, remaining_amount, installment_amount, description FROM loans WHERE employee_national_id = ? AND is_active = 1 ORDER BY loan_date ASC",
                    (employee_national_id,))
     loans = cursor.fetchall()
-    conn.close()
     return loans
 
 def update_loan_remaining_amount(loan_id, new_remaining_amount):
     """Updates the remaining amount of a loan. If remaining_amount <= 0, marks as inactive."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
     is_active = 1 if new_remaining_amount > 0 else 0
-    cursor.execute("UPDATE loans SET remaining_amount = ?, is_active = ? WHERE id = ?",
-                   (new_remaining_amount, is_active, loan_id))
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.execute("UPDATE loans SET remaining_amount = ?, is_active = ? WHERE id = ?",
+                     (new_remaining_amount, is_active, loan_id))
 
 def get_loan_by_id(loan_id):
-    conn = sqlite3.connect(DB_NAME)
+    conn = get_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT id, employee_national_id, loan_date, amount, remaining_amount, installment_amount, description, is_active FROM loans WHERE id = ?", (loan_id,))
     loan = cursor.fetchone()
-    conn.close()
     return loan
 
 def add_absence_to_db(employee_national_id, absence_date, hours_absent, reason=""):
     """Adds an absence record for an employee."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO absences (employee_national_id, absence_date, hours_absent, reason) VALUES (?, ?, ?, ?)",
-                   (employee_national_id, absence_date, hours_absent, reason))
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.execute("INSERT INTO absences (employee_national_id, absence_date, hours_absent, reason) VALUES (?, ?, ?, ?)",
+                     (employee_national_id, absence_date, hours_absent, reason))
 
 def get_absences_history(employee_national_id):
     """Fetches absence history for a specific employee."""
-    conn = sqlite3.connect(DB_NAME)
+    conn = get_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT absence_date, hours_absent, reason FROM absences WHERE employee_national_id = ? ORDER BY absence_date DESC",
                    (employee_national_id,))
     history = cursor.fetchall()
-    conn.close()
     return history
 
 def add_overtime_to_db(employee_national_id, overtime_date, hours_worked, description=""):
     """Adds an overtime record for an employee."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO overtimes (employee_national_id, overtime_date, hours_worked, description) VALUES (?, ?, ?, ?)",
-                   (employee_national_id, overtime_date, hours_worked, description))
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.execute("INSERT INTO overtimes (employee_national_id, overtime_date, hours_worked, description) VALUES (?, ?, ?, ?)",
+                     (employee_national_id, overtime_date, hours_worked, description))
 
 def get_overtime_history(employee_national_id):
     """Fetches overtime history for a specific employee."""
-    conn = sqlite3.connect(DB_NAME)
+    conn = get_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT overtime_date, hours_worked, description FROM overtimes WHERE employee_national_id = ? ORDER BY overtime_date DESC",
                    (employee_national_id,))
     history = cursor.fetchall()
-    conn.close()
     return history
 
 def add_leave_to_db(employee_national_id, leave_start_date, leave_end_date, leave_type, duration_days, description=""):
     """Adds a leave record for an employee."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO leaves (employee_national_id, leave_start_date, leave_end_date, leave_type, duration_days, description) VALUES (?, ?, ?, ?, ?, ?)",
-                   (employee_national_id, leave_start_date, leave_end_date, leave_type, duration_days, description))
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.execute("INSERT INTO leaves (employee_national_id, leave_start_date, leave_end_date, leave_type, duration_days, description) VALUES (?, ?, ?, ?, ?, ?)",
+                     (employee_national_id, leave_start_date, leave_end_date, leave_type, duration_days, description))
 
 def get_leave_history(employee_national_id):
     """Fetches leave history for a specific employee."""
-    conn = sqlite3.connect(DB_NAME)
+    conn = get_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT leave_start_date, leave_end_date, leave_type, duration_days, description FROM leaves WHERE employee_national_id = ? ORDER BY leave_start_date DESC",
                    (employee_national_id,))
     history = cursor.fetchall()
-    conn.close()
-    return history
\ No newline at end of file
+    return history
+
+# Per-employee history for paged reads (api_server.py): kind -> (table, columns, date column).
+# Each table has an index on (employee_national_id, date column), which also serves the ORDER BY;
+# rowid breaks ties between rows of the same date.
+EMPLOYEE_HISTORY = {
+    "absences": ("absences", "absence_date, hours_absent, reason", "absence_date"),
+    "overtimes": ("overtimes", "overtime_date, hours_worked, description", "overtime_date"),
+    "leaves": ("leaves", "leave_start_date, leave_end_date, leave_type, duration_days, description", "leave_start_date"),
+    "loans": ("loans", "id, loan_date, amount, remaining_amount, installment_amount, description, is_active", "loan_date"),
+    "payroll": ("payroll", "payroll_month, base_salary_at_time, overtime_hours, absence_hours, benefits, deductions, "
+                          "loan_deduction, net_payment, payslip_details, recorded_date", "payroll_month"),
+}
+
+def get_employee_history_page(kind, employee_national_id, limit, offset=0):
+    """Returns (rows, total): one page of an employee's EMPLOYEE_HISTORY[kind] rows, newest first,
+    and how many there are in all. Loans include closed ones (is_active is the last column)."""
+    table, columns, date_column = EMPLOYEE_HISTORY[kind]
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT {columns} FROM {table} WHERE employee_national_id = ? ORDER BY {date_column} DESC, rowid DESC LIMIT ? OFFSET ?",
+                   (employee_national_id, limit, offset))
+    rows = cursor.fetchall()
+    cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE employee_national_id = ?", (employee_national_id,))
+    return rows, cursor.fetchone()[0]
+
+# --- Batch (whole company) payroll helpers ---
+
+def get_employees_without_payroll(payroll_month):
+    """Fetches (national_id, base_salary) of every employee with no payslip for payroll_month yet."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT e.national_id, e.base_salary FROM employees e
+        WHERE NOT EXISTS (SELECT 1 FROM payroll p WHERE p.employee_national_id = e.national_id AND p.payroll_month = ?)
+        ORDER BY e.national_id
+    """, (payroll_month,))
+    employees = cursor.fetchall()
+    return employees
+
+def get_absence_totals_for_month(year_month):
+    """Total absence hours per employee in a given YYYY-MM, as {national_id: hours}."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT employee_national_id, absence_hours FROM monthly_attendance WHERE year_month = ?", (year_month,))
+    totals = dict(cursor.fetchall())
+    return totals
+
+def get_overtime_totals_for_month(year_month):
+    """Total overtime hours per employee in a given YYYY-MM, as {national_id: hours}."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT employee_national_id, overtime_hours FROM monthly_attendance WHERE year_month = ?", (year_month,))
+    totals = dict(cursor.fetchall())
+    return totals
+
+# Per employee and month totals straight from the raw tables; the source of truth for monthly_attendance.
+# {employees} is the set of employees to cover.
+_MONTHLY_ATTENDANCE_FROM_RAW = '''
+    SELECT employee_national_id, year_month, SUM(absence_hours), SUM(overtime_hours)
+    FROM (
+        SELECT employee_national_id, substr(absence_date, 1, 7) AS year_month, hours_absent AS absence_hours, 0 AS overtime_hours
+        FROM absences
+        UNION ALL
+        SELECT employee_national_id, substr(overtime_date, 1, 7), 0, hours_worked
+        FROM overtimes
+    )
+    WHERE employee_national_id IN {employees}
+    GROUP BY employee_national_id, year_month
+'''
+_ALL_EMPLOYEES = "(SELECT national_id FROM employees)" # Also drops orphans from before foreign_keys was on
+
+def rebuild_monthly_attendance(national_ids=None):
+    """Recomputes monthly_attendance from the absences and overtimes tables, for all employees
+    or only for the given national ids."""
+    with transaction() as conn:
+        if national_ids is None:
+            conn.execute("DELETE FROM monthly_attendance")
+            employees = _ALL_EMPLOYEES
+        else:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS rollup_employees (national_id TEXT PRIMARY KEY) WITHOUT ROWID")
+            conn.execute("DELETE FROM temp.rollup_employees")
+            conn.executemany("INSERT OR IGNORE INTO temp.rollup_employees VALUES (?)", ((n,) for n in national_ids))
+            conn.execute("DELETE FROM monthly_attendance WHERE employee_national_id IN (SELECT national_id FROM temp.rollup_employees)")
+            employees = f"(SELECT national_id FROM temp.rollup_employees WHERE national_id IN {_ALL_EMPLOYEES})"
+        conn.execute("INSERT INTO monthly_attendance (employee_national_id, year_month, absence_hours, overtime_hours) "
+                     + _MONTHLY_ATTENDANCE_FROM_RAW.format(employees=employees))
+
+@contextmanager
+def bulk_attendance_load(national_ids=None):
+    """Runs the block with the monthly_attendance triggers dropped and rebuilds the table after it.
+
+    For loads that write most months of their employees (e.g. generated test data), where one
+    grouped rebuild is much cheaper than a trigger upsert per row. If national_ids is given only
+    those employees are rolled up again, so the block must not touch anyone else's attendance.
+    Everything, including the rebuild, is one transaction, so readers never see a stale rollup.
+    """
+    with transaction() as conn:
+        for table, *_ in MONTHLY_ATTENDANCE_SOURCES:
+            for event in ("insert", "update", "delete"):
+                conn.execute(f"DROP TRIGGER IF EXISTS {table}_rollup_{event}")
+        yield conn
+        _create_monthly_attendance_triggers(conn)
+        rebuild_monthly_attendance(national_ids)
+
+def check_monthly_attendance(tolerance=1e-6):
+    """Compares monthly_attendance with totals summed from the raw tables.
+
+    Returns a list of (national_id, year_month, stored_absence, actual_absence, stored_overtime,
+    actual_overtime) for every month that differs by more than tolerance; a missing row counts
+    as zero hours. The triggers add and subtract floats, so tiny rounding differences are expected.
+    """
+    conn = get_connection()
+    with transaction(immediate=False): # One snapshot for both reads, without blocking writers
+        stored = {(row[0], row[1]): row[2:] for row in conn.execute(
+            "SELECT employee_national_id, year_month, absence_hours, overtime_hours FROM monthly_attendance")}
+        actual = {(row[0], row[1]): row[2:] for row in conn.execute(_MONTHLY_ATTENDANCE_FROM_RAW.format(employees=_ALL_EMPLOYEES))}
+    mismatches = []
+    for key in sorted(stored.keys() | actual.keys()):
+        stored_absence, stored_overtime = stored.get(key, (0, 0))
+        actual_absence, actual_overtime = actual.get(key, (0, 0))
+        if abs(stored_absence - actual_absence) > tolerance or abs(stored_overtime - actual_overtime) > tolerance:
+            mismatches.append((*key, stored_absence, actual_absence, stored_overtime, actual_overtime))
+    return mismatches
+
+def get_active_loans_by_employee():
+    """Fetches all active loans in one query, grouped as {national_id: [rows like get_active_loans]}."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT employee_national_id, id, loan_date, amount, remaining_amount, installment_amount, description FROM loans WHERE is_active = 1 ORDER BY employee_national_id, loan_date ASC")
+    loans_by_employee = {}
+    for row in cursor:
+        loans_by_employee.setdefault(row[0], []).append(row[1:])
+    return loans_by_employee
+
+# Attendance tables the time-clock import can load: kind -> (table, date column, hours column, note column)
+ATTENDANCE_TABLES = {
+    "absences": ("absences", "absence_date", "hours_absent", "reason"),
+    "overtimes": ("overtimes", "overtime_date", "hours_worked", "description"),
+}
+
+def add_attendance_batch(kind, attendance_rows):
+    """Inserts (employee_national_id, date, hours, note) rows into the absences or overtimes table.
+
+    An (employee, date) pair is skipped if it already exists in the table or earlier in the
+    batch, so loading the same export twice does not count hours twice. Rows go through a
+    temporary staging table so the check is one indexed NOT EXISTS per row instead of a query
+    from Python. Returns (inserted, skipped_duplicates).
+    """
+    table, date_column, hours_column, note_column = ATTENDANCE_TABLES[kind]
+    with transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS import_attendance (
+                employee_national_id TEXT, attendance_date TEXT, hours REAL, note TEXT,
+                PRIMARY KEY (employee_national_id, attendance_date)
+            )
+        ''')
+        cursor.execute("DELETE FROM temp.import_attendance")
+        cursor.executemany("INSERT OR IGNORE INTO temp.import_attendance VALUES (?, ?, ?, ?)", attendance_rows)
+        cursor.execute(f'''
+            INSERT INTO {table} (employee_national_id, {date_column}, {hours_column}, {note_column})
+            SELECT s.employee_national_id, s.attendance_date, s.hours, s.note
+            FROM temp.import_attendance s
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {table} t
+                WHERE t.employee_national_id = s.employee_national_id AND t.{date_column} = s.attendance_date
+            )
+        ''')
+        inserted = cursor.rowcount
+        cursor.execute("DELETE FROM temp.import_attendance")
+    return inserted, len(attendance_rows) - inserted
+
+def get_import_checkpoint(source):
+    """Returns (rows_done, completed) for a file import, or None if it never committed a chunk."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT rows_done, completed FROM import_checkpoints WHERE source = ?", (source,))
+    return cursor.fetchone()
+
+def save_import_checkpoint(source, kind, rows_done, completed=False):
+    """Records how many source rows of a file import are committed. Call it inside the chunk's
+    transaction so the checkpoint and the rows it covers commit together."""
+    with transaction() as conn:
+        conn.execute('''
+            INSERT INTO import_checkpoints (source, kind, rows_done, completed, updated_at) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(source) DO UPDATE SET rows_done = excluded.rows_done, completed = excluded.completed,
+                updated_at = excluded.updated_at
+        ''', (source, kind, rows_done, 1 if completed else 0, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+
+def delete_import_checkpoint(source):
+    """Forgets a file import's progress, so it is read again from the first row."""
+    with transaction() as conn:
+        conn.execute("DELETE FROM import_checkpoints WHERE source = ?", (source,))
+
+def get_export_watermark(target):
+    """Returns (last_payroll_id, target_bytes, rows_exported) of an incremental export target, or None."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT last_payroll_id, target_bytes, rows_exported FROM export_watermarks WHERE target = ?", (target,))
+    return cursor.fetchone()
+
+def save_export_watermark(target, last_payroll_id, target_bytes, rows_exported):
+    """Records that target holds every payslip up to last_payroll_id in its first target_bytes bytes."""
+    with transaction() as conn:
+        conn.execute('''
+            INSERT INTO export_watermarks (target, last_payroll_id, target_bytes, rows_exported, updated_at) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(target) DO UPDATE SET last_payroll_id = excluded.last_payroll_id, target_bytes = excluded.target_bytes,
+                rows_exported = excluded.rows_exported, updated_at = excluded.updated_at
+        ''', (target, last_payroll_id, target_bytes, rows_exported, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+
+def delete_export_watermark(target):
+    """Forgets an incremental export target, so the next run writes it from the first payslip."""
+    with transaction() as conn:
+        conn.execute("DELETE FROM export_watermarks WHERE target = ?", (target,))
+
+# Per-function latency while instrumentation is on (see instrumentation.py). Runs last so every
+# caller, including the functions above, goes through the wrappers; get_connection is too hot
+# and too cheap to be worth timing.
+instrumentation.instrument_functions(globals(), __name__, exclude=("get_connection",))
@@ -0,0 +1,161 @@
+# employee_import.py
+# Bulk employee import from CSV, JSON Lines and JSON files, including the legacy employees.json
+# format ({national_id: {first_name, last_name, position, salary}}). Kept free of GUI code so the
+# CLI can use it too.
+
+import csv
+import json
+import os
+from itertools import islice
+
+from database_ops import get_existing_employee_ids, add_employees_batch
+
+IMPORT_CHUNK_SIZE = 5000 # Rows validated and committed per transaction
+EMPLOYEE_FIELDS = ("national_id", "first_name", "last_name", "position", "base_salary")
+ERROR_REPORT_HEADERS = ["ردیف", "کد ملی", "خطا"]
+
+
+class ImportReport:
+    """Outcome of an import: counts plus one (row_number, national_id, message) entry per rejected row."""
+
+    def __init__(self):
+        self.rows_read = 0
+        self.imported = 0
+        self.updated = 0
+        self.errors = []
+
+    def add_error(self, row_number, national_id, message):
+        self.errors.append((row_number, national_id, message))
+
+    def write_errors_csv(self, filename):
+        """Saves the per-row error report (utf-8-sig, so Excel shows the Persian text correctly)."""
+        with open(filename, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(ERROR_REPORT_HEADERS)
+            writer.writerows(self.errors)
+
+
+def _iter_csv(filename):
+    with open(filename, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        columns = set(reader.fieldnames or ())
+        missing = [field for field in EMPLOYEE_FIELDS
+                   if field not in columns and not (field == "base_salary" and "salary" in columns)]
+        if missing:
+            raise ValueError(f"ستون‌های {', '.join(missing)} در فایل وجود ندارد.")
+        for record in reader:
+            yield reader.line_num, record
+
+
+def _iter_json_lines(filename):
+    with open(filename, encoding="utf-8-sig") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError:
+                yield line_number, None # Reported as an invalid row by validate_employee_record
+
+
+def _iter_json(filename):
+    # The json module has no incremental parser, so a .json file is loaded whole; use .jsonl
+    # (one employee object per line) for very large imports.
+    with open(filename, encoding="utf-8-sig") as f:
+        data = json.load(f)
+    if isinstance(data, dict): # Legacy employees.json: keyed by national_id
+        for row_number, (national_id, fields) in enumerate(data.items(), start=1):
+            yield row_number, dict(fields, national_id=national_id) if isinstance(fields, dict) else None
+    elif isinstance(data, list):
+        yield from enumerate(data, start=1)
+    else:
+        raise ValueError("فایل JSON باید شامل یک لیست یا یک دیکشنری از کارمندان باشد.")
+
+
+def iter_employee_records(filename):
+    """Yields (row_number, record dict) from a .csv, .jsonl or .json file, chosen by extension."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".csv":
+        return _iter_csv(filename)
+    if extension in (".jsonl", ".ndjson"):
+        return _iter_json_lines(filename)
+    if extension == ".json":
+        return _iter_json(filename)
+    raise ValueError("فرمت فایل پشتیبانی نمی‌شود (فقط csv، json و jsonl).")
+
+
+def validate_employee_record(record):
+    """Applies AddEmployeeFrame's rules to one record; returns a row for add_employees_batch.
+
+    Raises ValueError with a message for the error report.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("ردیف نامعتبر است.")
+    if record.get("base_salary") in (None, "") and "salary" in record: # Legacy key
+        record = dict(record, base_salary=record["salary"])
+
+    values = {}
+    for field in EMPLOYEE_FIELDS:
+        value = record.get(field)
+        values[field] = "" if value is None else str(value).strip()
+    empty = [field for field, value in values.items() if not value]
+    if empty:
+        raise ValueError(f"فیلدهای خالی: {', '.join(empty)}")
+
+    national_id = values["national_id"]
+    if not national_id.isdigit() or len(national_id) != 10:
+        raise ValueError("کد ملی باید یک عدد ۱۰ رقمی باشد.")
+    try:
+        base_salary = float(values["base_salary"])
+    except ValueError:
+        raise ValueError("حقوق ثابت باید یک عدد معتبر باشد.")
+    if base_salary < 0:
+        raise ValueError("حقوق ثابت نمی‌تواند منفی باشد.")
+    return (national_id, values["first_name"], values["last_name"], values["position"], base_salary)
+
+
+def import_employees(filename, update_existing=False, progress=None):
+    """Streams employees from filename into the database, IMPORT_CHUNK_SIZE rows per transaction.
+
+    Invalid rows, national_ids repeated within the file and (unless update_existing) employees
+    that already exist are skipped and listed in the returned ImportReport. progress, if given, is
+    called with the number of rows read after each chunk; raising from it stops the import, but
+    chunks already committed stay.
+    """
+    report = ImportReport()
+    seen_ids = set()
+    records = iter_employee_records(filename)
+    while True:
+        chunk = list(islice(records, IMPORT_CHUNK_SIZE))
+        if not chunk:
+            break
+        report.rows_read += len(chunk)
+
+        rows = []
+        for row_number, record in chunk:
+            try:
+                row = validate_employee_record(record)
+            except ValueError as e:
+                national_id = record.get("national_id", "") if isinstance(record, dict) else ""
+                report.add_error(row_number, national_id, str(e))
+                continue
+            if row[0] in seen_ids:
+                report.add_error(row_number, row[0], "کد ملی در فایل تکراری است.")
+                continue
+            seen_ids.add(row[0])
+            rows.append((row_number, row))
+
+        existing_ids = get_existing_employee_ids(row[0] for _, row in rows)
+        if not update_existing:
+            for row_number, row in rows:
+                if row[0] in existing_ids:
+                    report.add_error(row_number, row[0], "کارمندی با این کد ملی از قبل وجود دارد.")
+            rows = [(row_number, row) for row_number, row in rows if row[0] not in existing_ids]
+
+        changed = add_employees_batch([row for _, row in rows], update_existing)
+        updated = len(existing_ids) if update_existing else 0
+        report.updated += updated
+        report.imported += changed - updated
+        if progress:
+            progress(report.rows_read)
+    return report
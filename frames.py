@@ -1,23 +1,126 @@
 # frames.py
 
 import tkinter as tk
-from tkinter import messagebox, ttk, filedialog
+from tkinter import messagebox, ttk, filedialog, simpledialog
 from datetime import datetime, timedelta
-import openpyxl
-from tkcalendar import DateEntry
-import sqlite3
+import threading
+from collections import deque
 
 # Import functions and configurations from other modules
 from database_ops import (
     get_employee_data, add_employee_to_db, update_employee_in_db, delete_employee_from_db,
-    record_monthly_payroll_to_db, get_payroll_history,
-    get_absences_in_month, get_overtimes_in_month,
-    add_loan_to_db, get_active_loans, update_loan_remaining_amount,
+    get_payroll_history,
+    add_loan_to_db, get_active_loans,
     add_absence_to_db, get_absences_history,
     add_overtime_to_db, get_overtime_history,
-    add_leave_to_db, get_leave_history
+    add_leave_to_db, get_leave_history,
+    search_employees, get_payslip_details, get_employees_page, get_employee_cache_stats,
+    count_employees, employee_page_cursor
 )
-from config import ADMIN_USERNAME, ADMIN_PASSWORD, HOURLY_WORK_HOURS_IN_MONTH, OVERTIME_RATE_FACTOR, ABSENCE_RATE_FACTOR, DB_NAME
+import instrumentation
+from payroll import record_employee_payroll, run_payroll_for_month
+from employee_import import import_employees
+from attendance_import import import_attendance
+from reports import export_report, REPORT_FORMATS
+from config import ADMIN_USERNAME, ADMIN_PASSWORD, SEARCH_DEBOUNCE_MS, WARM_UP_IMPORTS
+
+
+class ProgressDialog(tk.Toplevel):
+    """Small modal window showing the progress of a background job, with a cancel button."""
+
+    def __init__(self, master, title):
+        super().__init__(master)
+        self.title(title)
+        self.resizable(False, False)
+        self.transient(master.winfo_toplevel())
+        self.on_cancel = None # Set by the caller to the job's cancel function
+
+        self.status_label = tk.Label(self, text=title, font=("Arial", 11), padx=20, pady=10)
+        self.status_label.pack()
+        self.progressbar = ttk.Progressbar(self, mode="indeterminate", length=300)
+        self.progressbar.pack(padx=20, pady=5)
+        self.progressbar.start(15)
+        self.cancel_button = tk.Button(self, text="لغو", font=("Arial", 11), command=self._cancel, bg="#F44336", fg="white", padx=10)
+        self.cancel_button.pack(pady=10)
+        self.protocol("WM_DELETE_WINDOW", self._cancel)
+        self.grab_set() # Keep the user from starting a second job meanwhile
+
+    def update_progress(self, done, total=None):
+        if total:
+            if self.progressbar["mode"] != "determinate":
+                self.progressbar.stop()
+                self.progressbar.config(mode="determinate", maximum=total)
+            self.progressbar["value"] = done
+            self.status_label.config(text=f"{done} از {total}")
+        else:
+            self.status_label.config(text=f"{done} ردیف پردازش شد")
+
+    def _cancel(self):
+        self.cancel_button.config(state="disabled", text="در حال لغو...")
+        if self.on_cancel:
+            self.on_cancel()
+
+    def close(self):
+        if self.winfo_exists():
+            self.grab_release()
+            self.destroy()
+
+
+def _run_with_progress(frame, title, work, on_done, error_prefix):
+    """Runs work(progress) on the background worker behind a cancellable ProgressDialog.
+
+    work reports through progress(done, total=None), which also stops it once the user cancels.
+    on_done(result) runs on the UI thread after the dialog closes; an error is shown after error_prefix.
+    """
+    def job(context):
+        def progress(done, total=None):
+            context.raise_if_cancelled()
+            context.report_progress(done, total)
+        return work(progress)
+
+    def on_success(result):
+        dialog.close()
+        on_done(result)
+
+    def on_error(error):
+        dialog.close()
+        messagebox.showerror("خطا", f"{error_prefix}: {error}")
+
+    dialog = ProgressDialog(frame, title)
+    context = frame.app.task_runner.submit(
+        job, owner=frame, on_success=on_success, on_error=on_error,
+        on_progress=dialog.update_progress, on_cancelled=dialog.close)
+    dialog.on_cancel = context.cancel
+
+
+def _show_import_summary(report, summary, rejected_title, rejected_unit, error_filename):
+    """Shows an import's summary and, if rows were rejected, offers to save report.errors as CSV."""
+    if not report.errors:
+        messagebox.showinfo("موفقیت", summary)
+        return
+    if messagebox.askyesno(rejected_title, f"{summary}\n{len(report.errors)} {rejected_unit} رد شد. گزارش خطاها ذخیره شود؟"):
+        filename = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")],
+                                                initialfile=error_filename)
+        if filename:
+            report.write_errors_csv(filename)
+
+
+def _create_date_entry(parent):
+    """Builds the yyyy-mm-dd DateEntry used by the attendance and loan forms."""
+    from tkcalendar import DateEntry # Loaded on first use: with babel it is the slowest import in the app
+    return DateEntry(parent, selectmode='day', date_pattern='yyyy-mm-dd', font=("Arial", 10), width=15)
+
+
+def warm_up_imports():
+    """Imports tkcalendar and openpyxl on a daemon thread, so the first visit to the attendance
+    or reports screens does not stall the UI. Failures are ignored; the real import reports them."""
+    def run():
+        try:
+            import tkcalendar # Used by _create_date_entry
+            import openpyxl # Used by reports.write_xlsx_streaming
+        except ImportError:
+            pass
+    threading.Thread(target=run, name="import-warm-up", daemon=True).start()
 
 
 class LoginFrame(tk.Frame):
@@ -51,6 +154,8 @@ class LoginFrame(tk.Frame):
         password = self.password_entry.get()
 
         if username == ADMIN_USERNAME and password == ADMIN_PASSWORD:
+            if WARM_UP_IMPORTS:
+                warm_up_imports() # Runs while the success message is on screen
             messagebox.showinfo("ورود موفق", "با موفقیت وارد شدید!")
             self.app.create_main_menu_frame()
         else:
@@ -78,6 +183,7 @@ class MainMenuFrame(tk.Frame):
         tk.Button(buttons_frame, text="مدیریت حقوق و دستمزد", command=self.app.create_payroll_management_frame, bg="#8BC34A", fg="white", **base_button_style).pack(pady=10)
         tk.Button(buttons_frame, text="گزارش‌گیری (اکسل)", command=self.app.create_reports_frame, bg="#FFEB3B", fg="black", **base_button_style).pack(pady=10)
         tk.Button(buttons_frame, text="خروج از برنامه", command=self._exit_app, bg="#F44336", fg="white", **base_button_style).pack(pady=10)
+        tk.Button(buttons_frame, text="عیب‌یابی و کارایی", command=self.app.create_diagnostics_frame, font=("Arial", 10), bg="#9E9E9E", fg="white", padx=10).pack(pady=5)
 
         self.grid_rowconfigure(0, weight=1)
         self.grid_rowconfigure(2, weight=1)
@@ -119,6 +225,7 @@ class AddEmployeeFrame(tk.Frame):
         buttons_frame.pack(pady=20)
 
         tk.Button(buttons_frame, text="ذخیره کارمند", font=("Arial", 12, "bold"), command=self._save_employee, bg="#4CAF50", fg="white", padx=10, pady=5).pack(side=tk.LEFT, padx=10)
+        tk.Button(buttons_frame, text="ورود گروهی از فایل", font=("Arial", 12), command=self._import_employees_from_file, bg="#2196F3", fg="white", padx=10, pady=5).pack(side=tk.LEFT, padx=10)
         tk.Button(buttons_frame, text="بازگشت به منو", font=("Arial", 12), command=self.app.create_main_menu_frame, bg="#FFC107", fg="black", padx=10, pady=5).pack(side=tk.RIGHT, padx=10)
 
 
@@ -152,21 +259,48 @@ class AddEmployeeFrame(tk.Frame):
         else:
             messagebox.showerror("خطا", "کارمندی با این کد ملی از قبل وجود دارد.")
 
+    def _import_employees_from_file(self):
+        """Bulk import from CSV/JSON on the background worker, then offers to save the error report."""
+        filename = filedialog.askopenfilename(filetypes=[("Employee files", "*.csv *.json *.jsonl"), ("All files", "*.*")])
+        if not filename:
+            return
+        update_existing = messagebox.askyesno("کارمندان موجود", "اطلاعات کارمندانی که از قبل ثبت شده‌اند به‌روزرسانی شود؟")
+
+        def on_done(report):
+            _show_import_summary(report, f"{report.imported} کارمند اضافه شد و {report.updated} کارمند به‌روزرسانی شد.",
+                                 "ردیف‌های رد شده", "ردیف", "گزارش-خطای-ورود-کارمندان.csv")
+
+        _run_with_progress(self, "در حال ورود کارمندان...",
+                           lambda progress: import_employees(filename, update_existing=update_existing, progress=progress),
+                           on_done, "خطا در ورود کارمندان")
+
 class ViewEmployeesFrame(tk.Frame):
+    PAGE_SIZE = 200 # Rows fetched per page; a page loads when the view nears either end of the window
+    WINDOW_PAGES = 3 # Pages kept in the tree; loading one more drops the page at the far end
+
     def __init__(self, master, app_instance):
         super().__init__(master, bg="#f9f9f9")
         self.app = app_instance
+        self.sort_column = "national_id"
+        self.sort_descending = False
+        self._pages = deque() # Raw rows of the pages in the tree, in order
+        self._window_start = 0 # Position of the tree's first row in the whole sorted list
+        self._total = 0 # Employees in the whole list; the scrollbar spans all of them
+        self._loading_page = False
 
         tk.Label(self, text="لیست کارمندان", font=("Arial", 16, "bold"), bg="#f9f9f9").pack(pady=20)
 
         self.tree = ttk.Treeview(self, columns=("national_id", "first_name", "last_name", "position", "base_salary"), show="headings")
-        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-        self.tree.heading("national_id", text="کد ملی", anchor="center")
-        self.tree.heading("first_name", text="نام", anchor="center")
-        self.tree.heading("last_name", text="نام خانوادگی", anchor="center")
-        self.tree.heading("position", text="سمت", anchor="center")
-        self.tree.heading("base_salary", text="حقوق ثابت", anchor="center")
+        self.column_titles = {
+            "national_id": "کد ملی",
+            "first_name": "نام",
+            "last_name": "نام خانوادگی",
+            "position": "سمت",
+            "base_salary": "حقوق ثابت",
+        }
+        for column, title in self.column_titles.items():
+            self.tree.heading(column, text=title, anchor="center", command=lambda c=column: self._sort_by(c))
 
         self.tree.column("national_id", width=100, anchor="center")
         self.tree.column("first_name", width=100, anchor="center")
@@ -174,32 +308,130 @@ class ViewEmployeesFrame(tk.Frame):
         self.tree.column("position", width=120, anchor="center")
         self.tree.column("base_salary", width=100, anchor="center")
 
-        self._load_employees_to_tree()
+        tk.Button(self, text="بازگشت به منو", font=("Arial", 12), command=self.app.create_main_menu_frame, bg="#FFC107", fg="black", padx=10, pady=5).pack(side=tk.BOTTOM, pady=10)
 
-        yscrollbar = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
-        yscrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.tree.configure(yscrollcommand=yscrollbar.set)
+        self.yscrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.yscrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.configure(yscrollcommand=self._on_tree_scroll)
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-        tk.Button(self, text="بازگشت به منو", font=("Arial", 12), command=self.app.create_main_menu_frame, bg="#FFC107", fg="black", padx=10, pady=5).pack(pady=10)
+        self._load_employees_to_tree()
 
     def _load_employees_to_tree(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        employees_data = get_employee_data()
+        """(Re)loads the list from the top in the current sort order."""
+        for column, title in self.column_titles.items():
+            arrow = (" ▼" if self.sort_descending else " ▲") if column == self.sort_column else ""
+            self.tree.heading(column, text=title + arrow)
+        self._total = count_employees()
+        self._show_window_at(0)
+
+    def _show_window_at(self, position):
+        """Replaces the window with the page starting at position (0-based) in the sorted list."""
+        self.tree.delete(*self.tree.get_children())
+        self._pages.clear()
+        self._window_start = max(0, min(position, self._total - self.PAGE_SIZE))
+        employees_data, _ = get_employees_page(self.sort_column, self.sort_descending, limit=self.PAGE_SIZE,
+                                               offset=self._window_start)
         if not employees_data:
+            self._window_start = 0
             self.tree.insert("", tk.END, values=("", "", "هیچ کارمندی در سیستم ثبت نشده است.", "", ""), tags=('no_data',))
             self.tree.tag_configure('no_data', foreground='gray', font=('Arial', 10, 'italic'))
             return
-
-        for emp_row in employees_data:
-            self.tree.insert("", tk.END, values=(
+        self._add_page(employees_data, at_end=True)
+        self.tree.yview_moveto((position - self._window_start) / self._window_size())
+
+    def _window_size(self):
+        return sum(len(page) for page in self._pages)
+
+    def _add_page(self, employees_data, at_end):
+        """Adds a page at one end of the window, dropping the page at the other end once the window
+        is full, and keeps the rows on screen where they were."""
+        size = self._window_size()
+        top = self._window_start + round(self.tree.yview()[0] * size) # First visible row, in the whole list
+        for emp_row in (employees_data if at_end else reversed(employees_data)):
+            self.tree.insert("", tk.END if at_end else 0, values=(
                 emp_row[0], # national_id
                 emp_row[1], # first_name
                 emp_row[2], # last_name
                 emp_row[3], # position
                 f"{emp_row[4]:.0f}" # base_salary
             ))
+        if at_end:
+            self._pages.append(employees_data)
+        else:
+            self._pages.appendleft(employees_data)
+            self._window_start -= len(employees_data)
+        if len(self._pages) > self.WINDOW_PAGES:
+            children = self.tree.get_children()
+            if at_end:
+                dropped = len(self._pages.popleft())
+                self.tree.delete(*children[:dropped])
+                self._window_start += dropped
+            else:
+                dropped = len(self._pages.pop())
+                self.tree.delete(*children[-dropped:])
+        if size:
+            self.tree.yview_moveto((top - self._window_start) / self._window_size())
+
+    def _load_adjacent_page(self, at_end):
+        """Loads the keyset page after (or before) the window."""
+        try:
+            if at_end:
+                employees_data, _ = get_employees_page(self.sort_column, self.sort_descending,
+                                                       employee_page_cursor(self._pages[-1][-1], self.sort_column), self.PAGE_SIZE)
+                if len(employees_data) < self.PAGE_SIZE: # Reached the end; the count may be stale
+                    self._total = self._window_start + self._window_size() + len(employees_data)
+            else:
+                # The rows before the window are the next page in the opposite direction, nearest first
+                employees_data, _ = get_employees_page(self.sort_column, not self.sort_descending,
+                                                       employee_page_cursor(self._pages[0][0], self.sort_column), self.PAGE_SIZE)
+                employees_data.reverse()
+            if employees_data:
+                self._add_page(employees_data, at_end)
+            if not at_end and len(employees_data) < self.PAGE_SIZE: # Reached the top; the count may be stale
+                self._window_start = 0
+        finally:
+            self._loading_page = False
+
+    def _on_tree_scroll(self, first, last):
+        first, last = float(first), float(last)
+        size = self._window_size()
+        if not size:
+            self.yscrollbar.set(first, last)
+            return
+        # The scrollbar shows where the window's visible rows are in the whole list
+        self.yscrollbar.set((self._window_start + first * size) / self._total,
+                            (self._window_start + last * size) / self._total)
+        if self._loading_page:
+            return
+        # Fetch a page once the visible rows get close to either end of the window
+        if last > 0.9 and self._window_start + size < self._total:
+            self._loading_page = True # Don't queue the same page twice while this one is pending
+            self.after_idle(self._load_adjacent_page, True)
+        elif first < 0.1 and self._window_start > 0:
+            self._loading_page = True
+            self.after_idle(self._load_adjacent_page, False)
+
+    def _on_scrollbar(self, *args):
+        size = self._window_size()
+        if args[0] != "moveto" or not size:
+            self.tree.yview(*args) # Arrows and page clicks scroll the window; its edges load more
+            return
+        # Dragging the slider (or clicking the trough) can land anywhere in the whole list
+        position = round(float(args[1]) * self._total)
+        window_end = self._window_start + size
+        if self._window_start <= position and (position <= window_end - self.PAGE_SIZE // 2 or window_end >= self._total):
+            self.tree.yview_moveto((position - self._window_start) / size)
+        else:
+            self._show_window_at(position)
+
+    def _sort_by(self, column):
+        if column == self.sort_column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_column = column
+            self.sort_descending = False
+        self._load_employees_to_tree()
 
 class SearchEditDeleteFrame(tk.Frame):
     def __init__(self, master, app_instance):
@@ -216,7 +448,10 @@ class SearchEditDeleteFrame(tk.Frame):
         tk.Label(search_frame, text="کد ملی / نام / نام خانوادگی:", font=("Arial", 12), bg="#f9f9f9").pack(side=tk.RIGHT, padx=5)
         self.search_entry = tk.Entry(search_frame, font=("Arial", 12), width=30)
         self.search_entry.pack(side=tk.RIGHT, expand=True, fill=tk.X, padx=5)
+        self.search_entry.bind("<KeyRelease>", self._on_search_typed) # Search as you type (debounced)
+        self.search_entry.bind("<Return>", lambda event: self._search_employee())
         tk.Button(search_frame, text="جستجو", font=("Arial", 12), command=self._search_employee, bg="#03A9F4", fg="white", padx=10, pady=5).pack(side=tk.LEFT, padx=5)
+        self._search_after_id = None
 
         # Search Results Treeview
         self.search_results_tree = ttk.Treeview(self, columns=("national_id", "first_name", "last_name", "position"), show="headings")
@@ -260,10 +495,34 @@ class SearchEditDeleteFrame(tk.Frame):
 
         self._clear_edit_fields()
 
-    def _search_employee(self):
+    def _on_search_typed(self, event):
+        if event.keysym in ("Return", "KP_Enter"):
+            return # Handled by the <Return> binding
+        self._cancel_pending_search()
+        if self.search_entry.get().strip():
+            self._search_after_id = self.after(SEARCH_DEBOUNCE_MS, lambda: self._search_employee(interactive=False))
+        else:
+            self._clear_search_results()
+
+    def _cancel_pending_search(self):
+        if self._search_after_id is not None:
+            self.after_cancel(self._search_after_id)
+            self._search_after_id = None
+
+    def destroy(self):
+        self._cancel_pending_search()
+        super().destroy()
+
+    def _search_employee(self, interactive=True):
+        """Runs the search. interactive=False is the search-as-you-type path: no popups, no auto-select."""
+        if interactive:
+            self._cancel_pending_search()
+        else:
+            self._search_after_id = None # This is the pending callback firing
         search_query = self.search_entry.get().strip()
         if not search_query:
-            messagebox.showwarning("ورودی ناقص", "لطفا کد ملی، نام یا نام خانوادگی را برای جستجو وارد کنید.")
+            if interactive:
+                messagebox.showwarning("ورودی ناقص", "لطفا کد ملی، نام یا نام خانوادگی را برای جستجو وارد کنید.")
             self._clear_edit_fields()
             self._clear_search_results()
             return
@@ -271,25 +530,17 @@ class SearchEditDeleteFrame(tk.Frame):
         self._clear_search_results()
         self._clear_edit_fields()
 
-        # Using direct sqlite3 connection here because database_ops functions only fetch by national_id directly.
-        # Could add a search function to database_ops if needed frequently.
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-
-        # Search by national_id, first_name, or last_name
-        cursor.execute("SELECT national_id, first_name, last_name, position FROM employees WHERE national_id LIKE ? OR first_name LIKE ? OR last_name LIKE ?",
-                       (f"%{search_query}%", f"%{search_query}%", f"%{search_query}%"))
-        results = cursor.fetchall()
-        conn.close()
+        # Search by national_id, first_name, or last_name (capped at SEARCH_RESULT_LIMIT rows)
+        results = search_employees(search_query)
 
         if results:
             for emp_row in results:
-                self.search_results_tree.insert("", tk.END, values=emp_row)
-            if len(results) == 1:
+                self.search_results_tree.insert("", tk.END, values=emp_row[:4]) # The tree shows no salary
+            if len(results) == 1 and interactive:
                 # If only one result, auto-select it and load details
                 self.search_results_tree.selection_set(self.search_results_tree.get_children()[0])
                 self._on_employee_select(None) # Call the select handler
-        else:
+        elif interactive:
             messagebox.showinfo("یافت نشد", "کارمندی با این مشخصات یافت نشد.")
 
 
@@ -431,7 +682,7 @@ class AbsenceOvertimeLeaveFrame(tk.Frame):
         input_frame.pack(pady=10, padx=20, fill=tk.X)
 
         tk.Label(input_frame, text="تاریخ غیبت:", font=("Arial", 10), bg="#f9f9f9").grid(row=0, column=3, padx=5, pady=5, sticky="w")
-        self.abs_date_entry = DateEntry(input_frame, selectmode='day', date_pattern='yyyy-mm-dd', font=("Arial", 10), width=15)
+        self.abs_date_entry = _create_date_entry(input_frame)
         self.abs_date_entry.grid(row=0, column=2, padx=5, pady=5, sticky="ew")
 
         tk.Label(input_frame, text="مدت غیبت (ساعت):", font=("Arial", 10), bg="#f9f9f9").grid(row=0, column=1, padx=5, pady=5, sticky="w")
@@ -517,7 +768,7 @@ class AbsenceOvertimeLeaveFrame(tk.Frame):
         input_frame.pack(pady=10, padx=20, fill=tk.X)
 
         tk.Label(input_frame, text="تاریخ اضافه کار:", font=("Arial", 10), bg="#f9f9f9").grid(row=0, column=3, padx=5, pady=5, sticky="w")
-        self.ot_date_entry = DateEntry(input_frame, selectmode='day', date_pattern='yyyy-mm-dd', font=("Arial", 10), width=15)
+        self.ot_date_entry = _create_date_entry(input_frame)
         self.ot_date_entry.grid(row=0, column=2, padx=5, pady=5, sticky="ew")
 
         tk.Label(input_frame, text="مدت اضافه کار (ساعت):", font=("Arial", 10), bg="#f9f9f9").grid(row=0, column=1, padx=5, pady=5, sticky="w")
@@ -601,11 +852,11 @@ class AbsenceOvertimeLeaveFrame(tk.Frame):
         input_frame.pack(pady=10, padx=20, fill=tk.X)
 
         tk.Label(input_frame, text="تاریخ شروع:", font=("Arial", 10), bg="#f9f9f9").grid(row=0, column=3, padx=5, pady=5, sticky="w")
-        self.leave_start_date_entry = DateEntry(input_frame, selectmode='day', date_pattern='yyyy-mm-dd', font=("Arial", 10), width=15)
+        self.leave_start_date_entry = _create_date_entry(input_frame)
         self.leave_start_date_entry.grid(row=0, column=2, padx=5, pady=5, sticky="ew")
 
         tk.Label(input_frame, text="تاریخ پایان:", font=("Arial", 10), bg="#f9f9f9").grid(row=0, column=1, padx=5, pady=5, sticky="w")
-        self.leave_end_date_entry = DateEntry(input_frame, selectmode='day', date_pattern='yyyy-mm-dd', font=("Arial", 10), width=15)
+        self.leave_end_date_entry = _create_date_entry(input_frame)
         self.leave_end_date_entry.grid(row=0, column=0, padx=5, pady=5, sticky="ew")
 
         tk.Label(input_frame, text="نوع مرخصی:", font=("Arial", 10), bg="#f9f9f9").grid(row=1, column=3, padx=5, pady=5, sticky="w")
@@ -695,7 +946,7 @@ class AbsenceOvertimeLeaveFrame(tk.Frame):
         input_frame.pack(pady=10, padx=20, fill=tk.X)
 
         tk.Label(input_frame, text="تاریخ وام:", font=("Arial", 10), bg="#f9f9f9").grid(row=0, column=3, padx=5, pady=5, sticky="w")
-        self.loan_date_entry = DateEntry(input_frame, selectmode='day', date_pattern='yyyy-mm-dd', font=("Arial", 10), width=15)
+        self.loan_date_entry = _create_date_entry(input_frame)
         self.loan_date_entry.grid(row=0, column=2, padx=5, pady=5, sticky="ew")
 
         tk.Label(input_frame, text="مبلغ وام:", font=("Arial", 10), bg="#f9f9f9").grid(row=0, column=1, padx=5, pady=5, sticky="w")
@@ -843,6 +1094,8 @@ class PayrollManagementFrame(tk.Frame):
         tk.Label(other_actions_frame, text="عملیات پیشرفته حقوق:", font=("Arial", 12, "bold"), bg="#f9f9f9").pack(side=tk.RIGHT, padx=5, pady=5)
         self.manage_aol_button = tk.Button(other_actions_frame, text="مدیریت غیبت، اضافه کار و مرخصی", font=("Arial", 11), command=self._open_absence_overtime_leave_frame, bg="#9C27B0", fg="white", padx=10, pady=5, state="disabled")
         self.manage_aol_button.pack(side=tk.LEFT, padx=5)
+        tk.Button(other_actions_frame, text="محاسبه حقوق همه کارمندان", font=("Arial", 11), command=self._run_payroll_for_all, bg="#3F51B5", fg="white", padx=10, pady=5).pack(side=tk.LEFT, padx=5)
+        tk.Button(other_actions_frame, text="ورود فایل ساعت‌زنی", font=("Arial", 11), command=self._import_time_clock_file, bg="#009688", fg="white", padx=10, pady=5).pack(side=tk.LEFT, padx=5)
 
         # NEW: Monthly Payroll Calculation Section
         payroll_calc_frame = tk.LabelFrame(self, text="محاسبه و ثبت حقوق ماهانه", bg="#f9f9f9", padx=10, pady=10)
@@ -997,101 +1250,121 @@ class PayrollManagementFrame(tk.Frame):
             messagebox.showerror("خطا", "کسورات باید یک عدد معتبر باشد.")
             return
 
-        # Fetch employee's current base salary
-        emp_data = get_employee_data(self.current_employee_id)
-        if not emp_data:
-            messagebox.showerror("خطا", "اطلاعات کارمند یافت نشد.")
+        # The database work runs on the background worker; the result comes back to on_success
+        national_id = self.current_employee_id
+
+        def on_success(result):
+            if result is None:
+                messagebox.showerror("خطا", "اطلاعات کارمند یافت نشد.")
+                return
+            success, payslip = result
+            if success:
+                messagebox.showinfo("موفقیت", "فیش حقوقی با موفقیت ثبت شد.")
+                self._load_payroll_history()
+                # Refresh employee info to show updated loan status if any
+                self._search_employee_for_payroll()
+            else:
+                messagebox.showerror("خطا", f"فیش حقوقی برای این کارمند در ماه {payroll_month} قبلاً ثبت شده است.")
+
+            # Clear specific entries after calculation, but keep month for consecutive entries
+            self.benefits_entry.delete(0, tk.END)
+            self.benefits_entry.insert(0, "0")
+            self.deductions_entry.delete(0, tk.END)
+            self.deductions_entry.insert(0, "0")
+
+        self.app.task_runner.submit(
+            lambda context: record_employee_payroll(national_id, payroll_month, benefits, deductions),
+            owner=self, on_success=on_success,
+            on_error=lambda error: messagebox.showerror("خطا", f"خطا در ثبت فیش حقوقی: {error}"))
+
+
+    def _run_payroll_for_all(self):
+        payroll_month = simpledialog.askstring("محاسبه حقوق همه کارمندان", "ماه حقوق (YYYY-MM):",
+                                               initialvalue=datetime.now().strftime("%Y-%m"), parent=self)
+        if not payroll_month:
+            return
+        payroll_month = payroll_month.strip()
+        try:
+            datetime.strptime(payroll_month, "%Y-%m")
+        except ValueError:
+            messagebox.showerror("خطا", "فرمت ماه حقوق نامعتبر است. لطفا از فرمت YYYY-MM استفاده کنید (مثلاً 2023-01).")
+            return
+
+        if not messagebox.askyesno("تایید", f"حقوق ماه {payroll_month} برای همه کارمندانی که هنوز فیش ندارند محاسبه و ثبت شود؟"):
             return
-        base_salary = emp_data[4]
-
-        # Calculate total overtime and absence for the given month
-        total_overtime_hours = get_overtimes_in_month(self.current_employee_id, payroll_month)
-        total_absence_hours = get_absences_in_month(self.current_employee_id, payroll_month)
-
-        # --- Loan Deduction Logic ---
-        active_loans = get_active_loans(self.current_employee_id)
-        total_loan_deduction_for_month = 0
-        loan_deductions_detail = []
-
-        if active_loans:
-            for loan_id, loan_date, amount, remaining_amount, installment_amount, description in active_loans:
-                deduct_this_loan = min(installment_amount, remaining_amount) if installment_amount > 0 else 0
-                if deduct_this_loan > 0:
-                    total_loan_deduction_for_month += deduct_this_loan
-                    loan_deductions_detail.append(f"وام (ID: {loan_id}): {deduct_this_loan:.0f} تومان (باقی‌مانده: {remaining_amount - deduct_this_loan:.0f})")
-                    # Update loan remaining amount immediately
-                    update_loan_remaining_amount(loan_id, remaining_amount - deduct_this_loan)
-
-        # --- Simple Salary Calculation ---
-        HOURLY_BASE_RATE = base_salary / HOURLY_WORK_HOURS_IN_MONTH
-        overtime_pay = total_overtime_hours * HOURLY_BASE_RATE * OVERTIME_RATE_FACTOR
-        absence_deduction = total_absence_hours * HOURLY_BASE_RATE * ABSENCE_RATE_FACTOR
-
-        # Calculate Net Payment
-        net_payment = base_salary + overtime_pay + benefits - absence_deduction - deductions - total_loan_deduction_for_month
-
-        # Prepare payslip details (can be more structured, e.g., JSON)
-        payslip_details = (
-            f"گزارش فیش حقوقی برای ماه: {payroll_month}\n"
-            f"حقوق پایه: {base_salary:.0f} تومان\n"
-            f"ساعات اضافه کار: {total_overtime_hours:.1f} ساعت (پاداش: {overtime_pay:.0f} تومان)\n"
-            f"ساعات غیبت: {total_absence_hours:.1f} ساعت (کسر: {absence_deduction:.0f} تومان)\n"
-            f"مزایا: {benefits:.0f} تومان\n"
-            f"کسورات متفرقه: {deductions:.0f} تومان\n"
-            f"کسر بابت وام / پیش‌پرداخت: {total_loan_deduction_for_month:.0f} تومان"
-        )
-        if loan_deductions_detail:
-            payslip_details += "\n  - جزئیات کسر وام:\n    " + "\n    ".join(loan_deductions_detail)
-        payslip_details += f"\n\nمبلغ خالص پرداخت: {net_payment:.0f} تومان"
-
-
-        success = record_monthly_payroll_to_db(
-            self.current_employee_id, payroll_month, base_salary,
-            total_overtime_hours, total_absence_hours, benefits, deductions,
-            total_loan_deduction_for_month, net_payment, payslip_details
-        )
-        if success:
-            messagebox.showinfo("موفقیت", "فیش حقوقی با موفقیت ثبت شد.")
+
+        def on_done(recorded_count):
+            messagebox.showinfo("موفقیت", f"{recorded_count} فیش حقوقی برای ماه {payroll_month} ثبت شد.\nکارمندانی که قبلاً فیش داشتند نادیده گرفته شدند.")
             self._load_payroll_history()
-            # Refresh employee info to show updated loan status if any
-            self._search_employee_for_payroll()
-        else:
-            messagebox.showerror("خطا", f"فیش حقوقی برای این کارمند در ماه {payroll_month} قبلاً ثبت شده است.")
 
-        # Clear specific entries after calculation, but keep month for consecutive entries
-        self.benefits_entry.delete(0, tk.END)
-        self.benefits_entry.insert(0, "0")
-        self.deductions_entry.delete(0, tk.END)
-        self.deductions_entry.insert(0, "0")
+        # Cancelling raises inside the run, which rolls the whole month back
+        _run_with_progress(self, f"محاسبه حقوق ماه {payroll_month}...",
+                           lambda progress: run_payroll_for_month(payroll_month, progress=progress),
+                           on_done, "خطا در محاسبه حقوق")
+
+    def _import_time_clock_file(self):
+        """Loads a badge-system export into absences or overtimes on the background worker.
+
+        Cancelling stops at the last committed chunk; choosing the same file again resumes there.
+        """
+        filename = filedialog.askopenfilename(filetypes=[("Time clock files", "*.csv *.xlsx"), ("All files", "*.*")])
+        if not filename:
+            return
+        is_absences = messagebox.askyesnocancel("نوع فایل", "آیا این فایل شامل غیبت‌ها است؟\n(بله: غیبت، خیر: اضافه کار)")
+        if is_absences is None:
+            return
+        kind = "absences" if is_absences else "overtimes"
+
+        def on_done(report):
+            if report.already_completed:
+                messagebox.showinfo("ورود فایل", "این فایل قبلاً به طور کامل وارد شده است.")
+                return
+            summary = f"{report.imported} رکورد وارد شد و {report.duplicates} رکورد تکراری نادیده گرفته شد."
+            if report.resumed_from:
+                summary += f"\nورود از سطر {report.resumed_from + 1} ادامه یافت."
+            _show_import_summary(report, summary, "سطرهای رد شده", "سطر", "گزارش-خطای-ورود-ساعت‌زنی.csv")
 
+        _run_with_progress(self, "در حال ورود فایل ساعت‌زنی...",
+                           lambda progress: import_attendance(filename, kind, progress=progress),
+                           on_done, "خطا در ورود فایل ساعت‌زنی")
 
     def _load_payroll_history(self):
         for item in self.payroll_history_tree.get_children():
             self.payroll_history_tree.delete(item)
 
         if self.current_employee_id:
-            history = get_payroll_history(self.current_employee_id)
-            if not history:
-                self.payroll_history_tree.insert("", tk.END, values=("", "", "", "", "", "", "", "هیچ فیش حقوقی یافت نشد.", ""), tags=('no_data',))
-                self.payroll_history_tree.tag_configure('no_data', foreground='gray', font=('Arial', 10, 'italic'))
-                return
-
-            for record in history:
-                self.payroll_history_tree.insert("", tk.END, values=(
-                    record[0], # payroll_month
-                    f"{record[1]:.0f}", # base_salary_at_time
-                    f"{record[2]:.1f}", # overtime_hours
-                    f"{record[3]:.1f}", # absence_hours
-                    f"{record[4]:.0f}", # benefits
-                    f"{record[5]:.0f}", # deductions
-                    f"{record[6]:.0f}", # loan_deduction
-                    f"{record[7]:.0f}", # net_payment
-                    record[9] # recorded_date
-                ))
+            national_id = self.current_employee_id
+            self.app.task_runner.submit(
+                lambda context: get_payroll_history(national_id), owner=self,
+                on_success=lambda history: self._show_payroll_history(national_id, history))
         else:
             self.payroll_history_tree.insert("", tk.END, values=("", "", "", "", "", "", "", "لطفا ابتدا یک کارمند را جستجو کنید.", ""), tags=('no_data',))
             self.payroll_history_tree.tag_configure('no_data', foreground='gray', font=('Arial', 10, 'italic'))
 
+    def _show_payroll_history(self, national_id, history):
+        if national_id != self.current_employee_id:
+            return # Another employee was selected while this history was loading
+        for item in self.payroll_history_tree.get_children():
+            self.payroll_history_tree.delete(item)
+
+        if not history:
+            self.payroll_history_tree.insert("", tk.END, values=("", "", "", "", "", "", "", "هیچ فیش حقوقی یافت نشد.", ""), tags=('no_data',))
+            self.payroll_history_tree.tag_configure('no_data', foreground='gray', font=('Arial', 10, 'italic'))
+            return
+
+        for record in history:
+            self.payroll_history_tree.insert("", tk.END, values=(
+                record[0], # payroll_month
+                f"{record[1]:.0f}", # base_salary_at_time
+                f"{record[2]:.1f}", # overtime_hours
+                f"{record[3]:.1f}", # absence_hours
+                f"{record[4]:.0f}", # benefits
+                f"{record[5]:.0f}", # deductions
+                f"{record[6]:.0f}", # loan_deduction
+                f"{record[7]:.0f}", # net_payment
+                record[9] # recorded_date
+            ))
+
     def _on_payslip_select(self, event):
         selected_item = self.payroll_history_tree.selection()
         if not selected_item:
@@ -1100,12 +1373,7 @@ class PayrollManagementFrame(tk.Frame):
         item_values = self.payroll_history_tree.item(selected_item[0], 'values')
 
         payroll_month = item_values[0] # YYYY-MM
-        conn = sqlite3.connect(DB_NAME) # Using direct sqlite3 connection here, could add a specific get_payslip_details to database_ops
-        cursor = conn.cursor()
-        cursor.execute("SELECT payslip_details FROM payroll WHERE employee_national_id = ? AND payroll_month = ?",
-                       (self.current_employee_id, payroll_month))
-        payslip_details = cursor.fetchone()[0]
-        conn.close()
+        payslip_details = get_payslip_details(self.current_employee_id, payroll_month)
 
         if payslip_details:
             messagebox.showinfo(f"جزئیات فیش حقوقی {payroll_month}", payslip_details)
@@ -1119,160 +1387,164 @@ class PayrollManagementFrame(tk.Frame):
 
 
 class ReportsFrame(tk.Frame):
+    # Label in the format list -> (reports.REPORT_FORMATS key, file dialog type name)
+    FORMAT_CHOICES = {
+        "اکسل (xlsx)": ("xlsx", "Excel files"),
+        "CSV (سریع)": ("csv", "CSV files"),
+        "JSONL فشرده (سریع)": ("jsonl.gz", "Gzipped JSON Lines"),
+    }
+
     def __init__(self, master, app_instance):
         super().__init__(master, bg="#f9f9f9")
         self.app = app_instance
 
         tk.Label(self, text="گزارش‌گیری", font=("Arial", 16, "bold"), bg="#f9f9f9").pack(pady=20)
 
-        tk.Button(self, text="گزارش لیست کارمندان (اکسل)", font=("Arial", 12, "bold"), command=self._export_employees_to_excel, bg="#008000", fg="white", padx=10, pady=5).pack(pady=10)
-        tk.Button(self, text="گزارش خلاصه حقوق و دستمزد (اکسل)", font=("Arial", 12, "bold"), command=self._export_payroll_summary_to_excel, bg="#008000", fg="white", padx=10, pady=5).pack(pady=10)
-        tk.Button(self, text="گزارش کامل فیش‌های حقوقی (اکسل)", font=("Arial", 12, "bold"), command=self._export_full_payslips_to_excel, bg="#008000", fg="white", padx=10, pady=5).pack(pady=10)
+        format_frame = tk.Frame(self, bg="#f9f9f9")
+        format_frame.pack(pady=5)
+        tk.Label(format_frame, text="قالب خروجی:", font=("Arial", 10), bg="#f9f9f9").pack(side="right")
+        self.format_combobox = ttk.Combobox(format_frame, values=list(self.FORMAT_CHOICES), font=("Arial", 10), width=20, state="readonly")
+        self.format_combobox.set("اکسل (xlsx)") # Default value
+        self.format_combobox.pack(side="right", padx=5)
+
+        tk.Button(self, text="گزارش لیست کارمندان", font=("Arial", 12, "bold"), command=self._export_employees, bg="#008000", fg="white", padx=10, pady=5).pack(pady=10)
+        tk.Button(self, text="گزارش خلاصه حقوق و دستمزد", font=("Arial", 12, "bold"), command=self._export_payroll_summary, bg="#008000", fg="white", padx=10, pady=5).pack(pady=10)
+        tk.Button(self, text="گزارش کامل فیش‌های حقوقی", font=("Arial", 12, "bold"), command=self._export_full_payslips, bg="#008000", fg="white", padx=10, pady=5).pack(pady=10)
 
 
         tk.Button(self, text="بازگشت به منو", font=("Arial", 12), command=self.app.create_main_menu_frame, bg="#FFC107", fg="black", padx=10, pady=5).pack(pady=30)
 
-    def _export_employees_to_excel(self):
-        filename = filedialog.asksaveasfilename(defaultextension=".xlsx",
-                                               filetypes=[("Excel files", "*.xlsx")],
-                                               initialfile="گزارش-کارمندان.xlsx")
+    def _ask_filename(self, initial_name):
+        """Save dialog for the selected format; returns (filename, format), filename empty if cancelled."""
+        fmt, type_name = self.FORMAT_CHOICES[self.format_combobox.get()]
+        extension = REPORT_FORMATS[fmt]
+        filename = filedialog.asksaveasfilename(defaultextension=extension,
+                                               filetypes=[(type_name, f"*{extension}")],
+                                               initialfile=initial_name + extension)
+        return filename, fmt
+
+    def _export_employees(self):
+        filename, fmt = self._ask_filename("گزارش-کارمندان")
         if not filename:
             return
+        self._run_export("employees", fmt, filename,
+                         f"گزارش لیست کارمندان با موفقیت در '{filename}' ذخیره شد.",
+                         "هیچ کارمندی در سیستم ثبت نشده است.")
 
-        try:
-            workbook = openpyxl.Workbook()
-            sheet = workbook.active
-            sheet.title = "لیست کارمندان"
-
-            headers = ["کد ملی", "نام", "نام خانوادگی", "سمت", "حقوق ثابت"]
-            sheet.append(headers)
-
-            employees_data = get_employee_data()
-            for emp in employees_data:
-                sheet.append(list(emp)) # Convert tuple to list for append
-
-            workbook.save(filename)
-            messagebox.showinfo("موفقیت", f"گزارش لیست کارمندان با موفقیت در '{filename}' ذخیره شد.")
-        except Exception as e:
-            messagebox.showerror("خطا", f"خطا در ذخیره فایل اکسل: {e}")
-
-    def _export_payroll_summary_to_excel(self):
-        filename = filedialog.asksaveasfilename(defaultextension=".xlsx",
-                                               filetypes=[("Excel files", "*.xlsx")],
-                                               initialfile="گزارش-خلاصه-حقوق-دستمزد.xlsx")
+    def _export_payroll_summary(self):
+        filename, fmt = self._ask_filename("گزارش-خلاصه-حقوق-دستمزد")
         if not filename:
             return
+        self._run_export("payroll_summary", fmt, filename,
+                         f"گزارش خلاصه حقوق و دستمزد با موفقیت در '{filename}' ذخیره شد.",
+                         "هیچ کارمندی در سیستم ثبت نشده است.")
 
-        try:
-            workbook = openpyxl.Workbook()
-            sheet = workbook.active
-            sheet.title = "خلاصه حقوق و دستمزد"
-
-            headers = ["کد ملی", "نام", "نام خانوادگی", "حقوق ثابت", "مجموع پرداختی خالص", "مجموع وام های فعال", "مجموع باقیمانده وام ها"]
-            sheet.append(headers)
-
-            employees_data = get_employee_data()
-            conn = sqlite3.connect(DB_NAME)
-            cursor = conn.cursor()
-
-            for emp in employees_data:
-                national_id = emp[0]
-                base_salary = emp[4]
-
-                # Sum all net_payment from payroll table for a simplified "Total Paid"
-                cursor.execute("SELECT SUM(net_payment) FROM payroll WHERE employee_national_id = ?", (national_id,))
-                total_net_paid = cursor.fetchone()[0] or 0
-
-                # Sum active loans for current employee
-                cursor.execute("SELECT SUM(amount), SUM(remaining_amount) FROM loans WHERE employee_national_id = ? AND is_active = 1", (national_id,))
-                loan_summary = cursor.fetchone()
-                total_loan_amount = loan_summary[0] or 0
-                total_loan_remaining = loan_summary[1] or 0
-
-                row_data = [
-                    national_id,
-                    emp[1], # first_name
-                    emp[2], # last_name
-                    base_salary,
-                    total_net_paid,
-                    total_loan_amount,
-                    total_loan_remaining
-                ]
-                sheet.append(row_data)
-
-            conn.close()
-            # Auto-size columns for better readability
-            for col in sheet.columns:
-                max_length = 0
-                column = col[0].column_letter # Get the column name
-                for cell in col:
-                    try: # Necessary to avoid error on empty cells
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = (max_length + 2) * 1.2
-                sheet.column_dimensions[column].width = adjusted_width
-
-
-            workbook.save(filename)
-            messagebox.showinfo("موفقیت", f"گزارش خلاصه حقوق و دستمزد با موفقیت در '{filename}' ذخیره شد.")
-        except Exception as e:
-            messagebox.showerror("خطا", f"خطا در ذخیره فایل اکسل: {e}")
-
-    def _export_full_payslips_to_excel(self):
-        filename = filedialog.asksaveasfilename(defaultextension=".xlsx",
-                                               filetypes=[("Excel files", "*.xlsx")],
-                                               initialfile="گزارش-فیش‌های-حقوقی-کامل.xlsx")
+    def _export_full_payslips(self):
+        filename, fmt = self._ask_filename("گزارش-فیش‌های-حقوقی-کامل")
         if not filename:
             return
+        self._run_export("full_payslips", fmt, filename,
+                         f"گزارش کامل فیش‌های حقوقی با موفقیت در '{filename}' ذخیره شد.",
+                         "هیچ فیش حقوقی در سیستم ثبت نشده است.")
+
+    def _run_export(self, report, fmt, filename, success_message, empty_message):
+        """Runs an export on the background worker, with a progress dialog that can cancel it."""
+        def on_done(row_count):
+            if not row_count:
+                messagebox.showwarning("گزارش خالی", empty_message)
+            else:
+                messagebox.showinfo("موفقیت", success_message)
+
+        _run_with_progress(self, "در حال تهیه گزارش...",
+                           lambda progress: export_report(report, filename, fmt, progress=progress),
+                           on_done, "خطا در ذخیره فایل گزارش")
 
-        try:
-            workbook = openpyxl.Workbook()
-            sheet = workbook.active
-            sheet.title = "فیش‌های حقوقی کامل"
-
-            headers = ["کد ملی", "نام", "نام خانوادگی", "ماه", "حقوق پایه (زمان فیش)", "ساعت اضافه کار", "ساعت غیبت", "مزایا", "کسورات متفرقه", "کسر وام", "خالص پرداخت", "تاریخ ثبت فیش", "جزئیات فیش"]
-            sheet.append(headers)
-
-            conn = sqlite3.connect(DB_NAME)
-            cursor = conn.cursor()
-
-            # Fetch all payroll records with employee names
-            cursor.execute('''
-                SELECT 
-                    e.national_id, e.first_name, e.last_name, 
-                    p.payroll_month, p.base_salary_at_time, p.overtime_hours, 
-                    p.absence_hours, p.benefits, p.deductions, p.loan_deduction, 
-                    p.net_payment, p.recorded_date, p.payslip_details
-                FROM payroll p
-                JOIN employees e ON p.employee_national_id = e.national_id
-                ORDER BY e.national_id, p.payroll_month DESC
-            ''')
-            all_payslips = cursor.fetchall()
-            conn.close()
-
-            if not all_payslips:
-                messagebox.showwarning("گزارش خالی", "هیچ فیش حقوقی در سیستم ثبت نشده است.")
-                return
 
-            for payslip in all_payslips:
-                sheet.append(list(payslip))
-
-            # Auto-size columns
-            for col in sheet.columns:
-                max_length = 0
-                column = col[0].column_letter
-                for cell in col:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = (max_length + 2) * 1.2
-                sheet.column_dimensions[column].width = adjusted_width
-
-            workbook.save(filename)
-            messagebox.showinfo("موفقیت", f"گزارش کامل فیش‌های حقوقی با موفقیت در '{filename}' ذخیره شد.")
-        except Exception as e:
-            messagebox.showerror("خطا", f"خطا در ذخیره فایل اکسل: {e}")
\ No newline at end of file
+class DiagnosticsFrame(tk.Frame):
+    """Shows what instrumentation.py has collected: per-function and per-query latency, the
+    slow-query log and the employee cache counters."""
+
+    def __init__(self, master, app_instance):
+        super().__init__(master, bg="#f9f9f9")
+        self.app = app_instance
+
+        tk.Label(self, text="عیب‌یابی و کارایی پایگاه داده", font=("Arial", 16, "bold"), bg="#f9f9f9").pack(pady=15)
+        self.status_label = tk.Label(self, font=("Arial", 11), bg="#f9f9f9", justify="right")
+        self.status_label.pack(pady=5)
+
+        buttons_frame = tk.Frame(self, bg="#f9f9f9")
+        buttons_frame.pack(side=tk.BOTTOM, pady=10)
+        tk.Button(buttons_frame, text="بازگشت به منو", font=("Arial", 12), command=self.app.create_main_menu_frame, bg="#FFC107", fg="black", padx=10, pady=5).pack(side=tk.RIGHT, padx=5)
+        tk.Button(buttons_frame, text="ذخیره در فایل", font=("Arial", 12), command=self._save_to_file, bg="#2196F3", fg="white", padx=10, pady=5).pack(side=tk.RIGHT, padx=5)
+        tk.Button(buttons_frame, text="پاک کردن آمار", font=("Arial", 12), command=self._reset, bg="#F44336", fg="white", padx=10, pady=5).pack(side=tk.RIGHT, padx=5)
+        tk.Button(buttons_frame, text="به‌روزرسانی", font=("Arial", 12), command=self._refresh, bg="#4CAF50", fg="white", padx=10, pady=5).pack(side=tk.RIGHT, padx=5)
+
+        notebook = ttk.Notebook(self)
+        notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        histogram_columns = tuple(instrumentation.histogram_labels())
+        self.functions_tree = self._add_tree(notebook, "توابع", ("name", "count", "mean_ms", "max_ms", "total_ms") + histogram_columns,
+                                             {"name": ("تابع", 260), "count": ("تعداد", 70), "mean_ms": ("میانگین (ms)", 90),
+                                              "max_ms": ("بیشینه (ms)", 90), "total_ms": ("مجموع (ms)", 90)})
+        self.queries_tree = self._add_tree(notebook, "پرس‌وجوها", ("sql", "count", "mean_ms", "max_ms", "total_ms", "rows") + histogram_columns,
+                                           {"sql": ("SQL", 380), "count": ("تعداد", 70), "mean_ms": ("میانگین (ms)", 90),
+                                            "max_ms": ("بیشینه (ms)", 90), "total_ms": ("مجموع (ms)", 90), "rows": ("ردیف‌ها", 80)})
+        self.slow_tree = self._add_tree(notebook, "پرس‌وجوهای کند", ("time", "ms", "rows", "thread", "sql"),
+                                        {"time": ("زمان", 150), "ms": ("مدت (ms)", 80), "rows": ("ردیف‌ها", 70),
+                                         "thread": ("رشته", 110), "sql": ("SQL", 480)})
+        self._refresh()
+
+    def _add_tree(self, notebook, title, columns, headings):
+        tab = tk.Frame(notebook)
+        notebook.add(tab, text=title)
+        tree = ttk.Treeview(tab, columns=columns, show="headings")
+        for column in columns:
+            text, width = headings.get(column, (column, 70))
+            tree.heading(column, text=text, anchor="center")
+            tree.column(column, width=width, anchor="w" if column in ("name", "sql") else "center", stretch=column in ("name", "sql"))
+        scrollbar = ttk.Scrollbar(tab, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tree.pack(fill=tk.BOTH, expand=True)
+        return tree
+
+    @staticmethod
+    def _fill(tree, rows):
+        tree.delete(*tree.get_children())
+        for values in rows:
+            tree.insert("", tk.END, values=values)
+
+    def _refresh(self):
+        data = instrumentation.snapshot()
+        cache = get_employee_cache_stats()
+        if data["enabled"]:
+            status = f"ثبت آمار فعال است (از {data['since']})؛ آستانه پرس‌وجوی کند: {data['slow_query_ms']:g} میلی‌ثانیه"
+        else:
+            status = "ثبت آمار غیرفعال است؛ برای فعال‌سازی SQL_TRACE را در config.py روشن کنید یا برنامه را با PAYROLL_SQL_TRACE=1 اجرا کنید."
+        self.status_label.config(text=f"{status}\nحافظه نهان کارمندان: {cache['hits']} برخورد، {cache['misses']} عدم برخورد، "
+                                      f"{cache['size']} از {cache['maxsize']} رکورد")
+
+        def stats_values(stats):
+            return (stats["count"], f"{stats['mean_ms']:.3f}", f"{stats['max_ms']:.3f}", f"{stats['total_ms']:.1f}")
+
+        self._fill(self.functions_tree, ((name,) + stats_values(stats) + tuple(stats["histogram"].values())
+                                         for name, stats in data["functions"].items()))
+        self._fill(self.queries_tree, ((sql,) + stats_values(stats) + (stats["rows"],) + tuple(stats["histogram"].values())
+                                       for sql, stats in data["queries"].items()))
+        self._fill(self.slow_tree, ((entry["time"], f"{entry['ms']:.1f}", entry["rows"], entry["thread"], entry["sql"])
+                                    for entry in reversed(data["slow_queries"])))
+
+    def _reset(self):
+        instrumentation.reset()
+        self._refresh()
+
+    def _save_to_file(self):
+        filename = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")],
+                                                initialfile="diagnostics.json")
+        if not filename:
+            return
+        try:
+            instrumentation.dump(filename, extra={"employee_cache": get_employee_cache_stats()})
+        except OSError as e:
+            messagebox.showerror("خطا", f"خطا در ذخیره فایل: {e}")
+            return
+        messagebox.showinfo("موفقیت", f"آمار در '{filename}' ذخیره شد.")
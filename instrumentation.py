@@ -0,0 +1,328 @@
+# instrumentation.py
+# Opt-in latency instrumentation for database_ops: per-statement and per-function latency
+# histograms, row counts and a slow-query log. Off unless config.SQL_TRACE is set or the
+# PAYROLL_SQL_TRACE environment variable is "1"; when off, connections are plain sqlite3
+# connections and the function wrappers cost one flag check.
+#
+# Statements are timed by the cursor (execute plus fetching the rows), and the trace callback
+# additionally counts every statement SQLite runs, including trigger bodies and the BEGIN/COMMIT
+# the sqlite3 module issues itself.
+
+import functools
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from config import SQL_TRACE, SQL_SLOW_QUERY_MS, SQL_SLOW_QUERY_LOG_SIZE
+
+HISTOGRAM_BOUNDS_MS = (0.1, 1, 10, 100, 1000) # Upper bounds of the latency buckets; the last bucket is open
+MAX_SQL_LENGTH = 300 # Statements are keyed (and shown) by their first characters
+
+
+def _env_flag(name, default):
+    value = os.environ.get(name)
+    return default if value is None else value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_float(name, default):
+    try:
+        return float(os.environ[name])
+    except (KeyError, ValueError):
+        return default
+
+
+_enabled = _env_flag("PAYROLL_SQL_TRACE", SQL_TRACE)
+_slow_query_ms = _env_float("PAYROLL_SLOW_QUERY_MS", SQL_SLOW_QUERY_MS)
+_lock = threading.Lock()
+_dropped = deque() # (sql, seconds, rows) of cursors garbage-collected mid-read; see TracedCursor.__del__
+_queries = {} # Normalised SQL -> LatencyStats
+_functions = {} # database_ops function name -> LatencyStats
+_statement_counts = {} # Trace callback: statement text -> executions seen by SQLite
+_slow_queries = deque(maxlen=SQL_SLOW_QUERY_LOG_SIZE)
+_started = datetime.now()
+
+
+class LatencyStats:
+    """Call count, total/max latency, rows and a bucketed latency histogram."""
+
+    __slots__ = ("count", "total", "max", "rows", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+    def add(self, seconds, rows=0):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.rows += rows
+        milliseconds = seconds * 1000
+        for i, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+            if milliseconds < bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total * 1000 / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+            "rows": self.rows,
+            "histogram": dict(zip(histogram_labels(), self.buckets)),
+        }
+
+
+def histogram_labels():
+    """Bucket names matching LatencyStats.buckets, e.g. "<1ms" and ">=1000ms"."""
+    return [f"<{bound:g}ms" for bound in HISTOGRAM_BOUNDS_MS] + [f">={HISTOGRAM_BOUNDS_MS[-1]:g}ms"]
+
+
+def is_enabled():
+    return _enabled
+
+
+def enable(slow_query_ms=None):
+    """Turns instrumentation on. Only connections opened afterwards are traced, so call it
+    before the first database access (or close the connections first)."""
+    global _enabled, _slow_query_ms
+    _enabled = True
+    if slow_query_ms is not None:
+        _slow_query_ms = float(slow_query_ms)
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def reset():
+    """Clears every collected statistic."""
+    global _started
+    with _lock:
+        _dropped.clear()
+        _queries.clear()
+        _functions.clear()
+        _statement_counts.clear()
+        _slow_queries.clear()
+        _started = datetime.now()
+
+
+def _normalise(sql):
+    return " ".join(sql.split())[:MAX_SQL_LENGTH]
+
+
+def _add_query(sql, seconds, rows):
+    # Called with _lock held
+    key = _normalise(sql)
+    stats = _queries.get(key)
+    if stats is None:
+        stats = _queries[key] = LatencyStats()
+    stats.add(seconds, rows)
+    if seconds * 1000 >= _slow_query_ms:
+        _slow_queries.append({
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "ms": round(seconds * 1000, 3),
+            "rows": rows,
+            "thread": threading.current_thread().name,
+            "sql": key,
+        })
+
+
+def _add_dropped():
+    # Called with _lock held
+    while True:
+        try:
+            _add_query(*_dropped.popleft())
+        except IndexError:
+            return
+
+
+def record_query(sql, seconds, rows=0):
+    with _lock:
+        _add_dropped()
+        _add_query(sql, seconds, rows)
+
+
+def record_function(name, seconds):
+    with _lock:
+        stats = _functions.get(name)
+        if stats is None:
+            stats = _functions[name] = LatencyStats()
+        stats.add(seconds)
+
+
+def count_statement(sql):
+    """sqlite3 trace callback: counts each statement SQLite starts (trigger bodies included)."""
+    key = _normalise(sql)
+    with _lock:
+        _statement_counts[key] = _statement_counts.get(key, 0) + 1
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor that times each statement from execute() until its rows are consumed."""
+
+    _sql = None
+    _elapsed = 0.0
+    _rows = 0
+
+    def _finish(self):
+        if self._sql is not None:
+            record_query(self._sql, self._elapsed, self._rows)
+            self._sql = None
+
+    def _timed(self, method, sql, *args):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            return method(sql, *args)
+        finally:
+            self._sql = sql
+            self._elapsed = time.perf_counter() - start
+            self._rows = max(self.rowcount, 0) # DML; SELECT rows are counted as they are fetched
+
+    def execute(self, sql, parameters=()):
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._timed(super().executemany, sql, seq_of_parameters)
+
+    def _fetched(self, start, rows, exhausted):
+        self._elapsed += time.perf_counter() - start
+        self._rows += rows
+        if exhausted:
+            self._finish()
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(start, len(rows), not rows)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows), True)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, 0, True)
+            raise
+        self._fetched(start, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # Cursors dropped before all rows were read. The garbage collector can run this while the
+        # same thread holds _lock, so only queue the statement; the next record_query or snapshot
+        # adds it (deque.append is atomic).
+        if self._sql is not None:
+            _dropped.append((self._sql, self._elapsed, self._rows))
+            self._sql = None
+
+
+class TracedConnection(sqlite3.Connection):
+    """Connection whose cursors (including those of the execute shortcuts) are TracedCursors,
+    and whose commits and rollbacks are timed as statements too."""
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        start = time.perf_counter()
+        super().commit()
+        record_query("COMMIT (connection.commit)", time.perf_counter() - start)
+
+    def rollback(self):
+        start = time.perf_counter()
+        super().rollback()
+        record_query("ROLLBACK (connection.rollback)", time.perf_counter() - start)
+
+
+def connection_factory():
+    """The sqlite3.connect factory to use for a new connection."""
+    return TracedConnection if _enabled else sqlite3.Connection
+
+
+def install(conn):
+    """Hooks the trace callback into a new connection when instrumentation is on."""
+    if _enabled and isinstance(conn, TracedConnection):
+        conn.set_trace_callback(count_statement)
+
+
+def instrument_functions(namespace, module_name, exclude=()):
+    """Wraps the public functions defined in module_name (in its globals(), namespace) so their
+    latency is recorded while instrumentation is on. Context managers are left alone (calling
+    one only creates the generator), as are the names in exclude."""
+    for name, func in list(namespace.items()):
+        if (name.startswith("_") or name in exclude or not hasattr(func, "__code__")
+                or func.__module__ != module_name or hasattr(func, "__wrapped__")):
+            continue
+        namespace[name] = _timed_function(func, f"{module_name}.{name}")
+
+
+def _timed_function(func, name):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record_function(name, time.perf_counter() - start)
+    return wrapper
+
+
+def snapshot():
+    """Returns everything collected so far as a JSON-serialisable dict."""
+    with _lock:
+        _add_dropped()
+        return {
+            "enabled": _enabled,
+            "since": _started.isoformat(timespec="seconds"),
+            "slow_query_ms": _slow_query_ms,
+            "queries": {sql: stats.as_dict() for sql, stats in
+                        sorted(_queries.items(), key=lambda item: item[1].total, reverse=True)},
+            "functions": {name: stats.as_dict() for name, stats in
+                          sorted(_functions.items(), key=lambda item: item[1].total, reverse=True)},
+            "statements_seen_by_sqlite": dict(sorted(_statement_counts.items(), key=lambda item: item[1], reverse=True)),
+            "slow_queries": list(_slow_queries),
+        }
+
+
+def dump(filename, extra=None):
+    """Writes snapshot() (plus any extra top-level entries) to filename as JSON."""
+    data = snapshot()
+    if extra:
+        data.update(extra)
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
@@ -1,8 +1,9 @@
 # main_app.py
 
 import tkinter as tk
-from database_ops import init_db # Import init_db from database_ops
-from frames import LoginFrame, MainMenuFrame, AddEmployeeFrame, ViewEmployeesFrame, SearchEditDeleteFrame, PayrollManagementFrame, AbsenceOvertimeLeaveFrame, ReportsFrame
+from database_ops import init_db, close_all_connections # Import DB setup/teardown from database_ops
+from task_runner import BackgroundTaskRunner
+from frames import LoginFrame, MainMenuFrame, AddEmployeeFrame, ViewEmployeesFrame, SearchEditDeleteFrame, PayrollManagementFrame, AbsenceOvertimeLeaveFrame, ReportsFrame, DiagnosticsFrame
 
 class EmployeeManagerApp:
     def __init__(self, master):
@@ -12,6 +13,7 @@ class EmployeeManagerApp:
         master.resizable(True, True) # Allow resizing for better table view
 
         init_db() # Initialize the database
+        self.task_runner = BackgroundTaskRunner(master) # Runs DB/export jobs off the Tk thread
 
         master.grid_columnconfigure(0, weight=1)
         master.grid_rowconfigure(0, weight=1)
@@ -51,8 +53,13 @@ class EmployeeManagerApp:
     def create_reports_frame(self):
         self.show_frame(ReportsFrame)
 
+    def create_diagnostics_frame(self):
+        self.show_frame(DiagnosticsFrame)
+
 # --- Main execution ---
 if __name__ == "__main__":
     root = tk.Tk()
     app = EmployeeManagerApp(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    app.task_runner.shutdown()
+    close_all_connections() # Flush and release the pooled SQLite connections
\ No newline at end of file
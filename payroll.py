@@ -0,0 +1,205 @@
+# payroll.py
+# Payroll calculation, independent of the GUI so it can be shared by the per-employee
+# screen and the batch (whole company) run.
+
+from config import HOURLY_WORK_HOURS_IN_MONTH, OVERTIME_RATE_FACTOR, ABSENCE_RATE_FACTOR
+from payslips import encode_payslip_details
+from database_ops import (
+    transaction, get_employees_without_payroll, get_overtime_totals_for_month,
+    get_absence_totals_for_month, get_active_loans_by_employee, record_payroll_and_loans,
+    get_employee_data, get_overtimes_in_month, get_absences_in_month, get_active_loans
+)
+
+PROGRESS_CHUNK_SIZE = 1000 # Employees calculated between progress reports
+
+
+def calculate_loan_deductions(active_loans):
+    """Works out this month's installment for each active loan.
+
+    active_loans are rows as returned by get_active_loans:
+    (loan_id, loan_date, amount, remaining_amount, installment_amount, description).
+    Returns (total_deduction, [(loan_id, deducted, new_remaining_amount), ...]).
+    """
+    total_loan_deduction = 0
+    loan_deductions = []
+    for loan_id, loan_date, amount, remaining_amount, installment_amount, description in active_loans:
+        installment_amount = installment_amount or 0 # installment_amount is optional (NULL)
+        deduct_this_loan = min(installment_amount, remaining_amount) if installment_amount > 0 else 0
+        if deduct_this_loan > 0:
+            total_loan_deduction += deduct_this_loan
+            loan_deductions.append((loan_id, deduct_this_loan, remaining_amount - deduct_this_loan))
+    return total_loan_deduction, loan_deductions
+
+
+def calculate_payslip(payroll_month, base_salary, overtime_hours, absence_hours, benefits, deductions, active_loans):
+    """Calculates one employee's monthly payslip. Pure function, no database access.
+
+    Returns a dict with the amounts, the loan updates to apply and the stored payslip record.
+    """
+    total_loan_deduction, loan_deductions = calculate_loan_deductions(active_loans)
+
+    # --- Simple Salary Calculation ---
+    hourly_base_rate = base_salary / HOURLY_WORK_HOURS_IN_MONTH
+    overtime_pay = overtime_hours * hourly_base_rate * OVERTIME_RATE_FACTOR
+    absence_deduction = absence_hours * hourly_base_rate * ABSENCE_RATE_FACTOR
+
+    # Calculate Net Payment
+    net_payment = base_salary + overtime_pay + benefits - absence_deduction - deductions - total_loan_deduction
+
+    payslip = {
+        "payroll_month": payroll_month,
+        "base_salary": base_salary,
+        "overtime_hours": overtime_hours,
+        "absence_hours": absence_hours,
+        "overtime_pay": overtime_pay,
+        "absence_deduction": absence_deduction,
+        "benefits": benefits,
+        "deductions": deductions,
+        "loan_deduction": total_loan_deduction,
+        "loan_deductions": loan_deductions,
+        "net_payment": net_payment,
+        "rates": [HOURLY_WORK_HOURS_IN_MONTH, OVERTIME_RATE_FACTOR, ABSENCE_RATE_FACTOR],
+    }
+    # Stored compactly; the text is rendered by payslips.format_payslip_details when shown
+    payslip["payslip_details"] = encode_payslip_details(payslip)
+    return payslip
+
+
+def payroll_row(national_id, payslip):
+    """Column values of a payroll table row (without recorded_date) for a calculated payslip."""
+    return (
+        national_id, payslip["payroll_month"], payslip["base_salary"],
+        payslip["overtime_hours"], payslip["absence_hours"], payslip["benefits"], payslip["deductions"],
+        payslip["loan_deduction"], payslip["net_payment"], payslip["payslip_details"]
+    )
+
+
+def record_employee_payroll(national_id, payroll_month, benefits, deductions):
+    """Calculates and records one employee's payslip for payroll_month.
+
+    Returns None if the employee doesn't exist, otherwise (recorded, payslip); recorded is
+    False when a payslip for that month already exists.
+    """
+    # One write transaction for the reads and the writes: the loans' remaining amounts are written
+    # back as absolute values, so another writer recording in between must not be able to slip in
+    with transaction():
+        # Fetch employee's current base salary
+        emp_data = get_employee_data(national_id)
+        if not emp_data:
+            return None
+        base_salary = emp_data[4]
+
+        # Calculate total overtime and absence for the given month
+        total_overtime_hours = get_overtimes_in_month(national_id, payroll_month)
+        total_absence_hours = get_absences_in_month(national_id, payroll_month)
+
+        payslip = calculate_payslip(payroll_month, base_salary, total_overtime_hours, total_absence_hours,
+                                    benefits, deductions, get_active_loans(national_id))
+        loan_updates = [(loan_id, new_remaining_amount) for loan_id, _, new_remaining_amount in payslip["loan_deductions"]]
+        # The loans are only decremented if the payslip could be recorded
+        recorded = record_payroll_and_loans([payroll_row(national_id, payslip)], loan_updates)
+    return recorded, payslip
+
+
+def _calculate_payroll_chunk(payroll_month, benefits, deductions, employee_inputs):
+    """Calculates the payslips of one shard of employees. Runs in a worker process when parallel.
+
+    employee_inputs: (national_id, base_salary, overtime_hours, absence_hours, active_loans) tuples.
+    Returns (payroll_rows, loan_updates) in the same order as employee_inputs.
+    """
+    payroll_rows = []
+    loan_updates = []
+    for national_id, base_salary, overtime_hours, absence_hours, active_loans in employee_inputs:
+        payslip = calculate_payslip(payroll_month, base_salary, overtime_hours, absence_hours,
+                                    benefits, deductions, active_loans)
+        payroll_rows.append(payroll_row(national_id, payslip))
+        loan_updates.extend((loan_id, new_remaining) for loan_id, _, new_remaining in payslip["loan_deductions"])
+    return payroll_rows, loan_updates
+
+
+def _calculate_payroll_chunk_star(args):
+    return _calculate_payroll_chunk(*args)
+
+
+def _calculate_payroll(payroll_month, benefits, deductions, employee_inputs, workers, progress):
+    """Calculates every payslip of employee_inputs, sharded across a process pool when workers > 1.
+    Touches no database. Returns (payroll_rows, loan_updates) in employee_inputs order."""
+    payroll_rows = []
+    loan_updates = []
+    if workers > 1 and len(employee_inputs) > workers:
+        chunk_size = -(-len(employee_inputs) // (workers * 4)) # A few shards per worker evens out the load
+        chunks = [
+            (payroll_month, benefits, deductions, employee_inputs[i:i + chunk_size])
+            for i in range(0, len(employee_inputs), chunk_size)
+        ]
+        # Pull in multiprocessing only here. Workers are spawned rather than forked, so they never
+        # inherit the open SQLite connections of this process.
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            # map() yields results in submission order, which keeps the output deterministic
+            for chunk_rows, chunk_loan_updates in executor.map(_calculate_payroll_chunk_star, chunks):
+                payroll_rows.extend(chunk_rows)
+                loan_updates.extend(chunk_loan_updates)
+                if progress:
+                    progress(len(payroll_rows), len(employee_inputs))
+    else:
+        for i in range(0, len(employee_inputs), PROGRESS_CHUNK_SIZE):
+            chunk_rows, chunk_loan_updates = _calculate_payroll_chunk(
+                payroll_month, benefits, deductions, employee_inputs[i:i + PROGRESS_CHUNK_SIZE])
+            payroll_rows.extend(chunk_rows)
+            loan_updates.extend(chunk_loan_updates)
+            if progress:
+                progress(len(payroll_rows), len(employee_inputs))
+    return payroll_rows, loan_updates
+
+
+def run_payroll_for_month(payroll_month, benefits=0, deductions=0, workers=1, progress=None):
+    """Calculates and records the payroll of every employee for payroll_month (YYYY-MM).
+
+    Attendance is aggregated with one GROUP BY per table, loans are loaded in one query,
+    and all payslips plus loan updates are written in a single transaction. Employees who
+    already have a payslip for the month are skipped and their loans are left untouched.
+    With workers > 1 the calculation is sharded across a process pool; shards are merged
+    back in national_id order, so the result is identical to a single-process run.
+    The inputs are read from one snapshot and calculated without holding the write lock, so
+    other writers only wait for the final merge.
+    progress, if given, is called as progress(done, total) while calculating; raising from it
+    cancels the run before anything is written. Returns the number of payslips recorded.
+    """
+    with transaction(immediate=False): # One consistent read, without blocking writers
+        employees = get_employees_without_payroll(payroll_month)
+        overtime_totals = get_overtime_totals_for_month(payroll_month)
+        absence_totals = get_absence_totals_for_month(payroll_month)
+        loans_by_employee = get_active_loans_by_employee()
+
+    employee_inputs = [
+        (national_id, base_salary, overtime_totals.get(national_id, 0), absence_totals.get(national_id, 0),
+         loans_by_employee.get(national_id, ()))
+        for national_id, base_salary in employees
+    ]
+    payroll_rows, loan_updates = _calculate_payroll(payroll_month, benefits, deductions, employee_inputs, workers, progress)
+
+    with transaction():
+        # Writes may have landed while calculating. Employees recorded meanwhile (or deleted) are
+        # dropped, so no loan is decremented twice; loan remainders are written as absolute values,
+        # so employees whose active loans changed are recalculated against the current ones.
+        pending = {national_id for national_id, _ in get_employees_without_payroll(payroll_month)}
+        current_loans = get_active_loans_by_employee()
+        stale_inputs = [
+            (national_id, base_salary, overtime_hours, absence_hours, current_loans.get(national_id, ()))
+            for national_id, base_salary, overtime_hours, absence_hours, active_loans in employee_inputs
+            if national_id in pending and list(current_loans.get(national_id, ())) != list(active_loans)
+        ]
+        stale_rows, stale_loan_updates = _calculate_payroll_chunk(payroll_month, benefits, deductions, stale_inputs)
+        recalculated = {row[0]: row for row in stale_rows}
+        loan_owners = {loan[0]: national_id for national_id, loans in loans_by_employee.items() for loan in loans}
+
+        payroll_rows = [recalculated.get(row[0], row) for row in payroll_rows if row[0] in pending]
+        loan_updates = [
+            (loan_id, new_remaining) for loan_id, new_remaining in loan_updates
+            if loan_owners[loan_id] in pending and loan_owners[loan_id] not in recalculated
+        ] + stale_loan_updates
+        record_payroll_and_loans(payroll_rows, loan_updates)
+    return len(payroll_rows)
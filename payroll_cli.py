@@ -0,0 +1,248 @@
+# payroll_cli.py
+# Headless entry point for nightly and month-end jobs (no display needed).
+# Deliberately imports nothing GUI related: no tkinter, frames or task_runner, and openpyxl is only
+# loaded by the report command. Start-up cost is measured by benchmarks/bench_cli_startup.py.
+
+import argparse
+import sys
+from datetime import datetime
+
+import database_ops
+import instrumentation
+from database_ops import init_db, close_all_connections, get_connection
+
+REPORTS = {
+    # name: (reports.REPORT_DEFINITIONS name, what the row count means)
+    "employees": ("employees", "کارمند"),
+    "payslips": ("full_payslips", "فیش حقوقی"),
+    "summary": ("payroll_summary", "کارمند"),
+}
+REPORT_FORMATS = ("xlsx", "csv", "jsonl.gz") # reports.REPORT_FORMATS, repeated so --help needs no import
+
+
+def _print_progress(done, total=None):
+    """Progress goes to stderr so stdout stays clean for scripts."""
+    if total:
+        print(f"\r{done}/{total}", end="", file=sys.stderr, flush=True)
+    else:
+        print(f"\r{done}", end="", file=sys.stderr, flush=True)
+
+
+def _valid_month(value):
+    try:
+        valid = datetime.strptime(value, "%Y-%m").strftime("%Y-%m") == value # strptime alone accepts "2024-1"
+    except ValueError:
+        valid = False
+    if not valid:
+        raise argparse.ArgumentTypeError("فرمت ماه باید YYYY-MM باشد.")
+    return value
+
+
+def cmd_status(args):
+    """Prints row counts; also the cheapest way to check that the database opens."""
+    conn = get_connection()
+    for table in ("employees", "payroll", "absences", "overtimes", "loans"):
+        count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        print(f"{table}: {count}")
+    return 0
+
+
+def cmd_payroll(args):
+    """Calculates and records payslips for every employee without one for the month."""
+    from payroll import run_payroll_for_month
+
+    recorded = run_payroll_for_month(args.month, args.benefits, args.deductions, workers=args.workers,
+                                     progress=None if args.quiet else _print_progress)
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"فیش حقوقی {recorded} کارمند برای ماه {args.month} ثبت شد.")
+    return 0
+
+
+def cmd_import_attendance(args):
+    """Loads a time-clock export (CSV or xlsx of national_id,date,hours[,note]) into absences or
+    overtimes. An interrupted run of the same file resumes from its last checkpoint."""
+    from attendance_import import import_attendance
+
+    report = import_attendance(args.file, args.kind, restart=args.restart,
+                               progress=None if args.quiet else _print_progress)
+    if report.already_completed:
+        print("این فایل قبلاً به طور کامل وارد شده است (برای ورود دوباره از --restart استفاده کنید).")
+        return 0
+    if not args.quiet and report.rows_read:
+        print(file=sys.stderr)
+    _report_errors(report, args)
+    if report.resumed_from:
+        print(f"ادامه از سطر {report.resumed_from + 1}.")
+    print(f"{report.imported} رکورد وارد شد، {report.duplicates} رکورد تکراری نادیده گرفته شد، {len(report.errors)} سطر نامعتبر.")
+    return 1 if report.errors else 0
+
+
+def _report_errors(report, args):
+    """Writes rejected rows to --errors if given, otherwise lists them on stderr."""
+    if args.errors and report.errors:
+        report.write_errors_csv(args.errors)
+    elif not args.quiet:
+        for row_number, national_id, message in report.errors:
+            print(f"سطر {row_number} ({national_id}): {message}", file=sys.stderr)
+
+
+def cmd_import_employees(args):
+    """Bulk-loads employees from a CSV, JSON Lines or JSON file (legacy employees.json included)."""
+    from employee_import import import_employees
+
+    report = import_employees(args.file, update_existing=args.update,
+                              progress=None if args.quiet else _print_progress)
+    if not args.quiet and report.rows_read:
+        print(file=sys.stderr)
+    _report_errors(report, args)
+    print(f"{report.imported} کارمند اضافه شد، {report.updated} کارمند به‌روزرسانی شد، {len(report.errors)} ردیف رد شد.")
+    return 1 if report.errors else 0
+
+
+def cmd_report(args):
+    """Writes one of the ReportsFrame exports as xlsx, CSV or gzip-compressed JSON Lines."""
+    import reports
+
+    report, unit = REPORTS[args.report]
+    fmt = args.format or reports.format_for_filename(args.output) or "xlsx"
+    row_count = reports.export_report(report, args.output, fmt, progress=None if args.quiet else _print_progress,
+                                      use_cache=not args.no_cache)
+    if not args.quiet and row_count >= reports.FETCH_CHUNK_SIZE:
+        print(file=sys.stderr)
+    if row_count == 0:
+        print("داده‌ای برای خروجی گرفتن وجود ندارد.")
+        return 0
+    print(f"گزارش {row_count} {unit} در {args.output} ذخیره شد.")
+    return 0
+
+
+def cmd_export_payslips(args):
+    """Appends the payslips recorded since the last run to a CSV or JSONL feed file."""
+    import reports
+
+    appended = reports.export_new_payslips(args.output, fmt=args.format, reset=args.reset,
+                                           progress=None if args.quiet else _print_progress)
+    if not args.quiet and appended >= reports.FETCH_CHUNK_SIZE:
+        print(file=sys.stderr)
+    print(f"{appended} فیش حقوقی جدید به {args.output} اضافه شد.")
+    return 0
+
+
+def cmd_cache(args):
+    """Shows or empties the report cache (report_cache.py)."""
+    import report_cache
+
+    if args.action == "clear":
+        report_cache.clear()
+    stats = report_cache.stats()
+    print(f"حافظه نهان گزارش‌ها: {stats['entries']} فایل، {stats['bytes'] / 1024:.0f} از {stats['max_bytes'] / 1024:.0f} کیلوبایت")
+    return 0
+
+
+def cmd_vacuum(args):
+    """Returns free pages to the file system (e.g. after the payslip migration)."""
+    import os
+
+    size_before = os.path.getsize(database_ops.DB_NAME)
+    database_ops.compact_database()
+    size_after = os.path.getsize(database_ops.DB_NAME)
+    print(f"حجم پایگاه داده از {size_before / 1024:.0f} به {size_after / 1024:.0f} کیلوبایت رسید.")
+    return 0
+
+
+def cmd_rollup(args):
+    """Checks monthly_attendance against the absences and overtimes tables, or rebuilds it."""
+    if args.action == "rebuild":
+        database_ops.rebuild_monthly_attendance()
+        print("جدول خلاصه ماهانه حضور و غیاب از نو ساخته شد.")
+        return 0
+    mismatches = database_ops.check_monthly_attendance()
+    for national_id, year_month, stored_absence, absence, stored_overtime, overtime in mismatches:
+        print(f"{national_id} {year_month}: غیبت {stored_absence:g} (واقعی {absence:g})، "
+              f"اضافه کار {stored_overtime:g} (واقعی {overtime:g})")
+    if mismatches:
+        print(f"{len(mismatches)} ردیف ناسازگار؛ با «rollup rebuild» اصلاح می‌شود.")
+        return 1
+    print("جدول خلاصه ماهانه با جداول غیبت و اضافه کار سازگار است.")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="payroll_cli", description="اجرای حقوق و دستمزد بدون رابط گرافیکی")
+    parser.add_argument("--db", help=f"مسیر پایگاه داده (پیش‌فرض: {database_ops.DB_NAME})")
+    parser.add_argument("-q", "--quiet", action="store_true", help="عدم نمایش پیشرفت کار")
+    parser.add_argument("--trace", metavar="FILE", help="ثبت زمان اجرای توابع و پرس‌وجوها و ذخیره آن در این فایل JSON")
+    parser.add_argument("--slow-query-ms", type=float, help="آستانه پرس‌وجوی کند برای --trace (میلی‌ثانیه)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    status = subparsers.add_parser("status", help="تعداد رکوردهای هر جدول")
+    status.set_defaults(func=cmd_status)
+
+    payroll = subparsers.add_parser("payroll", help="محاسبه و ثبت حقوق همه کارمندان برای یک ماه")
+    payroll.add_argument("month", type=_valid_month, help="ماه حقوق (YYYY-MM)")
+    payroll.add_argument("--benefits", type=float, default=0, help="مزایای هر کارمند")
+    payroll.add_argument("--deductions", type=float, default=0, help="کسورات متفرقه هر کارمند")
+    payroll.add_argument("--workers", type=int, default=1, help="تعداد پردازه‌های محاسبه")
+    payroll.set_defaults(func=cmd_payroll)
+
+    attendance = subparsers.add_parser("import-attendance", help="ورود غیبت یا اضافه کار از فایل ساعت‌زنی (CSV یا xlsx)")
+    attendance.add_argument("kind", choices=("absences", "overtimes"))
+    attendance.add_argument("file", help="فایل CSV یا xlsx با ستون‌های national_id,date,hours[,note]")
+    attendance.add_argument("--restart", action="store_true", help="ورود دوباره فایل از ابتدا، بدون توجه به نقطه بازیابی")
+    attendance.add_argument("--errors", help="ذخیره گزارش سطرهای رد شده در این فایل CSV")
+    attendance.set_defaults(func=cmd_import_attendance)
+
+    employees = subparsers.add_parser("import-employees", help="ورود گروهی کارمندان از فایل CSV، JSON یا JSONL")
+    employees.add_argument("file", help="ستون‌ها: national_id,first_name,last_name,position,base_salary (یا salary)")
+    employees.add_argument("--update", action="store_true", help="به‌روزرسانی کارمندانی که از قبل وجود دارند")
+    employees.add_argument("--errors", help="ذخیره گزارش ردیف‌های رد شده در این فایل CSV")
+    employees.set_defaults(func=cmd_import_employees)
+
+    report = subparsers.add_parser("report", help="خروجی گزارش‌ها به صورت اکسل، CSV یا JSONL فشرده")
+    report.add_argument("report", choices=tuple(REPORTS))
+    report.add_argument("output", help="مسیر فایل .xlsx، .csv یا .jsonl.gz")
+    report.add_argument("--format", choices=REPORT_FORMATS, help="قالب فایل (پیش‌فرض: از پسوند فایل، در غیر این صورت xlsx)")
+    report.add_argument("--no-cache", action="store_true", help="ساخت دوباره گزارش حتی اگر داده‌ها تغییر نکرده باشند")
+    report.set_defaults(func=cmd_report)
+
+    feed = subparsers.add_parser("export-payslips", help="افزودن فیش‌های حقوقی ثبت‌شده از اجرای قبلی به فایل CSV یا JSONL")
+    feed.add_argument("output", help="مسیر فایل .csv یا .jsonl")
+    feed.add_argument("--format", choices=("csv", "jsonl"), help="قالب فایل (پیش‌فرض: از پسوند فایل)")
+    feed.add_argument("--reset", action="store_true", help="نوشتن دوباره فایل از اولین فیش حقوقی")
+    feed.set_defaults(func=cmd_export_payslips)
+
+    vacuum = subparsers.add_parser("vacuum", help="فشرده‌سازی فایل پایگاه داده")
+    vacuum.set_defaults(func=cmd_vacuum)
+
+    cache = subparsers.add_parser("cache", help="وضعیت یا پاک کردن حافظه نهان گزارش‌ها")
+    cache.add_argument("action", choices=("stats", "clear"))
+    cache.set_defaults(func=cmd_cache)
+
+    rollup = subparsers.add_parser("rollup", help="بررسی یا بازسازی خلاصه ماهانه غیبت و اضافه کار")
+    rollup.add_argument("action", choices=("check", "rebuild"))
+    rollup.set_defaults(func=cmd_rollup)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.db:
+        database_ops.DB_NAME = args.db # get_connection() reads DB_NAME when it opens the connection
+    if args.trace:
+        instrumentation.enable(args.slow_query_ms) # Before the first connection is opened
+    try:
+        init_db()
+        return args.func(args)
+    except Exception as e:
+        print(f"خطا: {e}", file=sys.stderr)
+        return 1
+    finally:
+        close_all_connections()
+        if args.trace:
+            instrumentation.dump(args.trace, extra={"command": sys.argv[1:] if argv is None else list(argv),
+                                                    "employee_cache": database_ops.get_employee_cache_stats()})
+
+
+if __name__ == "__main__":
+    sys.exit(main())
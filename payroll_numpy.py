@@ -0,0 +1,99 @@
+# payroll_numpy.py
+# Columnar (NumPy) version of the payroll formula in payroll.calculate_payslip, for
+# whole-company totals and what-if scenarios. numpy is optional: only this module needs it.
+
+import numpy as np
+
+from config import HOURLY_WORK_HOURS_IN_MONTH, OVERTIME_RATE_FACTOR, ABSENCE_RATE_FACTOR
+from database_ops import (
+    get_connection, get_overtime_totals_for_month, get_absence_totals_for_month
+)
+
+
+def calculate_loan_deductions(loan_employee_index, remaining_amount, installment_amount, employee_count):
+    """Vector version of payroll.calculate_loan_deductions for many employees at once.
+
+    Loans are given as parallel arrays; loan_employee_index maps each loan to its employee row.
+    Returns (per-employee total deduction, per-loan deduction).
+    """
+    installment_amount = np.nan_to_num(installment_amount) # installment_amount is optional (NULL)
+    per_loan = np.where(installment_amount > 0, np.minimum(installment_amount, remaining_amount), 0.0)
+    # bincount adds the loans in input order, the same order as the scalar loop
+    per_employee = np.bincount(loan_employee_index, weights=per_loan, minlength=employee_count)
+    return per_employee, per_loan
+
+
+def calculate_payroll(base_salary, overtime_hours, absence_hours, benefits, deductions, loan_deduction,
+                      hourly_work_hours=HOURLY_WORK_HOURS_IN_MONTH,
+                      overtime_rate_factor=OVERTIME_RATE_FACTOR, absence_rate_factor=ABSENCE_RATE_FACTOR):
+    """Computes overtime pay, absence deduction and net payment for arrays of employees.
+
+    The operations are evaluated in the same order as payroll.calculate_payslip, so the
+    float64 results are identical to the scalar code, not just close.
+    """
+    hourly_base_rate = base_salary / hourly_work_hours
+    overtime_pay = overtime_hours * hourly_base_rate * overtime_rate_factor
+    absence_deduction = absence_hours * hourly_base_rate * absence_rate_factor
+    net_payment = base_salary + overtime_pay + benefits - absence_deduction - deductions - loan_deduction
+    return {
+        "overtime_pay": overtime_pay,
+        "absence_deduction": absence_deduction,
+        "loan_deduction": loan_deduction,
+        "net_payment": net_payment,
+    }
+
+
+def load_payroll_columns(payroll_month):
+    """Loads every employee's payroll inputs for payroll_month (YYYY-MM) as arrays.
+
+    Returns (national_ids, columns) where columns holds base_salary, overtime_hours,
+    absence_hours and loan_deduction arrays aligned with national_ids.
+    """
+    conn = get_connection()
+    employees = conn.execute("SELECT national_id, base_salary FROM employees ORDER BY national_id").fetchall()
+    national_ids = [row[0] for row in employees]
+    row_of = {national_id: i for i, national_id in enumerate(national_ids)}
+    base_salary = np.fromiter((row[1] for row in employees), dtype=np.float64, count=len(employees))
+
+    overtime_hours = np.zeros(len(national_ids))
+    for national_id, hours in get_overtime_totals_for_month(payroll_month).items():
+        if national_id in row_of:
+            overtime_hours[row_of[national_id]] = hours
+    absence_hours = np.zeros(len(national_ids))
+    for national_id, hours in get_absence_totals_for_month(payroll_month).items():
+        if national_id in row_of:
+            absence_hours[row_of[national_id]] = hours
+
+    loans = conn.execute("SELECT employee_national_id, remaining_amount, installment_amount FROM loans WHERE is_active = 1 ORDER BY employee_national_id, loan_date ASC").fetchall()
+    loans = [loan for loan in loans if loan[0] in row_of]
+    loan_employee_index = np.fromiter((row_of[loan[0]] for loan in loans), dtype=np.intp, count=len(loans))
+    remaining_amount = np.fromiter((loan[1] for loan in loans), dtype=np.float64, count=len(loans))
+    installment_amount = np.fromiter((np.nan if loan[2] is None else loan[2] for loan in loans), dtype=np.float64, count=len(loans))
+    loan_deduction, _ = calculate_loan_deductions(loan_employee_index, remaining_amount, installment_amount, len(national_ids))
+
+    columns = {
+        "base_salary": base_salary,
+        "overtime_hours": overtime_hours,
+        "absence_hours": absence_hours,
+        "loan_deduction": loan_deduction,
+    }
+    return national_ids, columns
+
+
+def what_if_totals(payroll_month, benefits=0, deductions=0, **rates):
+    """Company-wide payroll totals for payroll_month, optionally with different rates.
+
+    rates may override hourly_work_hours, overtime_rate_factor and absence_rate_factor,
+    e.g. what_if_totals("2024-03", overtime_rate_factor=1.5). Nothing is written.
+    """
+    national_ids, columns = load_payroll_columns(payroll_month)
+    result = calculate_payroll(columns["base_salary"], columns["overtime_hours"], columns["absence_hours"],
+                               benefits, deductions, columns["loan_deduction"], **rates)
+    return {
+        "employees": len(national_ids),
+        "base_salary": float(columns["base_salary"].sum()),
+        "overtime_pay": float(result["overtime_pay"].sum()),
+        "absence_deduction": float(result["absence_deduction"].sum()),
+        "loan_deduction": float(result["loan_deduction"].sum()),
+        "net_payment": float(result["net_payment"].sum()),
+    }
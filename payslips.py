@@ -0,0 +1,91 @@
+# payslips.py
+# Storage format of payroll.payslip_details and the Persian payslip text rendered from it.
+# Payslips are stored as a compact JSON record; the text is only built when a payslip is shown
+# or exported. Rows written before the JSON format hold the text itself and are passed through.
+
+import json
+import re
+
+PAYSLIP_FORMAT_VERSION = 1
+
+# Amounts as printed by format_payslip_details, for migrating text payslips
+_LEGACY_OVERTIME_PAY = re.compile(r"\(پاداش: (-?\d+) تومان\)")
+_LEGACY_ABSENCE_DEDUCTION = re.compile(r"\(کسر: (-?\d+) تومان\)")
+_LEGACY_LOAN = re.compile(r"وام \(ID: (\d+)\): (-?\d+) تومان \(باقی‌مانده: (-?\d+)\)")
+
+
+def format_payslip_details(payslip):
+    """Renders the Persian payslip text from a payslip dict (as returned by payroll.calculate_payslip)."""
+    payslip_details = (
+        f"گزارش فیش حقوقی برای ماه: {payslip['payroll_month']}\n"
+        f"حقوق پایه: {payslip['base_salary']:.0f} تومان\n"
+        f"ساعات اضافه کار: {payslip['overtime_hours']:.1f} ساعت (پاداش: {payslip['overtime_pay']:.0f} تومان)\n"
+        f"ساعات غیبت: {payslip['absence_hours']:.1f} ساعت (کسر: {payslip['absence_deduction']:.0f} تومان)\n"
+        f"مزایا: {payslip['benefits']:.0f} تومان\n"
+        f"کسورات متفرقه: {payslip['deductions']:.0f} تومان\n"
+        f"کسر بابت وام / پیش‌پرداخت: {payslip['loan_deduction']:.0f} تومان"
+    )
+    if payslip["loan_deductions"]:
+        loan_deductions_detail = [
+            f"وام (ID: {loan_id}): {deducted:.0f} تومان (باقی‌مانده: {new_remaining:.0f})"
+            for loan_id, deducted, new_remaining in payslip["loan_deductions"]
+        ]
+        payslip_details += "\n  - جزئیات کسر وام:\n    " + "\n    ".join(loan_deductions_detail)
+    payslip_details += f"\n\nمبلغ خالص پرداخت: {payslip['net_payment']:.0f} تومان"
+    return payslip_details
+
+
+def encode_payslip_details(payslip):
+    """Builds the stored record: what the payroll columns don't already hold, i.e. the computed
+    line items, the loan breakdown and the rates used (None for migrated payslips)."""
+    return json.dumps({
+        "v": PAYSLIP_FORMAT_VERSION,
+        "rates": payslip["rates"],
+        "overtime_pay": payslip["overtime_pay"],
+        "absence_deduction": payslip["absence_deduction"],
+        "loans": payslip["loan_deductions"],
+    }, separators=(",", ":"), ensure_ascii=False)
+
+
+def render_payslip_details(payroll_month, base_salary, overtime_hours, absence_hours, benefits,
+                           deductions, loan_deduction, net_payment, payslip_details):
+    """Returns the payslip text for a payroll row (columns in the order of the payroll table)."""
+    if not payslip_details or not payslip_details.startswith("{"):
+        return payslip_details # Not migrated (or empty): already text
+    record = json.loads(payslip_details)
+    return format_payslip_details({
+        "payroll_month": payroll_month,
+        "base_salary": base_salary,
+        "overtime_hours": overtime_hours,
+        "absence_hours": absence_hours,
+        "overtime_pay": record["overtime_pay"],
+        "absence_deduction": record["absence_deduction"],
+        "benefits": benefits,
+        "deductions": deductions,
+        "loan_deduction": loan_deduction,
+        "loan_deductions": record["loans"],
+        "net_payment": net_payment,
+    })
+
+
+def convert_legacy_payslip_details(payroll_month, base_salary, overtime_hours, absence_hours, benefits,
+                                   deductions, loan_deduction, net_payment, payslip_details):
+    """Turns a stored payslip text into the JSON record, or returns None if that would change
+    what the payslip shows (e.g. the text was edited by hand), in which case it stays text.
+
+    The text only has whole-toman amounts, so those are what the record keeps.
+    """
+    overtime_pay = _LEGACY_OVERTIME_PAY.search(payslip_details)
+    absence_deduction = _LEGACY_ABSENCE_DEDUCTION.search(payslip_details)
+    if not overtime_pay or not absence_deduction:
+        return None
+    record = encode_payslip_details({
+        "rates": None,
+        "overtime_pay": float(overtime_pay.group(1)),
+        "absence_deduction": float(absence_deduction.group(1)),
+        "loan_deductions": [[int(loan_id), float(deducted), float(remaining)]
+                            for loan_id, deducted, remaining in _LEGACY_LOAN.findall(payslip_details)],
+    })
+    rendered = render_payslip_details(payroll_month, base_salary, overtime_hours, absence_hours, benefits,
+                                      deductions, loan_deduction, net_payment, record)
+    return record if rendered == payslip_details else None
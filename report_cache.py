@@ -0,0 +1,159 @@
+# report_cache.py
+# On-disk cache of generated report files. An entry is keyed by the report, its parameters and a
+# fingerprint of the data it reads: the table_versions tokens of its tables, which triggers
+# change on every committed write (see database_ops.VERSIONED_TABLES). Regenerating an unchanged
+# report is then a file copy. Entries are evicted least recently used first once the cache
+# directory grows past REPORT_CACHE_MAX_BYTES. Reports are generated inside
+# database_ops.read_snapshot() unless REPORT_SNAPSHOT is off.
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import nullcontext
+
+import database_ops
+from config import REPORT_CACHE_ENABLED, REPORT_CACHE_DIR, REPORT_CACHE_MAX_BYTES, REPORT_SNAPSHOT
+
+# Bump when the content of the generated files changes, so old entries are not served
+REPORT_CACHE_FORMAT = 1
+
+DATA_SUFFIX = ".report"
+META_SUFFIX = ".json"
+
+
+def cache_key(report, params, tables):
+    """Hex key of a report: its name, parameters, the database file and the table tokens."""
+    versions = database_ops.get_table_versions(tables)
+    fingerprint = json.dumps([REPORT_CACHE_FORMAT, report, list(params), os.path.abspath(database_ops.DB_NAME),
+                              sorted((table, token) for table, (_, token) in versions.items())])
+    return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+
+
+def _paths(key):
+    base = os.path.join(REPORT_CACHE_DIR, key)
+    return base + DATA_SUFFIX, base + META_SUFFIX
+
+
+def lookup(key):
+    """Returns (data_path, row_count) of a cached entry, or None."""
+    data_path, meta_path = _paths(key)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            row_count = json.load(f)["rows"]
+        os.utime(data_path) # Mark as recently used for eviction (also fails if the data file is gone)
+    except (OSError, ValueError, KeyError):
+        return None
+    return data_path, row_count
+
+
+def store(key, filename, row_count, report=""):
+    """Copies a freshly generated report into the cache, then evicts old entries."""
+    size = os.path.getsize(filename)
+    if size > REPORT_CACHE_MAX_BYTES:
+        return
+    os.makedirs(REPORT_CACHE_DIR, exist_ok=True)
+    data_path, meta_path = _paths(key)
+    # Write to temporary names and rename, so another process never reads a half-written entry
+    for path, write in ((data_path, lambda tmp: shutil.copyfile(filename, tmp)),
+                        (meta_path, lambda tmp: _write_meta(tmp, report, row_count, size))):
+        fd, tmp_path = tempfile.mkstemp(dir=REPORT_CACHE_DIR, suffix=".tmp")
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    evict()
+
+
+def _write_meta(path, report, row_count, size):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"report": report, "rows": row_count, "bytes": size, "created": time.time()}, f)
+
+
+def _entries():
+    """[(last_used, size, key)] of the complete entries in the cache directory."""
+    entries = []
+    try:
+        names = os.listdir(REPORT_CACHE_DIR)
+    except FileNotFoundError:
+        return entries
+    for name in names:
+        if name.endswith(DATA_SUFFIX):
+            try:
+                stat = os.stat(os.path.join(REPORT_CACHE_DIR, name))
+            except FileNotFoundError:
+                continue # Evicted by another process meanwhile
+            entries.append((stat.st_mtime, stat.st_size, name[:-len(DATA_SUFFIX)]))
+    return entries
+
+
+def _remove(key):
+    for path in _paths(key):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def evict(max_bytes=None):
+    """Deletes least recently used entries until the cache fits in max_bytes
+    (REPORT_CACHE_MAX_BYTES by default)."""
+    max_bytes = REPORT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = sorted(_entries())
+    total = sum(size for _, size, _ in entries)
+    for _, size, key in entries:
+        if total <= max_bytes:
+            break
+        _remove(key)
+        total -= size
+
+
+def clear():
+    """Empties the cache."""
+    evict(0)
+
+
+def stats():
+    """Returns the number of entries and their total size in bytes."""
+    entries = _entries()
+    return {"entries": len(entries), "bytes": sum(size for _, size, _ in entries), "max_bytes": REPORT_CACHE_MAX_BYTES}
+
+
+def _report_snapshot():
+    return database_ops.read_snapshot() if REPORT_SNAPSHOT else nullcontext()
+
+
+def cached_export(report, tables, filename, export, progress=None, params=(), use_cache=True):
+    """Writes a report to filename through export(filename, progress), or copies it from the cache
+    if the tables it reads have not changed since it was last generated with the same params.
+
+    Returns (row_count, from_cache). Empty reports are not cached (nothing is written for them).
+    """
+    if not (use_cache and REPORT_CACHE_ENABLED):
+        with _report_snapshot():
+            return export(filename, progress), False
+    hit = lookup(cache_key(report, params, tables))
+    if hit:
+        data_path, row_count = hit
+        try:
+            shutil.copyfile(data_path, filename)
+            return row_count, True
+        except FileNotFoundError:
+            pass # Evicted between lookup and copy; generate it
+    with _report_snapshot():
+        # Taken again from what the export reads: the snapshot's tokens describe exactly its data.
+        # Without a snapshot, a write committed during the export changes the live tokens, so the
+        # entry is stored under the older key and simply never matches again.
+        key = cache_key(report, params, tables)
+        row_count = export(filename, progress)
+    if row_count:
+        try:
+            store(key, filename, row_count, report)
+        except OSError:
+            pass # A cache that cannot be written only costs speed
+    return row_count, False
@@ -0,0 +1,319 @@
+# reports.py
+# Report exports used by ReportsFrame. Kept free of GUI code so they can also run headless.
+# Each report can be written as xlsx (openpyxl), CSV or gzip-compressed JSON Lines; all three
+# stream from the cursor in constant memory, and the last two skip openpyxl entirely. Exports go
+# through report_cache, so an unchanged report is copied, not rebuilt.
+
+import csv
+import gzip
+import io
+import json
+import os
+from itertools import chain, islice
+
+import database_ops
+from database_ops import get_connection
+from payslips import render_payslip_details
+from report_cache import cached_export
+
+FETCH_CHUNK_SIZE = 1000 # Rows pulled from the cursor at a time
+MAX_COLUMN_WIDTH = 80 # Long payslip texts would otherwise produce absurdly wide columns
+GZIP_COMPRESS_LEVEL = 6 # zlib's default; 9 is much slower for a few percent
+
+# Format -> file extension. CSV headers are the sheet's Persian headers; JSON keys are the
+# *_FIELDS names, which match the HTTP service (api_server.py).
+REPORT_FORMATS = {"xlsx": ".xlsx", "csv": ".csv", "jsonl.gz": ".jsonl.gz"}
+
+EMPLOYEES_SHEET_TITLE = "لیست کارمندان"
+EMPLOYEES_HEADERS = ["کد ملی", "نام", "نام خانوادگی", "سمت", "حقوق ثابت"]
+EMPLOYEES_FIELDS = ["national_id", "first_name", "last_name", "position", "base_salary"]
+EMPLOYEES_QUERY = "SELECT national_id, first_name, last_name, position, base_salary FROM employees ORDER BY national_id"
+
+FULL_PAYSLIPS_SHEET_TITLE = "فیش‌های حقوقی کامل"
+FULL_PAYSLIPS_HEADERS = ["کد ملی", "نام", "نام خانوادگی", "ماه", "حقوق پایه (زمان فیش)", "ساعت اضافه کار", "ساعت غیبت", "مزایا", "کسورات متفرقه", "کسر وام", "خالص پرداخت", "تاریخ ثبت فیش", "جزئیات فیش"]
+FULL_PAYSLIPS_FIELDS = ["national_id", "first_name", "last_name", "payroll_month", "base_salary", "overtime_hours",
+                        "absence_hours", "benefits", "deductions", "loan_deduction", "net_payment", "recorded_date", "payslip"]
+FULL_PAYSLIPS_QUERY = '''
+    SELECT 
+        e.national_id, e.first_name, e.last_name, 
+        p.payroll_month, p.base_salary_at_time, p.overtime_hours, 
+        p.absence_hours, p.benefits, p.deductions, p.loan_deduction, 
+        p.net_payment, p.recorded_date, p.payslip_details
+    FROM payroll p
+    JOIN employees e ON p.employee_national_id = e.national_id
+    ORDER BY e.national_id, p.payroll_month DESC
+'''
+
+PAYROLL_SUMMARY_SHEET_TITLE = "خلاصه حقوق و دستمزد"
+PAYROLL_SUMMARY_HEADERS = ["کد ملی", "نام", "نام خانوادگی", "حقوق ثابت", "مجموع پرداختی خالص", "مجموع وام های فعال", "مجموع باقیمانده وام ها"]
+PAYROLL_SUMMARY_FIELDS = ["national_id", "first_name", "last_name", "base_salary", "total_net_paid", "total_loan_amount",
+                          "total_loan_remaining"]
+# One pass: payroll and loan totals are aggregated once per table and LEFT JOINed to employees,
+# instead of two queries per employee.
+PAYROLL_SUMMARY_QUERY = '''
+    SELECT
+        e.national_id, e.first_name, e.last_name, e.base_salary,
+        COALESCE(p.total_net_paid, 0), COALESCE(l.total_loan_amount, 0), COALESCE(l.total_loan_remaining, 0)
+    FROM employees e
+    LEFT JOIN (
+        SELECT employee_national_id, SUM(net_payment) AS total_net_paid
+        FROM payroll GROUP BY employee_national_id
+    ) p ON p.employee_national_id = e.national_id
+    LEFT JOIN (
+        SELECT employee_national_id, SUM(amount) AS total_loan_amount, SUM(remaining_amount) AS total_loan_remaining
+        FROM loans WHERE is_active = 1 GROUP BY employee_national_id
+    ) l ON l.employee_national_id = e.national_id
+    ORDER BY e.national_id
+'''
+
+
+# Incremental payslip feed for the accounting system (export_new_payslips). payroll.id is the
+# watermark: it is AUTOINCREMENT, so ids are never reused, and SQLite commits one write at a time,
+# so no payslip can appear below an id already exported. WHERE p.id > ? is a range seek on the
+# rowid, the table's own index, so a run costs the new rows only.
+NEW_PAYSLIPS_FORMATS = ("csv", "jsonl")
+NEW_PAYSLIPS_FIELDS = ["payroll_id"] + FULL_PAYSLIPS_FIELDS
+NEW_PAYSLIPS_QUERY = '''
+    SELECT
+        p.id, e.national_id, e.first_name, e.last_name,
+        p.payroll_month, p.base_salary_at_time, p.overtime_hours, p.absence_hours, p.benefits,
+        p.deductions, p.loan_deduction, p.net_payment, p.recorded_date, p.payslip_details
+    FROM payroll p
+    JOIN employees e ON p.employee_national_id = e.national_id
+    WHERE p.id > ?
+    ORDER BY p.id
+'''
+
+
+def iter_query(sql, params=(), chunk_size=FETCH_CHUNK_SIZE):
+    """Yields the rows of a query, fetching chunk_size rows at a time instead of fetchall()."""
+    cursor = get_connection().cursor()
+    cursor.execute(sql, params)
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+
+def _json_lines(fields, rows, encode=json.JSONEncoder(ensure_ascii=False).encode):
+    """One JSON object per row, keyed by fields, as a single newline-terminated string."""
+    return "".join([encode(dict(zip(fields, row))) + "\n" for row in rows])
+
+
+def _write_chunks(rows, write_rows, progress=None):
+    """Passes rows to write_rows FETCH_CHUNK_SIZE at a time; returns the row count. progress is
+    called after each full chunk, like write_xlsx_streaming does."""
+    row_count = 0
+    while True:
+        chunk = list(islice(rows, FETCH_CHUNK_SIZE))
+        if not chunk:
+            return row_count
+        write_rows(chunk)
+        row_count += len(chunk)
+        if progress and len(chunk) == FETCH_CHUNK_SIZE:
+            progress(row_count)
+
+
+def _column_widths(headers, rows):
+    """Auto-size widths, using the same (max_length + 2) * 1.2 rule as the GUI exports used to."""
+    max_lengths = [len(str(header)) for header in headers]
+    for row in rows:
+        for i, value in enumerate(row):
+            length = max(len(line) for line in str(value).split("\n")) # Multi-line cells: longest line counts
+            if length > max_lengths[i]:
+                max_lengths[i] = length
+    return [min((length + 2) * 1.2, MAX_COLUMN_WIDTH) for length in max_lengths]
+
+
+def write_xlsx_streaming(filename, sheet_title, headers, rows, progress=None):
+    """Writes rows to filename through openpyxl's write-only mode, in one pass.
+
+    Write-only sheets need column widths before the first row is written, so the widths are
+    taken from the header and the first chunk of rows. Memory use stays flat regardless of the
+    number of rows. progress, if given, is called with the running row count every chunk
+    (it may raise to abort the export). Returns the number of data rows written (nothing is
+    saved when it is 0).
+    """
+    rows = iter(rows)
+    first_chunk = list(islice(rows, FETCH_CHUNK_SIZE))
+    if not first_chunk:
+        return 0
+
+    # Imported here rather than at module level: openpyxl takes longer to import than the
+    # whole headless CLI takes to start, and most commands never write a workbook.
+    import openpyxl
+    from openpyxl.utils import get_column_letter
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_title)
+    for i, width in enumerate(_column_widths(headers, first_chunk), start=1):
+        sheet.column_dimensions[get_column_letter(i)].width = width
+
+    sheet.append(headers)
+    row_count = 0
+    for row in chain(first_chunk, rows):
+        sheet.append(row)
+        row_count += 1
+        if progress and row_count % FETCH_CHUNK_SIZE == 0:
+            progress(row_count)
+    workbook.save(filename)
+    return row_count
+
+
+def write_csv_streaming(filename, headers, rows, progress=None):
+    """Writes rows to filename as CSV, FETCH_CHUNK_SIZE rows at a time. UTF-8 with a BOM, so Excel
+    shows the Persian text. Same contract as write_xlsx_streaming."""
+    rows = iter(rows)
+    first_row = next(rows, None)
+    if first_row is None:
+        return 0
+    with open(filename, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        return _write_chunks(chain((first_row,), rows), writer.writerows, progress)
+
+
+def write_jsonl_gz_streaming(filename, fields, rows, progress=None):
+    """Writes rows to filename as gzip-compressed JSON Lines, one object keyed by fields per row.
+    The gzip header carries no timestamp, so unchanged data gives an identical file. Same contract
+    as write_xlsx_streaming."""
+    rows = iter(rows)
+    first_row = next(rows, None)
+    if first_row is None:
+        return 0
+    with open(filename, "wb") as raw, \
+            gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=GZIP_COMPRESS_LEVEL, mtime=0) as compressed, \
+            io.TextIOWrapper(compressed, encoding="utf-8", newline="\n") as f:
+        return _write_chunks(chain((first_row,), rows), lambda chunk: f.write(_json_lines(fields, chunk)), progress)
+
+
+def iter_full_payslips():
+    """Rows of FULL_PAYSLIPS_QUERY with the stored payslip record rendered to text."""
+    for row in iter_query(FULL_PAYSLIPS_QUERY):
+        # row[3:11] are payroll_month .. net_payment, the columns the text is built from
+        yield row[:12] + (render_payslip_details(*row[3:11], row[12]),)
+
+
+# name: (sheet title, CSV headers, JSON fields, rows(), tables it reads for report_cache)
+REPORT_DEFINITIONS = {
+    "employees": (EMPLOYEES_SHEET_TITLE, EMPLOYEES_HEADERS, EMPLOYEES_FIELDS,
+                  lambda: iter_query(EMPLOYEES_QUERY), ("employees",)),
+    "full_payslips": (FULL_PAYSLIPS_SHEET_TITLE, FULL_PAYSLIPS_HEADERS, FULL_PAYSLIPS_FIELDS,
+                      iter_full_payslips, ("employees", "payroll")),
+    "payroll_summary": (PAYROLL_SUMMARY_SHEET_TITLE, PAYROLL_SUMMARY_HEADERS, PAYROLL_SUMMARY_FIELDS,
+                        lambda: iter_query(PAYROLL_SUMMARY_QUERY), ("employees", "payroll", "loans")),
+}
+
+
+def format_for_filename(filename):
+    """The REPORT_FORMATS entry whose extension filename ends with, or None."""
+    lowered = filename.lower()
+    for fmt, extension in REPORT_FORMATS.items():
+        if lowered.endswith(extension):
+            return fmt
+    return None
+
+
+def _report_writer(report, fmt):
+    title, headers, fields, rows, _ = REPORT_DEFINITIONS[report]
+    if fmt == "xlsx":
+        return lambda filename, progress=None: write_xlsx_streaming(filename, title, headers, rows(), progress)
+    if fmt == "csv":
+        return lambda filename, progress=None: write_csv_streaming(filename, headers, rows(), progress)
+    return lambda filename, progress=None: write_jsonl_gz_streaming(filename, fields, rows(), progress)
+
+
+def export_report(report, filename, fmt="xlsx", progress=None, use_cache=True):
+    """Writes one of REPORT_DEFINITIONS to filename as fmt (a REPORT_FORMATS key). Returns the
+    number of rows; nothing is written for an empty report."""
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"قالب گزارش باید یکی از {', '.join(REPORT_FORMATS)} باشد.")
+    tables = REPORT_DEFINITIONS[report][4]
+    return cached_export(f"{report}_{fmt}", tables, filename, _report_writer(report, fmt), progress, use_cache=use_cache)[0]
+
+
+def export_employees_xlsx(filename, progress=None, use_cache=True):
+    """Exports the employee list. Returns the number of employees."""
+    return export_report("employees", filename, "xlsx", progress, use_cache)
+
+
+def export_full_payslips_xlsx(filename, progress=None, use_cache=True):
+    """Exports every recorded payslip with the employee's name. Returns the number of payslips."""
+    return export_report("full_payslips", filename, "xlsx", progress, use_cache)
+
+
+def export_payroll_summary_xlsx(filename, progress=None, use_cache=True):
+    """Exports each employee's total net pay and active loan totals. Returns the number of employees."""
+    return export_report("payroll_summary", filename, "xlsx", progress, use_cache)
+
+
+def iter_new_payslips(after_id):
+    """Rows of NEW_PAYSLIPS_QUERY after payroll id after_id, with the payslip rendered to text."""
+    for row in iter_query(NEW_PAYSLIPS_QUERY, (after_id,)):
+        # row[4:12] are payroll_month .. net_payment, the columns the text is built from
+        yield row[:13] + (render_payslip_details(*row[4:12], row[13]),)
+
+
+def _new_payslips_format(filename, fmt):
+    fmt = (fmt or os.path.splitext(filename)[1].lstrip(".")).lower()
+    if fmt not in NEW_PAYSLIPS_FORMATS:
+        raise ValueError(f"قالب خروجی باید یکی از {', '.join(NEW_PAYSLIPS_FORMATS)} باشد.")
+    return fmt
+
+
+def export_new_payslips(filename, fmt=None, reset=False, progress=None):
+    """Appends the payslips recorded since the previous run to a CSV or JSONL file (fmt, or the
+    file's extension). Returns the number of payslips appended.
+
+    The watermark and the file size it covers are kept in export_watermarks and saved only after
+    the appended rows are on disk, so an interrupted run is truncated back and redone by the next
+    one: re-running never duplicates or loses a payslip, and with nothing new it writes nothing.
+    An existing file this export did not write is refused unless reset, which rewrites it from the
+    first payslip. progress, if given, is called with the running row count every chunk.
+    """
+    fmt = _new_payslips_format(filename, fmt)
+    target = os.path.abspath(filename)
+    size = os.path.getsize(target) if os.path.exists(target) else None
+    watermark = None if reset else database_ops.get_export_watermark(target)
+    if watermark is None and size and not reset:
+        raise ValueError(f"فایل {filename} از قبل وجود دارد و با خروجی افزایشی ساخته نشده است.")
+    if watermark is None or size is None or size < watermark[1]:
+        last_id, keep_bytes, total_rows = 0, 0, 0 # New target, or the file was removed or cut short: start over
+    else:
+        last_id, keep_bytes, total_rows = watermark
+
+    rows = iter_new_payslips(last_id)
+    first_row = next(rows, None)
+    if first_row is None and watermark is not None and size == keep_bytes:
+        return 0 # Nothing new and nothing to repair
+    if size is not None and size != keep_bytes:
+        os.truncate(target, keep_bytes) # Drop what an interrupted run appended after the watermark
+
+    row_count = 0
+    try:
+        with open(target, "a", encoding="utf-8", newline="") as f:
+            if fmt == "csv":
+                writer = csv.writer(f)
+                if keep_bytes == 0:
+                    writer.writerow(NEW_PAYSLIPS_FIELDS)
+                write_row = writer.writerow
+            else:
+                write_row = lambda row: f.write(_json_lines(NEW_PAYSLIPS_FIELDS, (row,)))
+            for row in (chain((first_row,), rows) if first_row is not None else ()):
+                write_row(row)
+                last_id = row[0]
+                row_count += 1
+                if progress and row_count % FETCH_CHUNK_SIZE == 0:
+                    progress(row_count)
+            f.flush()
+            os.fsync(f.fileno()) # The rows must be on disk before the watermark says they are
+    except BaseException:
+        rows.close()
+        os.truncate(target, keep_bytes)
+        raise
+    database_ops.save_export_watermark(target, last_id, os.path.getsize(target), total_rows + row_count)
+    return row_count
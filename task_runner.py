@@ -0,0 +1,133 @@
+# task_runner.py
+# Runs database and export jobs off the Tk thread. Jobs execute on one worker thread (SQLite
+# writes are serialized anyway); results, errors and progress come back through a queue that
+# the Tk thread polls with after(), because Tk widgets must only be touched from the Tk thread.
+
+import queue
+import threading
+import tkinter as tk
+
+from database_ops import close_connection
+
+POLL_INTERVAL_MS = 30
+
+
+class TaskCancelled(Exception):
+    """Raised inside a job by TaskContext.raise_if_cancelled() once cancel() was requested."""
+
+
+class TaskContext:
+    """Handed to each job as its first argument, for progress reporting and cancellation."""
+
+    def __init__(self, runner, task_id):
+        self._runner = runner
+        self._task_id = task_id
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """Asks the job to stop at its next raise_if_cancelled() check."""
+        self._cancel_event.set()
+
+    def raise_if_cancelled(self):
+        if self._cancel_event.is_set():
+            raise TaskCancelled()
+
+    def report_progress(self, done, total=None):
+        """Sends progress to the Tk thread (total=None when the total isn't known)."""
+        self._runner._results.put((self._task_id, "progress", (done, total)))
+
+
+class BackgroundTaskRunner:
+    def __init__(self, tk_widget, poll_interval_ms=POLL_INTERVAL_MS):
+        self.tk_widget = tk_widget
+        self.poll_interval_ms = poll_interval_ms
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._callbacks = {}
+        self._next_task_id = 0
+        self._poll_after_id = None
+        self._worker = threading.Thread(target=self._work, name="db-worker", daemon=True)
+        self._worker.start()
+
+    def submit(self, func, *args, owner=None, on_success=None, on_error=None, on_progress=None, on_cancelled=None):
+        """Queues func(context, *args) on the worker thread and returns its TaskContext.
+
+        The on_* callbacks run on the Tk thread. If owner (a widget) has been destroyed by the
+        time the result arrives, the callbacks are skipped.
+        """
+        self._next_task_id += 1
+        task_id = self._next_task_id
+        context = TaskContext(self, task_id)
+        self._callbacks[task_id] = (owner, on_success, on_error, on_progress, on_cancelled)
+        self._jobs.put((task_id, context, func, args))
+        self._schedule_poll()
+        return context
+
+    def shutdown(self):
+        """Stops the worker after the jobs already queued."""
+        self._jobs.put(None)
+        if self._poll_after_id is not None:
+            try:
+                self.tk_widget.after_cancel(self._poll_after_id)
+            except tk.TclError:
+                pass # Interpreter already gone
+            self._poll_after_id = None
+
+    def _work(self):
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    break
+                task_id, context, func, args = job
+                try:
+                    if context.cancelled:
+                        raise TaskCancelled()
+                    self._results.put((task_id, "success", func(context, *args)))
+                except TaskCancelled:
+                    self._results.put((task_id, "cancelled", None))
+                except Exception as e:
+                    self._results.put((task_id, "error", e))
+        finally:
+            close_connection() # This thread's SQLite connection
+
+    def _schedule_poll(self):
+        if self._poll_after_id is None:
+            self._poll_after_id = self.tk_widget.after(self.poll_interval_ms, self._poll)
+
+    def _poll(self):
+        self._poll_after_id = None
+        while True:
+            try:
+                task_id, kind, payload = self._results.get_nowait()
+            except queue.Empty:
+                break
+            owner, on_success, on_error, on_progress, on_cancelled = self._callbacks.get(task_id, (None,) * 5)
+            if kind != "progress":
+                self._callbacks.pop(task_id, None)
+            if owner is not None and not _widget_exists(owner):
+                continue
+            if kind == "progress" and on_progress:
+                on_progress(*payload)
+            elif kind == "success" and on_success:
+                on_success(payload)
+            elif kind == "error":
+                if on_error:
+                    on_error(payload)
+                else:
+                    self.tk_widget.report_callback_exception(type(payload), payload, payload.__traceback__)
+            elif kind == "cancelled" and on_cancelled:
+                on_cancelled()
+        if self._callbacks:
+            self._schedule_poll() # Keep polling only while jobs are outstanding
+
+
+def _widget_exists(widget):
+    try:
+        return bool(widget.winfo_exists())
+    except tk.TclError:
+        return False